@@ -44,7 +44,8 @@ resource "aws_backup_selection" "payment_backup_selection" {
   plan_id      = aws_backup_plan.payment_backup_plan.id
   iam_role_arn = aws_iam_role.backup_role.arn # IAM Role for Backup Selection
   resources = [
-    aws_dynamodb_table.payment_ledger.arn,     # Reference to payment ledger table
-    aws_dynamodb_table.payment_audit_trail.arn # Reference to payment audit trail table
+    aws_dynamodb_table.payment_ledger.arn,         # Reference to payment ledger table
+    aws_dynamodb_table.payment_audit_trail.arn,    # Reference to the pre-migration payment audit trail table
+    aws_dynamodb_table.payment_audit_trail_v2.arn  # Reference to payment audit trail table
   ]
 }
\ No newline at end of file
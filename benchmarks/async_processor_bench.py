@@ -0,0 +1,56 @@
+"""Wall-clock time for 1, 10 and 100 concurrent payments by execution mode.
+
+Compares sequential processor calls, the thread-pool batch path and the
+asyncio path (BATCH_EXECUTION_MODE=asyncio) against a local stub processor.
+Run from the repository root:
+
+    python benchmarks/async_processor_bench.py --processor-latency-ms 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+from stub_processor import StubProcessor  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processor-latency-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    aws = local_aws.install()
+    ledger, audit = aws.create_payment_tables()
+    limit = str(max(args.concurrency))
+
+    with StubProcessor(latency_ms=args.processor_latency_ms) as processor:
+        os.environ.update({
+            "DYNAMODB_LEDGER_TABLE_NAME": ledger,
+            "DYNAMODB_AUDIT_TABLE_NAME": audit,
+            "PROCESSOR_URL": processor.url,
+            "API_KEY": "bench",
+            # One EMF record per invocation would interleave with the report
+            "TRACE_ENABLED": "false",
+            "PROCESSOR_POOL_SIZE": limit,
+            "ASYNC_PROCESSOR_THREADS": limit,
+        })
+        import paymentledgeraudittrail
+
+        for count in args.concurrency:
+            payments = [{"process_type": "sale", "amount": "10.00"}] * count
+            for mode, workers in (("sequential", 1), ("threads", count), ("asyncio", count)):
+                paymentledgeraudittrail.BATCH_EXECUTION_MODE = "asyncio" if mode == "asyncio" else "threads"
+                paymentledgeraudittrail.BATCH_MAX_WORKERS = workers
+                start = time.perf_counter()
+                results = paymentledgeraudittrail.settle_payments(payments)
+                elapsed = time.perf_counter() - start
+                assert all(result["status"] == "success" for result in results), results
+                print(f"payments={count:<4} mode={mode:<10} wall_ms={elapsed * 1000:8.1f} payments/s={count / elapsed:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Audit trail verification: full table scan vs checkpointed range verification, by trail size.
+
+For each --sizes trail, hash-chained audit records (one to three per
+transaction) are spread over --hours hourly buckets of a local audit table
+with bucket-index, and every bucket is sealed with a Merkle checkpoint.
+Then the trail is verified four ways:
+- "scan all": the previous approach. It scans the whole table and rechecks
+  every record hash and chain link.
+- "range, all hours": the same period through audit_verifier.verify_range.
+- "range, 1 hour": one bucket.
+- "range, 5 minutes": only the record chunks that overlap the window, with
+  the stored roots of the other chunks standing in for their records.
+
+Records read and read units are the portable measure. In the stand-in, every
+Query filters the whole table, so wall time there grows with trail size even
+for small ranges. The largest trail is then tampered with, and each tamper
+must be reported. Run from the repository root:
+
+    python benchmarks/audit_verify_bench.py --sizes 2000,10000,40000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+import audit_chain  # noqa: E402
+import audit_verifier  # noqa: E402
+import dynamodb_batch  # noqa: E402
+import event_ids  # noqa: E402
+
+TABLE = "Payment-AuditTrail"
+BASE = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+# Client wrapper counting read units; every read asks for ConsumedCapacity
+class CountingClient:
+    def __init__(self, client):
+        self.client = client
+        self.read_units = 0.0
+
+    def __getattr__(self, name):
+        call = getattr(self.client, name)
+
+        def counted(**kwargs):
+            kwargs.setdefault("ReturnConsumedCapacity", "TOTAL")
+            response = call(**kwargs)
+            consumed = response.get("ConsumedCapacity") or []
+            for entry in [consumed] if isinstance(consumed, dict) else consumed:
+                self.read_units += float(entry.get("CapacityUnits", 0))
+            return response
+        return counted
+
+
+def build_trail(size, hours):
+    backend = local_aws.LocalDynamoDB()
+    backend.create_table(TABLE, audit_chain.HASH_KEY, audit_chain.RANGE_KEY, indexes=[
+        local_aws.LocalIndex(audit_chain.BUCKET_INDEX, audit_chain.BUCKET_ATTRIBUTE, audit_chain.RANGE_KEY),
+    ])
+    chain = audit_chain.AuditChain()
+    span = timedelta(hours=hours) / size
+    requests, transaction_id = [], None
+    for i in range(size):
+        if i % 3 == 0 or transaction_id is None:
+            transaction_id, new_chain = str(uuid.uuid4()), True
+        else:
+            new_chain = False
+        moment = BASE + span * i
+        item = {
+            "transaction_id": transaction_id,
+            "event_id": event_ids.new_event_id(moment),
+            "action_type": "PAYMENT-SUCCESS",
+            "timestamp": str(moment),
+            "action_details": {"status": "approved", "amount": "10.00", "processor": "elavon"},
+        }
+        requests.append(dynamodb_batch.put_request(TABLE, chain.link(item, moment, new_chain)))
+    dynamodb_batch.batch_write(backend.client, requests)
+    sealed = audit_chain.seal_pending(backend.client, TABLE, now=BASE + timedelta(hours=hours), delay_seconds=0,
+                                      max_buckets=hours + 1, first_bucket=audit_chain.bucket_of(BASE))
+    assert len(sealed) == hours, sealed
+    return backend
+
+
+# The previous approach: read every record and recheck every hash and link
+def scan_all(client):
+    records, report = {}, {"records_in_range": 0, "links_checked": 0, "links_outside_range": 0, "problems": []}
+    params = {"TableName": TABLE}
+    read = 0
+    while True:
+        response = client.scan(**params)
+        for item in response["Items"]:
+            if item["transaction_id"] == audit_chain.CHECKPOINT_PARTITION:
+                continue
+            read += 1
+            audit_verifier._check_record(item, "", "~", records, report)
+        if "LastEvaluatedKey" not in response:
+            break
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    audit_verifier._check_links(records, report)
+    return dict(report, records_read=read)
+
+
+def timed(backend, verify):
+    client = CountingClient(backend.client)
+    backend.reset_counters()
+    start = time.perf_counter()
+    report = verify(client)
+    return report, (time.perf_counter() - start) * 1000, client.read_units, backend.round_trips()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="2000,10000,40000")
+    parser.add_argument("--hours", type=int, default=24)
+    args = parser.parse_args()
+
+    end = BASE + timedelta(hours=args.hours)
+    hour = BASE + timedelta(hours=args.hours // 2)
+    window = hour + timedelta(minutes=20)
+    checks = [
+        ("scan all", scan_all),
+        ("range, all hours", lambda client: audit_verifier.verify_range(client, TABLE, BASE, end)),
+        ("range, 1 hour", lambda client: audit_verifier.verify_range(client, TABLE, hour, hour + timedelta(hours=1))),
+        ("range, 5 minutes",
+         lambda client: audit_verifier.verify_range(client, TABLE, window, window + timedelta(minutes=5))),
+    ]
+    backend = None
+    for size in [int(size) for size in args.sizes.split(",")]:
+        backend = build_trail(size, args.hours)
+        print(f"trail of {size} records over {args.hours} buckets")
+        for label, verify in checks:
+            report, ms, read_units, calls = timed(backend, verify)
+            assert not report["problems"], report["problems"][:5]
+            print(f"  {label:<17} ms={ms:8.1f} records_read={report['records_read']:6d} "
+                  f"in_range={report['records_in_range']:6d} read_units={read_units:7.1f} calls={calls:4d} "
+                  f"links_checked={report['links_checked']}")
+
+    # Tampering with the largest trail; each must show up in a range check of the hour it touched
+    table = backend.tables[TABLE]
+    hour_end = hour + timedelta(hours=1)
+    in_hour = sorted((item for item in table.items.values()
+                      if audit_chain.bucket_of_key(item.get(audit_chain.BUCKET_ATTRIBUTE, ""))
+                      == audit_chain.bucket_of(hour)),
+                     key=lambda item: item[audit_chain.RANGE_KEY])
+    victim, second = in_hour[len(in_hour) // 2], in_hour[len(in_hour) // 3]
+    checkpoint = table.items[tuple(audit_chain.checkpoint_key(audit_chain.bucket_of(hour)).values())]
+
+    def altered_field():
+        victim["action_type"] = "PAYMENT-REFUND"
+
+    def rehashed():
+        # Altered and re-hashed: the next record's link, or the chunk root, gives it away
+        victim["action_details"] = {"status": "declined"}
+        victim["record_hash"] = audit_chain.record_hash(victim)
+
+    def deleted():
+        table.remove(table.key_of(second))
+
+    def inserted():
+        fake = dict(second, event_id=event_ids.event_id(event_ids.event_id_millis(second["event_id"]), 1))
+        fake["record_hash"] = audit_chain.record_hash(fake)
+        table.store(table.key_of(fake), fake)
+
+    def checkpoint_rewritten():
+        checkpoint["leaf_count"] = checkpoint["leaf_count"] - 1
+
+    for label, tamper in (("altered field", altered_field), ("altered and re-hashed", rehashed),
+                          ("deleted record", deleted), ("inserted record", inserted),
+                          ("rewritten checkpoint", checkpoint_rewritten)):
+        snapshot = {key: dict(item) for key, item in table.items.items()}
+        tamper()
+        report = audit_verifier.verify_range(backend.client, TABLE, hour, hour_end)
+        print(f"tamper: {label:<22} detected={'yes' if report['problems'] else 'NO'} "
+              f"({report['problems'][0] if report['problems'] else ''})")
+        table.items.clear()
+        table.items.update(snapshot)
+        victim, second = table.items[table.key_of(victim)], table.items[table.key_of(second)]
+        checkpoint = table.items[table.key_of(checkpoint)]
+
+
+if __name__ == "__main__":
+    main()
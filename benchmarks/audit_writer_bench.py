@@ -0,0 +1,147 @@
+"""Single-payment latency and write units with the audit entry in the success transaction vs the async audit writer.
+
+Each mode runs in a fresh interpreter, because the lambda reads
+AUDIT_WRITE_MODE at import. The child runs --payments single payments through
+lambda_handler against the local AWS stand-in (--dynamodb-latency-ms per call)
+and the stub processor, with and without an idempotency key, and reports
+latency, DynamoDB calls and write units per payment. Transactional is the
+default. In async mode the audit BatchWriteItem overlaps the idempotency
+finish write; without a key there is nothing for it to overlap, so it adds the
+flush wait instead, and async saves write units but not latency.
+
+The spill run throttles every BatchWriteItem and checks the durability
+fallback end to end. Entries go to the SQS stand-in (replayed through
+audit_spill_handler) or, with no queue, to the local spill file (retried by the
+next invocation's flush), and every audit entry must reach the table. Run from
+the repository root:
+
+    python benchmarks/audit_writer_bench.py --payments 300 --dynamodb-latency-ms 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from stub_processor import StubProcessor  # noqa: E402
+
+CHILD = r"""
+import io, json, logging, statistics, sys, time
+from contextlib import redirect_stdout
+args = json.loads(sys.argv[1])
+sys.path[:0] = [args["benchmarks"], args["lambda_function"]]
+import local_aws
+aws = local_aws.install(local_aws.LocalAWS(dynamodb_latency_ms=args["dynamodb_latency_ms"]))
+ledger_table, audit_table = aws.create_payment_tables()
+import paymentledgeraudittrail
+logging.disable(logging.CRITICAL)
+
+
+def payment(keyed):
+    event = {"process_type": "sale", "amount": "10.00"}
+    if keyed:
+        event["idempotency_key"] = f"bench-{time.perf_counter_ns()}"
+    return event
+
+
+def run(payments, keyed):
+    paymentledgeraudittrail.lambda_handler(payment(keyed), None)
+    aws.dynamodb.reset_counters()
+    latencies = []
+    for _ in range(payments):
+        start = time.perf_counter()
+        assert paymentledgeraudittrail.lambda_handler(payment(keyed), None)["statusCode"] == 200
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "ms_p50": statistics.median(latencies),
+        "ms_mean": statistics.mean(latencies),
+        "calls": aws.dynamodb.round_trips() / payments,
+        "wcu": aws.dynamodb.write_units / payments,
+    }
+
+
+def spill(payments):
+    aws.dynamodb.throttle_rate = 1.0
+    for _ in range(payments):
+        assert paymentledgeraudittrail.lambda_handler(payment(False), None)["statusCode"] == 200
+    writer = paymentledgeraudittrail.audit_writer
+    writer.flush()
+    aws.dynamodb.throttle_rate = 0.0
+    stats = writer.stats()
+    if args["spill_queue"]:
+        while len(aws.sqs):
+            event = aws.sqs.poll(25)
+            aws.sqs.complete(event, paymentledgeraudittrail.audit_spill_handler(event, None))
+    else:
+        # The next invocation's flush retries the spill file
+        paymentledgeraudittrail.lambda_handler(payment(False), None)
+        payments += 1
+    return {"stats": stats, "audit_rows": len(aws.dynamodb.tables[audit_table].items), "payments": payments}
+
+
+with redirect_stdout(io.StringIO()):
+    if args["spill"]:
+        result = spill(args["payments"])
+    else:
+        result = {"plain": run(args["payments"], False), "keyed": run(args["payments"], True)}
+print(json.dumps(result))
+"""
+
+
+def run_child(env, **child_args):
+    child_args.update({"benchmarks": HERE, "lambda_function": os.path.join(HERE, "..", "lambda_function")})
+    child = subprocess.run([sys.executable, "-c", CHILD, json.dumps(child_args)], env=env, capture_output=True, text=True)
+    if child.returncode:
+        raise RuntimeError(child.stderr[-2000:])
+    return json.loads(child.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payments", type=int, default=300)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=5.0)
+    parser.add_argument("--spill-payments", type=int, default=20)
+    args = parser.parse_args()
+
+    with StubProcessor() as processor, tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env.update({
+            "DYNAMODB_LEDGER_TABLE_NAME": "Payment-Ledger",
+            "DYNAMODB_AUDIT_TABLE_NAME": "Payment-AuditTrail",
+            "PROCESSOR_URL": processor.url,
+            "API_KEY": "bench",
+            "PREWARM_ON_INIT": "false",
+            "TRACE_ENABLED": "false",
+            "AUDIT_SPILL_PATH": os.path.join(workdir, "audit-spill.jsonl"),
+        })
+        for mode in ("transactional", "async"):
+            env["AUDIT_WRITE_MODE"] = mode
+            result = run_child(env, payments=args.payments, dynamodb_latency_ms=args.dynamodb_latency_ms, spill=False)
+            for keyed in ("plain", "keyed"):
+                row = result[keyed]
+                print(f"{mode:<13} {'idempotency key' if keyed == 'keyed' else 'no key':<15} "
+                      f"p50={row['ms_p50']:6.2f}ms mean={row['ms_mean']:6.2f}ms "
+                      f"dynamodb_calls={row['calls']:.2f} wcu={row['wcu']:.2f} per payment")
+
+        # Throttled writes retry for a few seconds before spilling; a short flush timeout spills what is
+        # still queued straight away
+        env.update({"AUDIT_WRITE_MODE": "async", "AUDIT_FLUSH_TIMEOUT_SECONDS": "0.05"})
+        for target in ("sqs", "file"):
+            if target == "sqs":
+                env["AUDIT_SPILL_QUEUE_URL"] = "https://sqs.local/audit-spill"
+            else:
+                env.pop("AUDIT_SPILL_QUEUE_URL", None)
+            result = run_child(env, payments=args.spill_payments, dynamodb_latency_ms=0.0, spill=True,
+                               spill_queue=target == "sqs")
+            stats = result["stats"]
+            print(f"spill to {target:<4} payments={result['payments']} spilled_sqs={stats['spilled_sqs']} "
+                  f"spilled_file={stats['spilled_file']} audit_rows={result['audit_rows']} "
+                  f"{'ok' if result['audit_rows'] == result['payments'] else 'MISSING ENTRIES'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compression ratio and write throughput of each backup format.
+
+Fills a local ledger table with rows whose status, process_type, card_type and
+merchant_id repeat the way production rows do, backs it up once per format
+through dynamodb_backup.backup_table, and decodes every object again to check
+it round-trips. Ratios are against plain NDJSON. ndjson.zst is skipped unless
+the zstandard package is installed. Run from the repository root:
+
+    python benchmarks/backup_format_bench.py --items 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+
+
+def ledger_row(rng):
+    status = rng.choice(["PAYMENT-SUCCESS"] * 8 + ["PAYMENT-PENDING", "PAYMENT-INITIATED"])
+    return {
+        "transaction_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "process_type": rng.choice(["sale", "sale", "sale", "refund", "authorize"]),
+        "status": status,
+        "card_type": rng.choice(["VISA", "MASTERCARD", "AMEX", "DISCOVER"]),
+        "merchant_id": f"M-{rng.randrange(50):04d}",
+        "amount": Decimal(rng.randrange(100, 100000)) / 100,
+        "timestamp": f"2024-05-{rng.randrange(1, 29):02d} {rng.randrange(24):02d}:{rng.randrange(60):02d}:"
+                     f"{rng.randrange(60):02d}.{rng.randrange(10 ** 6):06d}+00:00",
+        "response_details": json.dumps({"status": "success", "message": "Approved",
+                                        "transaction_id": f"EL{rng.randrange(10 ** 12)}"}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    aws = local_aws.install()
+    ledger, audit = aws.create_payment_tables()
+    table = aws.dynamodb.table(ledger)
+    rng = random.Random(args.seed)
+    for _ in range(args.items):
+        item = ledger_row(rng)
+        table.store(table.key_of(item), item)
+
+    os.environ.update({
+        "DYNAMODB_LEDGER_TABLE_NAME": ledger,
+        "DYNAMODB_AUDIT_TABLE_NAME": audit,
+        "S3_BACKUP_BUCKET_NAME": "backup-bucket",
+    })
+    import backup_formats
+    import dynamodb_backup
+
+    baseline = None
+    for backup_format in backup_formats.FORMATS:
+        if backup_format == "ndjson.zst" and backup_formats.zstandard is None:
+            print(f"{backup_format:<11} skipped (zstandard not installed)")
+            continue
+        start = time.perf_counter()
+        summary = dynamodb_backup.backup_table(ledger, f"bench.{backup_format}", backup_format)
+        elapsed = time.perf_counter() - start
+
+        body = aws.s3.objects[("backup-bucket", f"backup/bench.{backup_format}")]
+        chunks = (body[i:i + (1 << 20)] for i in range(0, len(body), 1 << 20))
+        start = time.perf_counter()
+        restored = sum(1 for _ in backup_formats.iter_items(backup_format, chunks))
+        decode = time.perf_counter() - start
+        assert restored == args.items, (backup_format, restored)
+
+        baseline = baseline or len(body)
+        print(
+            f"{backup_format:<11} bytes={len(body):>11,} ratio_vs_ndjson={baseline / len(body):5.2f} "
+            f"write_items/s={args.items / elapsed:9.0f} write_mb/s={summary['mb_per_second']:6.1f} "
+            f"decode_items/s={args.items / decode:9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Peak RSS of the backup lambda against table size: in-memory JSON vs streaming.
+
+Each run is a fresh subprocess so ru_maxrss is that run's own peak. Rows come
+from a synthetic scan that generates pages on demand (so the table itself is
+never resident) and uploads go to a local S3 that keeps only object sizes.
+"json" is the previous behaviour (collect every item, json.dumps, one
+PutObject); "streaming" is backup_table (NDJSON pages into a multipart
+upload). Run from the repository root:
+
+    python benchmarks/backup_memory_bench.py --items 20000 100000 400000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+
+PAGE_ITEMS = 2500
+
+# Same allocator setting as the dynamodb_backup function in lambda_function.tf; without it glibc keeps
+# freed part buffers in its heaps and RSS creeps up with object size even though live memory does not
+MALLOC_ENV = {"MALLOC_MMAP_THRESHOLD_": "131072"}
+
+
+class SyntheticScanClient:
+    # Scan-only DynamoDB client over `items` generated ledger rows; item i belongs to segment i % TotalSegments
+    def __init__(self, items):
+        self.items = items
+
+    def scan(self, TableName, Segment=0, TotalSegments=1, ExclusiveStartKey=None, Limit=None, **kwargs):
+        index = Segment
+        if ExclusiveStartKey:
+            index = int(ExclusiveStartKey["transaction_id"].split("-")[1]) + TotalSegments
+        page = []
+        while index < self.items and len(page) < (Limit or PAGE_ITEMS):
+            page.append({
+                "transaction_id": f"txn-{index:012d}",
+                "process_type": "sale",
+                "status": "PAYMENT-SUCCESS",
+                "timestamp": "2024-01-01 00:00:00.000000+00:00",
+                "amount": Decimal("10.00"),
+                "response_details": json.dumps({"status": "success", "message": "Approved", "code": index}),
+            })
+            index += TotalSegments
+        response = {"Items": page, "Count": len(page), "ConsumedCapacity": {"CapacityUnits": len(page) / 10.0}}
+        if index < self.items:
+            response["LastEvaluatedKey"] = {"transaction_id": page[-1]["transaction_id"], "process_type": "sale"}
+        return response
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def child(mode, items):
+    aws = local_aws.LocalAWS()
+    aws.s3 = local_aws.LocalS3(keep_bodies=False)
+    local_aws.install(aws)
+    os.environ.update({
+        "DYNAMODB_LEDGER_TABLE_NAME": "Payment-Ledger",
+        "DYNAMODB_AUDIT_TABLE_NAME": "Payment-AuditTrail",
+        "S3_BACKUP_BUCKET_NAME": "backup-bucket",
+    })
+    import backup_formats
+    import dynamodb_backup
+    from parallel_scan import scan_all
+
+    client = SyntheticScanClient(items)
+    dynamodb_backup.dynamodb_client = client
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "json":
+        rows, _ = scan_all(client, "Payment-Ledger", dynamodb_backup.SCAN_TOTAL_SEGMENTS)
+        aws.s3.put_object(Bucket="backup-bucket", Key="backup/ledger.json",
+                          Body=json.dumps(rows, default=backup_formats.json_default))
+    else:
+        dynamodb_backup.backup_table("Payment-Ledger", "ledger.ndjson")
+    elapsed = time.perf_counter() - start
+    size = sum(aws.s3.sizes.values())
+    print(json.dumps({"peak_rss_mb": peak_rss_mb(), "baseline_mb": baseline, "seconds": elapsed, "bytes": size}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[20000, 100000, 400000])
+    parser.add_argument("--modes", nargs="+", default=["json", "streaming"])
+    parser.add_argument("--child", choices=["json", "streaming"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.items[0])
+        return
+
+    for items in args.items:
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, "--items", str(items)],
+                check=True, capture_output=True, text=True, env={**os.environ, **MALLOC_ENV},
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(output)
+            print(
+                f"items={items:<8} mode={mode:<10} peak_rss_mb={result['peak_rss_mb']:7.1f} "
+                f"(+{result['peak_rss_mb'] - result['baseline_mb']:6.1f} over imports) "
+                f"object_mb={result['bytes'] / 1048576:7.1f} seconds={result['seconds']:6.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Payments per second: one payment per invocation vs the batch event shape.
+
+Run from the repository root:
+
+    python benchmarks/batch_payment_bench.py --payments 200 --processor-latency-ms 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+from stub_processor import StubProcessor  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--processor-latency-ms", type=float, default=20.0)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 5, 10, 25])
+    args = parser.parse_args()
+
+    aws = local_aws.install(local_aws.LocalAWS(dynamodb_latency_ms=args.dynamodb_latency_ms))
+    ledger, audit = aws.create_payment_tables()
+
+    with StubProcessor(latency_ms=args.processor_latency_ms) as processor:
+        os.environ.update({
+            "DYNAMODB_LEDGER_TABLE_NAME": ledger,
+            "DYNAMODB_AUDIT_TABLE_NAME": audit,
+            "PROCESSOR_URL": processor.url,
+            "API_KEY": "bench",
+            # One EMF record per invocation would interleave with the report
+            "TRACE_ENABLED": "false",
+            "PROCESSOR_POOL_SIZE": str(max(args.workers)),
+        })
+        import paymentledgeraudittrail
+
+        payment = {"process_type": "sale", "amount": "10.00"}
+        start = time.perf_counter()
+        for _ in range(args.payments):
+            assert paymentledgeraudittrail.lambda_handler(payment, None)["statusCode"] == 200
+        elapsed = time.perf_counter() - start
+        print(f"{'single':<10} workers=1   payments/s={args.payments / elapsed:8.1f}")
+
+        for workers in args.workers:
+            paymentledgeraudittrail.BATCH_MAX_WORKERS = workers
+            aws.dynamodb.reset_counters()
+            start = time.perf_counter()
+            response = paymentledgeraudittrail.lambda_handler({"payments": [payment] * args.payments}, None)
+            elapsed = time.perf_counter() - start
+            body = json.loads(response["body"])
+            assert body["failed"] == 0, body
+            print(
+                f"{'batch':<10} workers={workers:<3} payments/s={args.payments / elapsed:8.1f} "
+                f"dynamodb_round_trips={aws.dynamodb.round_trips()}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Payment lambda cold start: init time and first processor call, per bundle layout.
+
+Builds the deployment tree with scripts/build_payment_bundle.py (full, and
+--trim) and, for each variant, starts fresh interpreters that import
+paymentledgeraudittrail from it the way the runtime's init phase does, then make
+the first processor call against the local stub. Every child is a new process,
+so each run is a true cold start. Bytecode is not written, as on Lambda's
+read-only /var/task: trees without --compile are compiled on every start.
+"eager" is the previous layout, with requests (and the asyncio caller) imported
+at init. The breakdown under each line is -X importtime self time summed by
+top-level package, from one extra run (importtime slows imports down); it
+covers the whole child, including requests on the first call. boto3 is real,
+so init includes its resource setup but makes no AWS calls. Run from the
+repository root:
+
+    python benchmarks/cold_start_bench.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "scripts"))
+
+import build_payment_bundle  # noqa: E402
+from stub_processor import StubProcessor  # noqa: E402
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+import paymentledgeraudittrail
+if EAGER:
+    import async_processor
+    paymentledgeraudittrail.processor_session._requests()
+init_ms = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+paymentledgeraudittrail.processor_session.post("/security-token", headers={"Authorization": "Bearer bench"}).json()
+first_call_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({"init_ms": init_ms, "first_call_ms": first_call_ms, "modules": len(sys.modules)}))
+"""
+
+VARIANTS = [
+    ("eager (previous)", "full", False, True),
+    ("lazy", "full", False, False),
+    ("lazy, trimmed", "trimmed", False, False),
+    ("lazy, trimmed, pyc", "trimmed", True, False),
+]
+
+
+def import_breakdown(stderr):
+    packages = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us)
+    return packages
+
+
+def cold_start(tree, env, eager, importtime=False):
+    command = [sys.executable, "-X", "importtime"] if importtime else [sys.executable]
+    child = subprocess.run(
+        command + ["-c", CHILD.replace("EAGER", str(eager))], cwd=tree, env=env, capture_output=True, text=True,
+    )
+    if child.returncode:
+        raise RuntimeError(child.stderr[-2000:])
+    return json.loads(child.stdout.splitlines()[-1]), import_breakdown(child.stderr)
+
+
+def tree_size(tree):
+    return sum(os.path.getsize(os.path.join(directory, name)) for directory, _, files in os.walk(tree) for name in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=8, help="packages shown in each init breakdown")
+    args = parser.parse_args()
+
+    with StubProcessor() as processor, tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env.update({
+            "DYNAMODB_LEDGER_TABLE_NAME": "payment-ledger",
+            "DYNAMODB_AUDIT_TABLE_NAME": "payment-audit",
+            "PROCESSOR_URL": processor.url,
+            "API_KEY": "bench",
+            "AWS_DEFAULT_REGION": env.get("AWS_DEFAULT_REGION", "us-east-1"),
+            "AWS_ACCESS_KEY_ID": "bench",
+            "AWS_SECRET_ACCESS_KEY": "bench",
+            "PYTHONDONTWRITEBYTECODE": "1",
+            # Import cost only: the init-phase prewarm would call AWS (see prewarm_bench.py)
+            "PREWARM_ON_INIT": "false",
+        })
+        env.pop("PYTHONPATH", None)
+
+        trees = {}
+        for _, mode, compiled, _ in VARIANTS:
+            if (mode, compiled) not in trees:
+                tree = os.path.join(workdir, f"{mode}-{'pyc' if compiled else 'src'}")
+                os.makedirs(tree)
+                build_payment_bundle.build_tree(tree, mode == "trimmed", processor.url, compiled)
+                trees[mode, compiled] = tree
+
+        for label, mode, compiled, eager in VARIANTS:
+            tree = trees[mode, compiled]
+            results = [cold_start(tree, env, eager)[0] for _ in range(args.runs)]
+            init_ms = statistics.median(result["init_ms"] for result in results)
+            first_call_ms = statistics.median(result["first_call_ms"] for result in results)
+            print(
+                f"{label:<20} bundle_kb={tree_size(tree) / 1024:6.0f} init_ms={init_ms:7.1f} "
+                f"first_call_ms={first_call_ms:6.1f} cold_total_ms={init_ms + first_call_ms:7.1f} "
+                f"modules={results[0]['modules']}"
+            )
+            _, breakdown = cold_start(tree, env, eager, importtime=True)
+            top = sorted(breakdown.items(), key=lambda entry: entry[1], reverse=True)[:args.top]
+            print("    " + "  ".join(f"{name}={self_us / 1000:.1f}ms" for name, self_us in top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Read capacity of scan backups vs native point-in-time exports.
+
+Fills the local ledger and audit tables, then invokes the backup lambda in
+"full" mode (parallel scan) and in "export" mode (ExportTableToPointInTime,
+polled with backoff until the stand-in's simulated export time has passed).
+Also checks that an invocation about to time out records the exports as in
+progress and that invoking again with the manifest picks them up, and that a
+table without point-in-time recovery falls back to a scan. Poll intervals are
+scaled down from the lambda's defaults. Run from the repository root:
+
+    python benchmarks/export_backup_bench.py --items 50000 --export-seconds 2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+from backup_format_bench import ledger_row  # noqa: E402
+
+
+class Context:
+    # Just enough of the Lambda context for the export deadline
+    def __init__(self, seconds):
+        self.deadline = time.monotonic() + seconds
+
+    def get_remaining_time_in_millis(self):
+        return int((self.deadline - time.monotonic()) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--export-seconds", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    aws = local_aws.install()
+    aws.dynamodb.export_seconds = args.export_seconds
+    ledger, audit = aws.create_payment_tables()
+    rng = random.Random(args.seed)
+    for table_name in (ledger, audit):
+        table = aws.dynamodb.table(table_name)
+        for _ in range(args.items // 2):
+            item = ledger_row(rng)
+            if table_name == audit:
+                item["event_id"] = item.pop("process_type")
+            table.store(table.key_of(item), item)
+
+    os.environ.update({
+        "DYNAMODB_LEDGER_TABLE_NAME": ledger,
+        "DYNAMODB_AUDIT_TABLE_NAME": audit,
+        "S3_BACKUP_BUCKET_NAME": "backup-bucket",
+        "EXPORT_POLL_SECONDS": "0.1",
+        "EXPORT_POLL_MAX_SECONDS": "1",
+    })
+    import dynamodb_backup
+    dynamodb_backup.EXPORT_DEADLINE_MARGIN = 0
+
+    def invoke(label, event, context=None):
+        aws.dynamodb.reset_counters()
+        start = time.perf_counter()
+        response = dynamodb_backup.lambda_handler(event, context)
+        elapsed = time.perf_counter() - start
+        body = json.loads(response["body"])
+        rcu = sum(entry["consumed_capacity"] for entry in body["tables"])
+        calls = ", ".join(f"{name}={count}" for name, count in sorted(aws.dynamodb.calls.items()))
+        print(f"{label:<26} status={response['statusCode']} rcu={rcu:8.1f} seconds={elapsed:6.2f} calls: {calls}")
+        return body
+
+    invoke("full (scan)", {"mode": "full"})
+    body = invoke("export", {"mode": "export"})
+    summary = json.loads(aws.s3.objects[("backup-bucket", body["tables"][0]["export_manifest"])])
+    assert summary["itemCount"] == args.items // 2, summary
+
+    time.sleep(1)  # a new timestamp, so new exports rather than the previous ones by client token
+    body = invoke("export, near timeout", {"mode": "export"}, Context(args.export_seconds / 4))
+    assert not json.loads(aws.s3.objects[("backup-bucket", body["manifest"])])["complete"]
+    time.sleep(args.export_seconds)
+    invoke("export, resumed", {"mode": "export", "manifest": body["manifest"]})
+
+    aws.dynamodb.table(audit).point_in_time_recovery = False
+    time.sleep(1)
+    body = invoke("export, audit without PITR", {"mode": "export"})
+    print("modes:", ", ".join(f"{entry['table']}={entry['mode']}" for entry in body["tables"]))
+
+
+if __name__ == "__main__":
+    main()
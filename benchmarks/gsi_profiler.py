@@ -0,0 +1,257 @@
+"""Profile GSI usage and write amplification, and generate a reduced schema.
+
+Reads the tables and global secondary indexes declared in dynamodb.tf, runs
+payments through lambda_handler against the local stand-in with those indexes,
+and reports the write units each payment spends on the base tables vs on each
+index. Captured query patterns (one JSON object per line: table, index,
+key_condition, names, values, attributes, weight) are then replayed to find
+which indexes are actually read and which attributes those reads need. The
+reduced schema drops unread indexes, projects KEYS_ONLY or INCLUDE instead of
+ALL, and is profiled the same way. benchmarks/query_patterns.jsonl is a
+hand-written sample: drop an index only on patterns captured from production
+reads, since a dropped GSI comes back only with a full backfill. Run from the
+repository root:
+
+    python benchmarks/gsi_profiler.py --patterns benchmarks/query_patterns.jsonl --output reduced.tf
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+from stub_processor import StubProcessor  # noqa: E402
+
+# dynamodb.tf resource -> lambda environment variable holding its table name
+TABLE_ENVIRONMENT = {
+    "payment_ledger": "DYNAMODB_LEDGER_TABLE_NAME",
+    "payment_audit_trail_v2": "DYNAMODB_AUDIT_TABLE_NAME",
+}
+
+
+# ---------------------------------------------------------------------------
+# Terraform schema
+# ---------------------------------------------------------------------------
+
+def _blocks(text, header):
+    # Yields (start, end, body) for every `header {` block, matching braces
+    for match in re.finditer(header, text):
+        depth, pos = 1, match.end()
+        while depth:
+            depth += {"{": 1, "}": -1}.get(text[pos], 0)
+            pos += 1
+        yield match.start(), pos, text[match.end():pos - 1]
+
+
+def _setting(body, name):
+    match = re.search(rf'^\s*{name}\s*=\s*"([^"]*)"', body, re.MULTILINE)
+    return match.group(1) if match else None
+
+
+def parse_tables(text):
+    tables = {}
+    for start, end, body in _blocks(text, r'resource\s+"aws_dynamodb_table"\s+"(\w+)"\s*\{'):
+        resource = re.match(r'resource\s+"aws_dynamodb_table"\s+"(\w+)"', text[start:end]).group(1)
+        indexes = []
+        for _, _, index in _blocks(body, r"global_secondary_index\s*\{"):
+            non_key = re.search(r"non_key_attributes\s*=\s*\[([^\]]*)\]", index)
+            indexes.append({
+                "name": _setting(index, "name"),
+                "hash_key": _setting(index, "hash_key"),
+                "range_key": _setting(index, "range_key"),
+                "projection": _setting(index, "projection_type"),
+                "non_key_attributes": re.findall(r'"([^"]+)"', non_key.group(1)) if non_key else [],
+            })
+        top_level = re.sub(r"\w+\s*\{[^{}]*\}", "", body)
+        tables[resource] = {
+            "hash_key": _setting(top_level, "hash_key"),
+            "range_key": _setting(top_level, "range_key"),
+            "attributes": dict(
+                (_setting(attribute, "name"), _setting(attribute, "type"))
+                for _, _, attribute in _blocks(body, r"attribute\s*\{")
+            ),
+            "indexes": indexes,
+        }
+    return tables
+
+
+def render_schema(text, tables):
+    # Rewrites the attribute and global_secondary_index blocks of each table, leaving everything else as is
+    output, cursor = [], 0
+    for start, end, body in _blocks(text, r'resource\s+"aws_dynamodb_table"\s+"(\w+)"\s*\{'):
+        resource = re.match(r'resource\s+"aws_dynamodb_table"\s+"(\w+)"', text[start:end]).group(1)
+        schema = tables[resource]
+        keys = {schema["hash_key"], schema["range_key"]}
+        for index in schema["indexes"]:
+            keys |= {index["hash_key"], index["range_key"]}
+        blocks = []
+        for name, kind in schema["attributes"].items():
+            if name in keys:
+                blocks.append(f'  attribute {{\n    name = "{name}"\n    type = "{kind}"\n  }}\n')
+        for index in schema["indexes"]:
+            settings = [("name", f'"{index["name"]}"'), ("hash_key", f'"{index["hash_key"]}"')]
+            if index["range_key"]:
+                settings.append(("range_key", f'"{index["range_key"]}"'))
+            settings.append(("projection_type", f'"{index["projection"]}"'))
+            if index["non_key_attributes"]:
+                attributes = ", ".join(f'"{name}"' for name in index["non_key_attributes"])
+                settings.append(("non_key_attributes", f"[{attributes}]"))
+            # Same alignment terraform fmt produces
+            width = max(len(name) for name, _ in settings)
+            lines = [f"    {name:<{width}} = {value}" for name, value in settings]
+            blocks.append("  global_secondary_index {\n" + "\n".join(lines) + "\n  }\n")
+
+        # Drop the old blocks, then insert the new ones where the first attribute block was
+        resource_text = text[start:end]
+        spans = [(s, e) for header in (r"\n  attribute\s*\{", r"\n  global_secondary_index\s*\{")
+                 for s, e, _ in _blocks(resource_text, header)]
+        first = min(s for s, _ in spans)
+        kept, position = [], 0
+        for s, e in sorted(spans):
+            kept.append(resource_text[position:s])
+            position = e
+        kept.append(resource_text[position:])
+        resource_text = "".join(kept)
+        resource_text = resource_text[:first] + "\n" + "\n".join(blocks).rstrip("\n") + resource_text[first:]
+        resource_text = re.sub(r"\n{3,}", "\n\n", resource_text)
+        output.append(text[cursor:start])
+        output.append(resource_text)
+        cursor = end
+    output.append(text[cursor:])
+    return "".join(output)
+
+
+# ---------------------------------------------------------------------------
+# Profiling
+# ---------------------------------------------------------------------------
+
+def build_backend(tables):
+    aws = local_aws.LocalAWS()
+    for resource, schema in tables.items():
+        indexes = [
+            local_aws.LocalIndex(index["name"], index["hash_key"], index["range_key"],
+                                 index["projection"], index["non_key_attributes"])
+            for index in schema["indexes"]
+        ]
+        aws.dynamodb.create_table(resource, schema["hash_key"], schema["range_key"], indexes)
+    return aws
+
+
+def run_payments(aws, processor, payments):
+    # The lambda module binds its tables at import time, so it is reloaded for each backend
+    local_aws.install(aws)
+    os.environ.update({env: resource for resource, env in TABLE_ENVIRONMENT.items()})
+    os.environ.update({"PROCESSOR_URL": processor.url, "API_KEY": "profile", "TRACE_ENABLED": "false"})
+    sys.modules.pop("paymentledgeraudittrail", None)
+    import paymentledgeraudittrail
+
+    aws.dynamodb.reset_counters()
+    for _ in range(payments):
+        response = paymentledgeraudittrail.lambda_handler({"process_type": "sale", "amount": "10.00"}, None)
+        assert response["statusCode"] == 200, response
+
+
+def replay_patterns(aws, tables, patterns):
+    # Returns {(resource, index): {"reads": weighted count, "attributes": set, "all": bool}}
+    usage = {}
+    for pattern in patterns:
+        table = aws.dynamodb.table(pattern["table"])
+        entry = usage.setdefault((pattern["table"], pattern["index"]), {"reads": 0, "attributes": set(), "all": False})
+        entry["reads"] += pattern.get("weight", 1)
+        if pattern.get("attributes"):
+            entry["attributes"] |= set(pattern["attributes"])
+        else:
+            entry["all"] = True
+        names = pattern.get("names") or {}
+        params = {
+            "IndexName": pattern["index"],
+            "KeyConditionExpression": pattern["key_condition"],
+            "ExpressionAttributeValues": pattern.get("values", {}),
+        }
+        if pattern.get("attributes"):
+            aliases = {f"#p{i}": name for i, name in enumerate(pattern["attributes"])}
+            params["ProjectionExpression"] = ", ".join(aliases)
+            names = {**names, **aliases}
+        if names:
+            params["ExpressionAttributeNames"] = names
+        table.query(**params)
+    return usage
+
+
+def reduce_tables(tables, usage):
+    reduced = {}
+    for resource, schema in tables.items():
+        table_keys = {schema["hash_key"], schema["range_key"]}
+        indexes = []
+        for index in schema["indexes"]:
+            entry = usage.get((resource, index["name"]))
+            if not entry:
+                continue
+            index_keys = table_keys | {index["hash_key"], index["range_key"]}
+            non_key = sorted(entry["attributes"] - index_keys)
+            if entry["all"]:
+                projection, non_key = "ALL", []
+            else:
+                projection = "INCLUDE" if non_key else "KEYS_ONLY"
+            indexes.append({**index, "projection": projection, "non_key_attributes": non_key})
+        reduced[resource] = {**schema, "indexes": indexes}
+    return reduced
+
+
+def report(label, aws, tables, payments):
+    print(f"{label}: {aws.dynamodb.write_units / payments:.2f} write units/payment")
+    for resource, schema in tables.items():
+        table = aws.dynamodb.table(resource)
+        index_units = sum(table.index_write_units.values())
+        print(f"  {resource:<22} indexes={len(schema['indexes']):<2} "
+              f"index_wcu/payment={index_units / payments:5.2f}")
+        for name, units in sorted(table.index_write_units.items()):
+            if units:
+                print(f"    {name:<26} wcu/payment={units / payments:5.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--schema", default="dynamodb.tf")
+    parser.add_argument("--patterns", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_patterns.jsonl"))
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--output", help="write the reduced dynamodb.tf here")
+    args = parser.parse_args()
+
+    with open(args.schema) as f:
+        text = f.read()
+    with open(args.patterns) as f:
+        patterns = [json.loads(line) for line in f if line.strip()]
+    tables = parse_tables(text)
+
+    with StubProcessor() as processor:
+        current = build_backend(tables)
+        run_payments(current, processor, args.payments)
+        report("current schema", current, tables, args.payments)
+
+        usage = replay_patterns(current, tables, patterns)
+        print("index usage (weighted reads from replayed patterns):")
+        for resource, schema in tables.items():
+            for index in schema["indexes"]:
+                entry = usage.get((resource, index["name"]))
+                reads = entry["reads"] if entry else 0
+                print(f"  {resource:<22} {index['name']:<26} reads={reads:<6} {'used' if reads else 'UNUSED'}")
+
+        reduced = reduce_tables(tables, usage)
+        slim = build_backend(reduced)
+        run_payments(slim, processor, args.payments)
+        report("reduced schema", slim, reduced, args.payments)
+        # The reduced schema must still answer every captured pattern
+        replay_patterns(slim, reduced, patterns)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(render_schema(text, reduced))
+        print(f"reduced schema written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
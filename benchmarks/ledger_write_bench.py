@@ -0,0 +1,94 @@
+"""DynamoDB round trips, write capacity and write latency per payment.
+
+Compares the original four-call write sequence (PutItem, UpdateItem x2,
+PutItem audit) with the conditional state-machine path used by
+lambda_handler under --audit-write-mode. The ledger row is created straight in
+PAYMENT-PENDING, then moved to PAYMENT-SUCCESS: PutItem, UpdateItem and the
+audit writer's BatchWriteItem (async), or PutItem and TransactWriteItems
+(transactional). DynamoDB time is the stand-in's simulated per-call latency
+summed over each payment's round trips. Transactional writes are billed at
+twice the standard write units, which the wcu column reflects. Run from the
+repository root:
+
+    python benchmarks/ledger_write_bench.py --payments 200 --dynamodb-latency-ms 5 --audit-write-mode async
+    python benchmarks/ledger_write_bench.py --payments 200 --dynamodb-latency-ms 5 --audit-write-mode transactional
+"""
+import argparse
+import json
+import os
+import sys
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+from stub_processor import StubProcessor  # noqa: E402
+
+
+def baseline_payment(dynamodb, ledger, audit):
+    # The write sequence lambda_handler issued before the state machine, with the full ledger key
+    transaction_id = str(uuid.uuid4())
+    key = {"transaction_id": transaction_id, "process_type": "sale"}
+    now = str(datetime.now(timezone.utc))
+    ledger_table, audit_table = dynamodb.resource.Table(ledger), dynamodb.resource.Table(audit)
+    ledger_table.put_item(Item={**key, "status": "PAYMENT-INITIATED", "timestamp": now, "response_details": "null"})
+    for status, details in (("PAYMENT-PENDING", {"token": "tok"}), ("PAYMENT-SUCCESS", {"status": "success"})):
+        ledger_table.update_item(
+            Key=key,
+            UpdateExpression="SET #st = :s, response_details = :rd",
+            ExpressionAttributeNames={"#st": "status"},
+            ExpressionAttributeValues={":s": status, ":rd": json.dumps(details)},
+        )
+    audit_table.put_item(Item={
+        "transaction_id": transaction_id, "event_id": str(uuid.uuid4()), "action_type": "PAYMENT-SUCCESS",
+        "timestamp": now, "action_details": json.dumps({"status": "success"}),
+    })
+
+
+def report(label, dynamodb, payments):
+    calls = ", ".join(f"{op}={count}" for op, count in sorted(dynamodb.calls.items()))
+    print(
+        f"{label:<14} round_trips/payment={dynamodb.round_trips() / payments:4.2f} "
+        f"wcu/payment={dynamodb.write_units / payments:4.2f} "
+        f"dynamodb_ms/payment={dynamodb.latency_seconds * 1000 / payments:6.2f}  ({calls})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=5.0)
+    parser.add_argument("--audit-write-mode", choices=("async", "transactional"), default="transactional")
+    args = parser.parse_args()
+
+    aws = local_aws.install(local_aws.LocalAWS(dynamodb_latency_ms=args.dynamodb_latency_ms))
+    ledger, audit = aws.create_payment_tables()
+    dynamodb = aws.dynamodb
+
+    with StubProcessor() as processor:
+        os.environ.update({
+            "DYNAMODB_LEDGER_TABLE_NAME": ledger,
+            "DYNAMODB_AUDIT_TABLE_NAME": audit,
+            "PROCESSOR_URL": processor.url,
+            "API_KEY": "bench",
+            "AUDIT_WRITE_MODE": args.audit_write_mode,
+            # One EMF record per invocation would interleave with the report
+            "TRACE_ENABLED": "false",
+        })
+        import paymentledgeraudittrail
+
+        dynamodb.reset_counters()
+        for _ in range(args.payments):
+            baseline_payment(dynamodb, ledger, audit)
+        report("baseline", dynamodb, args.payments)
+
+        dynamodb.reset_counters()
+        for _ in range(args.payments):
+            response = paymentledgeraudittrail.lambda_handler({"process_type": "sale", "amount": "10.00"}, None)
+            assert response["statusCode"] == 200, response
+        report(args.audit_write_mode, dynamodb, args.payments)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""End-to-end load harness: drive lambda_handler at a fixed rate or concurrency, locally.
+
+Every --containers worker is a separate process standing in for one Lambda
+container. Each imports paymentledgeraudittrail once, against its own local
+DynamoDB stand-in (ledger/audit key schemas as in dynamodb.tf) and the shared
+stub processor, and serves one invocation at a time.
+
+There are two load modes:
+- --rps: open loop. Arrivals are scheduled at a fixed rate, and latency is
+  measured from each request's scheduled time, so time spent queued behind
+  busy containers counts.
+- --concurrency: closed loop. That many containers invoke back to back.
+
+The report gives p50/p95/p99 latency, throughput and errors. It also gives
+a per-step breakdown taken from each invocation's EMF trace record. Run from
+the repository root:
+
+    python benchmarks/load_harness.py --rps 200 --duration 10 --containers 16 --processor-latency-ms 40 --jitter-ms 30
+    python benchmarks/load_harness.py --concurrency 8 --duration 10 --error-rate 0.01
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import redirect_stdout
+from io import StringIO
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from stub_processor import StubProcessor  # noqa: E402
+
+STEPS = [
+    "idempotency_begin", "token", "create_ledger", "intent", "success_update", "idempotency_finish",
+    "audit_flush",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def build_event(batch_size):
+    payment = {"process_type": "sale", "amount": "10.00"}
+    return {"payments": [payment] * batch_size} if batch_size else payment
+
+
+# One container: cold-starts the lambda module, then serves jobs until told to stop. Results go back as
+# (queued_ms, service_ms, status_code, trace record) tuples in one message at the end.
+def container(settings, jobs, results, ready):
+    sys.path.insert(0, os.path.join(HERE, "..", "lambda_function"))
+    import local_aws
+    aws = local_aws.install(local_aws.LocalAWS(dynamodb_latency_ms=settings["dynamodb_latency_ms"]))
+    aws.create_payment_tables("Payment-Ledger", "Payment-AuditTrail")
+    os.environ.update(settings["environment"])
+    with redirect_stdout(StringIO()):
+        import paymentledgeraudittrail
+    # Failed payments are counted in the report; their error logs would only bury it
+    logging.disable(logging.CRITICAL)
+    event = build_event(settings["batch_size"])
+    ready.put(os.getpid())
+
+    samples = []
+
+    def invoke(scheduled):
+        emitted = StringIO()
+        start = time.monotonic()
+        with redirect_stdout(emitted):
+            response = paymentledgeraudittrail.lambda_handler(event, None)
+        finished = time.monotonic()
+        lines = emitted.getvalue().splitlines()
+        record = json.loads(lines[-1]) if lines else {}
+        samples.append(((start - scheduled) * 1000, (finished - start) * 1000, response["statusCode"], record))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        kind, value = job
+        if kind == "at":
+            invoke(value)
+        else:
+            # Closed loop: invoke back to back until the deadline
+            while time.monotonic() < value:
+                invoke(time.monotonic())
+    results.put(samples)
+
+
+def run(args, processor_url):
+    context = multiprocessing.get_context("spawn")
+    jobs, results, ready = context.Queue(), context.Queue(), context.Queue()
+    settings = {
+        "dynamodb_latency_ms": args.dynamodb_latency_ms,
+        "batch_size": args.batch_size,
+        "environment": {
+            "DYNAMODB_LEDGER_TABLE_NAME": "Payment-Ledger",
+            "DYNAMODB_AUDIT_TABLE_NAME": "Payment-AuditTrail",
+            "PROCESSOR_URL": processor_url,
+            "API_KEY": "load",
+            "TRACE_ENABLED": "true",
+        },
+    }
+    containers = args.concurrency or args.containers
+    workers = [context.Process(target=container, args=(settings, jobs, results, ready)) for _ in range(containers)]
+    for worker in workers:
+        worker.start()
+    for _ in workers:
+        ready.get()
+
+    start = time.monotonic()
+    if args.concurrency:
+        for _ in workers:
+            jobs.put(("until", start + args.duration))
+    else:
+        for i in range(int(args.rps * args.duration)):
+            scheduled = start + i / args.rps
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            jobs.put(("at", scheduled))
+    for _ in workers:
+        jobs.put(None)
+    samples = [sample for _ in workers for sample in results.get()]
+    elapsed = time.monotonic() - start
+    for worker in workers:
+        worker.join()
+    return samples, elapsed
+
+
+def report(samples, elapsed, args):
+    latencies = [queued + service for queued, service, _, _ in samples]
+    queued = [sample[0] for sample in samples]
+    service = [sample[1] for sample in samples]
+    errors = sum(1 for sample in samples if sample[2] != 200)
+    payments = len(samples) * (args.batch_size or 1)
+    mode = f"concurrency={args.concurrency}" if args.concurrency else f"rps={args.rps:g} containers={args.containers}"
+    print(f"{mode} duration={elapsed:.1f}s invocations={len(samples)} errors={errors} "
+          f"throughput={len(samples) / elapsed:.1f}/s payments/s={payments / elapsed:.1f}")
+    for label, values in (("latency", latencies), ("service", service), ("queued", queued)):
+        print(f"  {label:<8} p50={percentile(values, 50):7.1f}ms p95={percentile(values, 95):7.1f}ms "
+              f"p99={percentile(values, 99):7.1f}ms max={max(values, default=0):7.1f}ms")
+
+    steps = defaultdict(list)
+    counters = defaultdict(float)
+    for _, _, _, record in samples:
+        for step in STEPS:
+            if f"{step}_ms" in record:
+                steps[step].append(record[f"{step}_ms"])
+        for counter in ("dynamodb_calls", "dynamodb_capacity_units", "processor_calls", "processor_new_connections"):
+            counters[counter] += record.get(counter, 0)
+    total = sum(sum(values) for values in steps.values()) or 1.0
+    print("  steps (from trace records):")
+    for step in STEPS:
+        values = steps.get(step)
+        if values:
+            print(f"    {step:<19} p50={percentile(values, 50):7.2f}ms p95={percentile(values, 95):7.2f}ms "
+                  f"p99={percentile(values, 99):7.2f}ms share={sum(values) / total:6.1%}")
+    if samples:
+        print("  per invocation: " + "  ".join(f"{name}={value / len(samples):.2f}" for name, value in counters.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    load = parser.add_mutually_exclusive_group(required=True)
+    load.add_argument("--rps", type=float, help="open loop: invocations per second")
+    load.add_argument("--concurrency", type=int, help="closed loop: containers invoking back to back")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--containers", type=int, default=8, help="container processes serving --rps")
+    parser.add_argument("--batch-size", type=int, default=0, help="payments per batch event (0: single payments)")
+    parser.add_argument("--processor-latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra processor latency, uniform in [0, jitter]")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of processor calls answered with 503")
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with StubProcessor(latency_ms=args.processor_latency_ms, jitter_ms=args.jitter_ms,
+                       error_rate=args.error_rate) as processor:
+        samples, elapsed = run(args, processor.url)
+        report(samples, elapsed, args)
+        print(f"  processor: {processor.stats}")
+
+
+if __name__ == "__main__":
+    main()
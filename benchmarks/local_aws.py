@@ -0,0 +1,1207 @@
+"""In-process stand-ins for the AWS services the lambdas talk to.
+
+``install()`` registers fake ``boto3``/``botocore`` modules so the lambda
+modules import unchanged and run against in-memory tables. The DynamoDB
+stand-in honours each table's key schema, evaluates the condition and update
+expressions the lambdas use, counts round trips and reports write capacity.
+"""
+import base64
+import copy
+import gzip
+import io
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import types
+import uuid
+import zlib
+from decimal import Decimal
+
+
+class ClientError(Exception):
+    def __init__(self, error_response, operation_name):
+        self.response = error_response
+        self.operation_name = operation_name
+        error = error_response.get("Error", {})
+        super().__init__(f"An error occurred ({error.get('Code')}) when calling the {operation_name} operation: {error.get('Message')}")
+
+
+def _client_error(code, message, operation, **extra):
+    return ClientError({"Error": {"Code": code, "Message": message}, **extra}, operation)
+
+
+def _index_throttled(operation):
+    return _client_error("ProvisionedThroughputExceededException",
+                         "Throughput exceeds the current capacity for one or more global secondary indexes", operation)
+
+
+# ---------------------------------------------------------------------------
+# Expression evaluation
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r"\s*(<>|<=|>=|[=<>(),]|[#:]?[A-Za-z_][A-Za-z0-9_.\-]*)")
+
+
+def _tokenize(expression):
+    tokens, pos = [], 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = _TOKEN_RE.match(expression, pos)
+        if not match:
+            raise ValueError(f"Unsupported expression syntax at {expression[pos:]!r}")
+        tokens.append(match.group(1))
+        pos = match.end()
+    return tokens
+
+
+class _ConditionParser:
+    def __init__(self, expression, names, values):
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+        self.names = names or {}
+        self.values = values or {}
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if expected is not None and (token or "").upper() != expected:
+            raise ValueError(f"Expected {expected}, got {token}")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected token {self.peek()}")
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while (self.peek() or "").upper() == "OR":
+            self.take()
+            left, right = node, self.parse_and()
+            node = lambda item, l=left, r=right: l(item) or r(item)
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while (self.peek() or "").upper() == "AND":
+            self.take()
+            left, right = node, self.parse_not()
+            node = lambda item, l=left, r=right: l(item) and r(item)
+        return node
+
+    def parse_not(self):
+        if (self.peek() or "").upper() == "NOT":
+            self.take()
+            inner = self.parse_not()
+            return lambda item: not inner(item)
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        token = self.peek()
+        if token == "(":
+            self.take()
+            node = self.parse_or()
+            self.take(")")
+            return node
+        if token in ("attribute_exists", "attribute_not_exists", "begins_with"):
+            self.take()
+            self.take("(")
+            path = self.operand()
+            if token == "begins_with":
+                self.take(",")
+                prefix = self.operand()
+                self.take(")")
+                return lambda item: isinstance(path(item), str) and path(item).startswith(prefix(item))
+            self.take(")")
+            if token == "attribute_exists":
+                return lambda item: path(item) is not None
+            return lambda item: path(item) is None
+
+        left = self.operand()
+        op = self.take()
+        if op.upper() == "IN":
+            self.take("(")
+            options = [self.operand()]
+            while self.peek() == ",":
+                self.take()
+                options.append(self.operand())
+            self.take(")")
+            return lambda item: left(item) in [o(item) for o in options]
+        if op.upper() == "BETWEEN":
+            low = self.operand()
+            self.take("AND")
+            high = self.operand()
+            return lambda item: _compare(low(item), "<=", left(item)) and _compare(left(item), "<=", high(item))
+        right = self.operand()
+        return lambda item: _compare(left(item), op, right(item))
+
+    def operand(self):
+        token = self.take()
+        if token.startswith(":"):
+            value = self.values[token]
+            return lambda item: value
+        name = self.names.get(token, token)
+        return lambda item: item.get(name)
+
+
+def _compare(left, op, right):
+    if left is None or right is None:
+        return op == "<>" and left != right
+    if op == "=":
+        return left == right
+    if op == "<>":
+        return left != right
+    if op == "<":
+        return left < right
+    if op == "<=":
+        return left <= right
+    if op == ">":
+        return left > right
+    if op == ">=":
+        return left >= right
+    raise ValueError(f"Unsupported comparison {op}")
+
+
+# Parse an expression once into a predicate over items
+def compile_condition(expression, names=None, values=None):
+    if not expression:
+        return lambda item: True
+    return _ConditionParser(expression, names, values).parse()
+
+
+def evaluate_condition(expression, item, names=None, values=None):
+    return compile_condition(expression, names, values)(item or {})
+
+
+def apply_update(expression, item, names=None, values=None):
+    names, values = names or {}, values or {}
+    clauses = re.split(r"\b(SET|REMOVE)\b", expression.strip(), flags=re.IGNORECASE)
+    action = None
+    for clause in clauses:
+        clause = clause.strip()
+        if not clause:
+            continue
+        if clause.upper() in ("SET", "REMOVE"):
+            action = clause.upper()
+            continue
+        for part in clause.split(","):
+            part = part.strip()
+            if action == "SET":
+                target, source = [p.strip() for p in part.split("=", 1)]
+                item[names.get(target, target)] = _resolve_set_value(source, item, names, values)
+            elif action == "REMOVE":
+                item.pop(names.get(part, part), None)
+    return item
+
+
+def _resolve_set_value(source, item, names, values):
+    match = re.match(r"if_not_exists\(\s*([#\w]+)\s*,\s*(:\w+)\s*\)", source)
+    if match:
+        existing = item.get(names.get(match.group(1), match.group(1)))
+        return existing if existing is not None else values[match.group(2)]
+    match = re.match(r"([#\w]+)\s*([+-])\s*(:\w+)", source)
+    if match:
+        current = item.get(names.get(match.group(1), match.group(1)), 0)
+        delta = values[match.group(3)]
+        return current + delta if match.group(2) == "+" else current - delta
+    return values[source] if source.startswith(":") else item.get(names.get(source, source))
+
+
+# ---------------------------------------------------------------------------
+# DynamoDB
+# ---------------------------------------------------------------------------
+
+# Helper Function: Binary attribute values appear base64-encoded in DynamoDB JSON
+def _base64(value):
+    return base64.b64encode(bytes(value)).decode("ascii")
+
+
+def table_arn(table_name):
+    return f"arn:aws:dynamodb:local:000000000000:table/{table_name}"
+
+
+def item_size(item):
+    size = 0
+    for name, value in (item or {}).items():
+        size += len(name.encode("utf-8")) + _value_size(value)
+    return size
+
+
+def _value_size(value):
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (int, float, Decimal)):
+        return max(1, len(str(value)) // 2 + 1)
+    if isinstance(value, dict):
+        return 3 + sum(len(k.encode("utf-8")) + _value_size(v) + 1 for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return 3 + sum(_value_size(v) + 1 for v in value)
+    if hasattr(value, "value"):
+        return len(value.value)
+    return len(str(value))
+
+
+def write_units(item):
+    return max(1, math.ceil(item_size(item) / 1024))
+
+
+class LocalIndex:
+    def __init__(self, name, hash_key, range_key=None, projection="ALL", non_key_attributes=()):
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.projection = projection
+        self.non_key_attributes = tuple(non_key_attributes)
+
+    def contains(self, item):
+        # Sparse index: only items carrying every index key attribute are indexed
+        return item is not None and all(item.get(k) is not None for k in (self.hash_key, self.range_key) if k)
+
+    def project(self, item, table_keys):
+        if self.projection == "ALL":
+            return item
+        keep = set(table_keys) | {k for k in (self.hash_key, self.range_key) if k}
+        if self.projection == "INCLUDE":
+            keep |= set(self.non_key_attributes)
+        return {name: value for name, value in item.items() if name in keep}
+
+
+class LocalTable:
+    def __init__(self, backend, name, hash_key, range_key=None, indexes=(), stream=False):
+        self.backend = backend
+        self.name = name
+        self.table_name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.indexes = {index.name: index for index in indexes}
+        self.items = {}
+        self._segments = {}
+        self.index_write_units = {index.name: 0 for index in indexes}
+        self.index_queries = {index.name: 0 for index in indexes}
+        self.stream = LocalStream(self) if stream else None
+        self.point_in_time_recovery = True
+        self.lock = threading.RLock()
+
+    # Every write lands here so secondary-index write amplification and stream records are accounted for
+    def store(self, key, item):
+        old = self.items.get(key)
+        self._account_index_writes(old, item)
+        if key not in self.items:
+            self._segments = {}
+        self.items[key] = item
+        if self.stream is not None:
+            self.stream.record("INSERT" if old is None else "MODIFY", item)
+
+    def remove(self, key):
+        if key in self.items:
+            self._segments = {}
+        old = self.items.pop(key, None)
+        self._account_index_writes(old, None)
+        if self.stream is not None and old is not None:
+            self.stream.record("REMOVE", old)
+
+    # Keys in one scan segment, in scan order, with their positions. Items are assigned to segments by a
+    # hash of their partition key, as DynamoDB does. Cached until a key is added or removed.
+    def segment_keys(self, segment, total_segments):
+        cached = self._segments.get((segment, total_segments))
+        if cached is None:
+            keys = [key for key in self.items
+                    if zlib.crc32(str(key[0]).encode("utf-8")) % total_segments == segment]
+            cached = keys, {key: position for position, key in enumerate(keys)}
+            self._segments[(segment, total_segments)] = cached
+        return cached
+
+    # With backend.index_partition_wcu set, each index partition (index hash key value) takes at most that many
+    # write units per second. False if this write would go over on one of them: DynamoDB then rejects the
+    # base-table write too.
+    def admit_index_writes(self, old, new):
+        if not self.backend.index_partition_wcu:
+            return True
+        table_keys = self.key_attributes()
+        for index in self.indexes.values():
+            if not index.contains(new):
+                continue
+            after = index.project(new, table_keys)
+            if index.contains(old) and index.project(old, table_keys) == after:
+                continue
+            if not self.backend.admit_partition_write((self.name, index.name, new[index.hash_key]), write_units(after)):
+                return False
+        return True
+
+    def _account_index_writes(self, old, new):
+        table_keys = self.key_attributes()
+        for index in self.indexes.values():
+            before = index.project(old, table_keys) if index.contains(old) else None
+            after = index.project(new, table_keys) if index.contains(new) else None
+            if before == after:
+                continue
+            if after is None:
+                units = 1  # removed from the index
+            else:
+                units = write_units(after)
+                key_attributes = [k for k in (index.hash_key, index.range_key) if k]
+                if before is not None and any(before.get(k) != after.get(k) for k in key_attributes):
+                    units += 1  # a changed index key is a delete plus a put in the index
+            self.index_write_units[index.name] += units
+            self.backend.record_write(units)
+
+    def key_of(self, item):
+        if self.hash_key not in item or (self.range_key and self.range_key not in item):
+            raise _client_error("ValidationException", "The provided key element does not match the schema", "PutItem")
+        return (item[self.hash_key], item.get(self.range_key) if self.range_key else None)
+
+    def key_attributes(self):
+        return [k for k in (self.hash_key, self.range_key) if k]
+
+    # boto3 Table resource interface
+    def put_item(self, **kwargs):
+        return self.backend.client.put_item(TableName=self.name, **kwargs)
+
+    def get_item(self, **kwargs):
+        return self.backend.client.get_item(TableName=self.name, **kwargs)
+
+    def update_item(self, **kwargs):
+        return self.backend.client.update_item(TableName=self.name, **kwargs)
+
+    def delete_item(self, **kwargs):
+        return self.backend.client.delete_item(TableName=self.name, **kwargs)
+
+    def query(self, **kwargs):
+        return self.backend.client.query(TableName=self.name, **kwargs)
+
+    def scan(self, **kwargs):
+        return self.backend.client.scan(TableName=self.name, **kwargs)
+
+
+class LocalDynamoDBClient:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _capacity(self, kwargs, table_name, units):
+        if kwargs.get("ReturnConsumedCapacity") in ("TOTAL", "INDEXES"):
+            return {"ConsumedCapacity": {"TableName": table_name, "CapacityUnits": float(units)}}
+        return {}
+
+    def _check_key(self, table, key, operation):
+        if set(key) != set(table.key_attributes()):
+            raise _client_error("ValidationException", "The provided key element does not match the schema", operation)
+        return table.key_of(key)
+
+    def put_item(self, TableName, Item, **kwargs):
+        table = self.backend.call("PutItem", TableName)
+        with table.lock:
+            key = table.key_of(Item)
+            if not evaluate_condition(kwargs.get("ConditionExpression"), table.items.get(key),
+                                      kwargs.get("ExpressionAttributeNames"), kwargs.get("ExpressionAttributeValues")):
+                raise _client_error("ConditionalCheckFailedException", "The conditional request failed", "PutItem")
+            if not table.admit_index_writes(table.items.get(key), Item):
+                raise _index_throttled("PutItem")
+            table.store(key, copy.deepcopy(Item))
+        units = write_units(Item)
+        self.backend.record_write(units)
+        return self._capacity(kwargs, TableName, units)
+
+    def get_item(self, TableName, Key, **kwargs):
+        table = self.backend.call("GetItem", TableName)
+        with table.lock:
+            item = table.items.get(self._check_key(table, Key, "GetItem"))
+        response = {"Item": copy.deepcopy(item)} if item is not None else {}
+        response.update(self._capacity(kwargs, TableName, 0.5 if not kwargs.get("ConsistentRead") else 1))
+        return response
+
+    def update_item(self, TableName, Key, UpdateExpression, **kwargs):
+        table = self.backend.call("UpdateItem", TableName)
+        names, values = kwargs.get("ExpressionAttributeNames"), kwargs.get("ExpressionAttributeValues")
+        with table.lock:
+            key = self._check_key(table, Key, "UpdateItem")
+            existing = table.items.get(key)
+            if not evaluate_condition(kwargs.get("ConditionExpression"), existing, names, values):
+                raise _client_error("ConditionalCheckFailedException", "The conditional request failed", "UpdateItem")
+            item = copy.deepcopy(existing) if existing is not None else dict(Key)
+            apply_update(UpdateExpression, item, names, values)
+            if not table.admit_index_writes(existing, item):
+                raise _index_throttled("UpdateItem")
+            table.store(key, item)
+        units = write_units(item)
+        self.backend.record_write(units)
+        response = self._capacity(kwargs, TableName, units)
+        if kwargs.get("ReturnValues") == "ALL_NEW":
+            response["Attributes"] = copy.deepcopy(item)
+        return response
+
+    def delete_item(self, TableName, Key, **kwargs):
+        table = self.backend.call("DeleteItem", TableName)
+        with table.lock:
+            key = self._check_key(table, Key, "DeleteItem")
+            if not evaluate_condition(kwargs.get("ConditionExpression"), table.items.get(key),
+                                      kwargs.get("ExpressionAttributeNames"), kwargs.get("ExpressionAttributeValues")):
+                raise _client_error("ConditionalCheckFailedException", "The conditional request failed", "DeleteItem")
+            table.remove(key)
+        self.backend.record_write(1)
+        return self._capacity(kwargs, TableName, 1)
+
+    def transact_write_items(self, TransactItems, **kwargs):
+        self.backend.call("TransactWriteItems", None)
+        if len(TransactItems) > 100:
+            raise _client_error("ValidationException", "Member must have length less than or equal to 100", "TransactWriteItems")
+        tables = [self.backend.table(next(iter(op.values()))["TableName"]) for op in TransactItems]
+        for table in sorted(set(tables), key=lambda t: t.name):
+            table.lock.acquire()
+        try:
+            staged, reasons, failed = [], [], False
+            for op, table in zip(TransactItems, tables):
+                kind, params = next(iter(op.items()))
+                key = table.key_of(params["Item"]) if kind == "Put" else self._check_key(table, params["Key"], "TransactWriteItems")
+                existing = table.items.get(key)
+                ok = evaluate_condition(params.get("ConditionExpression"), existing,
+                                        params.get("ExpressionAttributeNames"), params.get("ExpressionAttributeValues"))
+                reasons.append({"Code": "None"} if ok else {"Code": "ConditionalCheckFailed", "Message": "The conditional request failed"})
+                failed = failed or not ok
+                if kind == "Put":
+                    item = copy.deepcopy(params["Item"])
+                elif kind == "Update":
+                    item = copy.deepcopy(existing) if existing is not None else dict(params["Key"])
+                    apply_update(params["UpdateExpression"], item,
+                                 params.get("ExpressionAttributeNames"), params.get("ExpressionAttributeValues"))
+                else:
+                    item = None
+                staged.append((kind, params, table, key, existing, item))
+            if failed:
+                raise _client_error("TransactionCanceledException", "Transaction cancelled", "TransactWriteItems",
+                                    CancellationReasons=reasons)
+            if not all(table.admit_index_writes(existing, item) for kind, _, table, _, existing, item in staged
+                       if item is not None):
+                raise _index_throttled("TransactWriteItems")
+            units = 0
+            for kind, params, table, key, existing, item in staged:
+                if kind in ("Put", "Update"):
+                    table.store(key, item)
+                    units += 2 * write_units(item)
+                elif kind == "Delete":
+                    table.remove(key)
+                    units += 2
+        finally:
+            for table in sorted(set(tables), key=lambda t: t.name):
+                table.lock.release()
+        self.backend.record_write(units)
+        if kwargs.get("ReturnConsumedCapacity") in ("TOTAL", "INDEXES"):
+            return {"ConsumedCapacity": [{"TableName": tables[0].name, "CapacityUnits": float(units)}]}
+        return {}
+
+    def query(self, TableName, KeyConditionExpression, **kwargs):
+        table = self.backend.call("Query", TableName)
+        names, values = kwargs.get("ExpressionAttributeNames"), kwargs.get("ExpressionAttributeValues")
+        index_name = kwargs.get("IndexName")
+        if index_name is not None and index_name not in table.indexes:
+            raise _client_error("ValidationException", f"The table does not have the specified index: {index_name}", "Query")
+        if index_name is not None and kwargs.get("ConsistentRead"):
+            raise _client_error("ValidationException", "Consistent reads are not supported on global secondary indexes",
+                                "Query")
+        index = table.indexes.get(index_name)
+        hash_key, range_key = (index.hash_key, index.range_key) if index else (table.hash_key, table.range_key)
+        key_attributes = set(table.key_attributes()) | {k for k in (hash_key, range_key) if k}
+
+        requested = None
+        if kwargs.get("ProjectionExpression"):
+            requested = [names.get(p.strip(), p.strip()) if names else p.strip()
+                         for p in kwargs["ProjectionExpression"].split(",")]
+        if index is not None and index.projection != "ALL":
+            projected = key_attributes | (set(index.non_key_attributes) if index.projection == "INCLUDE" else set())
+            # A GSI cannot fetch attributes it does not project
+            missing = sorted(set(requested or ()) - projected)
+            if missing:
+                raise _client_error("ValidationException",
+                                    f"One or more parameter values were invalid: {index_name} does not project "
+                                    f"{', '.join(missing)}", "Query")
+
+        key_condition = compile_condition(KeyConditionExpression, names, values)
+        with table.lock:
+            # Key conditions only name key attributes, which every index projects
+            matches = [item for item in table.items.values() if key_condition(item)]
+            if index is not None:
+                table.index_queries[index_name] += 1
+                matches = [index.project(item, table.key_attributes()) for item in matches if index.contains(item)]
+        if range_key:
+            matches.sort(key=lambda item: item.get(range_key), reverse=not kwargs.get("ScanIndexForward", True))
+
+        start = kwargs.get("ExclusiveStartKey")
+        if start:
+            position = next((i for i, item in enumerate(matches)
+                             if all(item.get(k) == v for k, v in start.items())), None)
+            matches = matches[position + 1:] if position is not None else []
+        limit = kwargs.get("Limit")
+        page = matches[:limit] if limit else matches
+        read_bytes = sum(item_size(item) for item in page)
+        item_filter = compile_condition(kwargs.get("FilterExpression"), names, values)
+        page = [item for item in page if item_filter(item)]
+        if requested:
+            page = [{k: v for k, v in item.items() if k in requested} for item in page]
+
+        response = {"Items": copy.deepcopy(page), "Count": len(page)}
+        if limit and len(matches) > limit:
+            response["LastEvaluatedKey"] = {k: matches[limit - 1][k] for k in key_attributes}
+        units = max(0.5, math.ceil(read_bytes / 4096) * (1 if kwargs.get("ConsistentRead") else 0.5))
+        response.update(self._capacity(kwargs, TableName, units))
+        return response
+
+    def scan(self, TableName, **kwargs):
+        table = self.backend.call("Scan", TableName)
+        segment, total_segments = kwargs.get("Segment"), kwargs.get("TotalSegments")
+        if (segment is None) != (total_segments is None) or (total_segments and not 0 <= segment < total_segments):
+            raise _client_error("ValidationException", "Segment must be less than TotalSegments", "Scan")
+        with table.lock:
+            keys, positions = table.segment_keys(segment or 0, total_segments or 1)
+            start = kwargs.get("ExclusiveStartKey")
+            if start:
+                start_key = table.key_of(start)
+                keys = keys[positions[start_key] + 1:] if start_key in positions else []
+            # A page ends at Limit items or 1 MB read, whichever comes first
+            page, read_bytes, limit = [], 0, kwargs.get("Limit")
+            for key in keys:
+                if (limit and len(page) >= limit) or read_bytes >= 1024 * 1024:
+                    break
+                item = table.items[key]
+                page.append(copy.deepcopy(item))
+                read_bytes += item_size(item)
+        if self.backend.scan_ms_per_mb:
+            time.sleep(self.backend.scan_ms_per_mb * read_bytes / (1024 * 1024 * 1000.0))
+        response = {"Items": page, "Count": len(page), "ScannedCount": len(page)}
+        if page and len(page) < len(keys):
+            response["LastEvaluatedKey"] = {k: page[-1][k] for k in table.key_attributes()}
+        units = max(0.5, math.ceil(read_bytes / 4096) * (1 if kwargs.get("ConsistentRead") else 0.5))
+        response.update(self._capacity(kwargs, TableName, units))
+        return response
+
+    def describe_table(self, TableName, **kwargs):
+        table = self.backend.call("DescribeTable", TableName)
+        description = {
+            "TableName": TableName,
+            "TableArn": table_arn(TableName),
+            "KeySchema": [{"AttributeName": table.hash_key, "KeyType": "HASH"}]
+                         + ([{"AttributeName": table.range_key, "KeyType": "RANGE"}] if table.range_key else []),
+            "ItemCount": len(table.items),
+        }
+        if table.stream is not None:
+            description["LatestStreamArn"] = table.stream.arn
+            description["StreamSpecification"] = {"StreamEnabled": True, "StreamViewType": "NEW_IMAGE"}
+        return {"Table": description}
+
+    # Native exports copy a point-in-time snapshot to S3 without using table read capacity. The snapshot is
+    # taken when the export starts; the files appear once the backend's export_seconds have passed and
+    # DescribeExport is called, in the DYNAMODB_JSON layout (manifest-summary.json, gzipped data files).
+    def export_table_to_point_in_time(self, TableArn, S3Bucket, S3Prefix="", ExportFormat="DYNAMODB_JSON",
+                                      ClientToken=None, **kwargs):
+        table_name = TableArn.rsplit("/", 1)[1]
+        table = self.backend.call("ExportTableToPointInTime", table_name)
+        exports = self.backend.exports
+        if ClientToken:
+            for export in exports.values():
+                if export["token"] == ClientToken and export["table"] == table_name:
+                    return {"ExportDescription": self._export_description(export)}
+        if not table.point_in_time_recovery:
+            raise _client_error("PointInTimeRecoveryUnavailableException",
+                                f"Point in time recovery is not enabled for table '{table_name}'",
+                                "ExportTableToPointInTime")
+        with table.lock:
+            items = copy.deepcopy(list(table.items.values()))
+        export_id = f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+        export = {
+            "arn": f"{TableArn}/export/{export_id}", "id": export_id, "table": table_name, "table_arn": TableArn,
+            "token": ClientToken, "bucket": S3Bucket, "prefix": S3Prefix, "format": ExportFormat,
+            "status": "IN_PROGRESS", "start": time.time(), "items": items,
+        }
+        exports[export["arn"]] = export
+        return {"ExportDescription": self._export_description(export)}
+
+    def describe_export(self, ExportArn, **kwargs):
+        self.backend.call("DescribeExport", None)
+        export = self.backend.exports.get(ExportArn)
+        if export is None:
+            raise _client_error("ExportNotFoundException", f"Export not found: {ExportArn}", "DescribeExport")
+        if export["status"] == "IN_PROGRESS" and time.time() - export["start"] >= self.backend.export_seconds:
+            self._write_export(export)
+        return {"ExportDescription": self._export_description(export)}
+
+    def _write_export(self, export):
+        base = "/".join(part for part in (export["prefix"], "AWSDynamoDB", export["id"]) if part)
+        lines = "".join(json.dumps({"Item": serialize(item)["M"]}, default=_base64) + "\n"
+                        for item in export.pop("items"))
+        data_key = f"{base}/data/{uuid.uuid4().hex}.json.gz"
+        self.backend.s3.put_object(Bucket=export["bucket"], Key=data_key, Body=gzip.compress(lines.encode("utf-8")))
+        export.update(status="COMPLETED", end=time.time(), manifest=f"{base}/manifest-summary.json",
+                      item_count=lines.count("\n"), billed_bytes=len(lines))
+        self.backend.s3.put_object(Bucket=export["bucket"], Key=export["manifest"], Body=json.dumps({
+            "version": "2020-06-30", "exportArn": export["arn"], "tableArn": export["table_arn"],
+            "itemCount": export["item_count"], "outputFormat": export["format"], "dataFileS3Keys": [data_key],
+        }))
+
+    def _export_description(self, export):
+        description = {
+            "ExportArn": export["arn"], "ExportStatus": export["status"], "TableArn": export["table_arn"],
+            "S3Bucket": export["bucket"], "S3Prefix": export["prefix"], "ExportFormat": export["format"],
+            "StartTime": export["start"], "ExportTime": export["start"],
+        }
+        if export["status"] == "COMPLETED":
+            description.update(EndTime=export["end"], ExportManifest=export["manifest"],
+                               ItemCount=export["item_count"], BilledSizeBytes=export["billed_bytes"])
+        return description
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        self.backend.call("BatchGetItem", None)
+        if sum(len(v["Keys"]) for v in RequestItems.values()) > 100:
+            raise _client_error("ValidationException", "Too many items requested for the BatchGetItem call", "BatchGetItem")
+        responses, unprocessed, consumed = {}, {}, []
+        for table_name, request in RequestItems.items():
+            table = self.backend.table(table_name)
+            per_4kb = 1 if request.get("ConsistentRead") else 0.5
+            units = 0
+            for key in request["Keys"]:
+                if self.backend.should_throttle():
+                    unprocessed.setdefault(table_name, {"Keys": [], "ConsistentRead": request.get("ConsistentRead", False)})
+                    unprocessed[table_name]["Keys"].append(key)
+                    continue
+                with table.lock:
+                    item = table.items.get(self._check_key(table, key, "BatchGetItem"))
+                units += max(1, math.ceil(item_size(item) / 4096)) * per_4kb if item is not None else per_4kb
+                if item is not None:
+                    responses.setdefault(table_name, []).append(copy.deepcopy(item))
+            consumed.append({"TableName": table_name, "CapacityUnits": float(units)})
+        response = {"Responses": responses, "UnprocessedKeys": unprocessed}
+        if kwargs.get("ReturnConsumedCapacity") in ("TOTAL", "INDEXES"):
+            response["ConsumedCapacity"] = consumed
+        return response
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        self.backend.call("BatchWriteItem", None)
+        if sum(len(v) for v in RequestItems.values()) > 25:
+            raise _client_error("ValidationException", "Too many items requested for the BatchWriteItem call", "BatchWriteItem")
+        unprocessed, consumed = {}, []
+        for table_name, requests in RequestItems.items():
+            table = self.backend.table(table_name)
+            units = 0
+            for request in requests:
+                cost = write_units(request["PutRequest"]["Item"]) if "PutRequest" in request else 1
+                if self.backend.should_throttle() or not self.backend.admit_write(cost):
+                    unprocessed.setdefault(table_name, []).append(request)
+                    continue
+                with table.lock:
+                    if "PutRequest" in request:
+                        item = request["PutRequest"]["Item"]
+                        if not table.admit_index_writes(table.items.get(table.key_of(item)), item):
+                            unprocessed.setdefault(table_name, []).append(request)
+                            continue
+                        table.store(table.key_of(item), copy.deepcopy(item))
+                        units += write_units(item)
+                    else:
+                        table.remove(table.key_of(request["DeleteRequest"]["Key"]))
+                        units += 1
+            self.backend.record_write(units)
+            consumed.append({"TableName": table_name, "CapacityUnits": float(units)})
+        response = {"UnprocessedItems": unprocessed}
+        if kwargs.get("ReturnConsumedCapacity") in ("TOTAL", "INDEXES"):
+            response["ConsumedCapacity"] = consumed
+        return response
+
+
+class _Meta:
+    def __init__(self, client):
+        self.client = client
+
+
+class LocalDynamoDBResource:
+    def __init__(self, backend):
+        self.backend = backend
+        self.meta = _Meta(backend.client)
+
+    def Table(self, name):
+        return self.backend.table(name)
+
+
+class LocalDynamoDB:
+    def __init__(self, latency_ms=0.0, throttle_rate=0.0, scan_ms_per_mb=0.0, write_capacity=None, export_seconds=0.0,
+                 connect_ms=0.0, index_partition_wcu=None):
+        self.latency = latency_ms / 1000.0
+        # Paid once, by the first call: a new client's credential lookup and TLS handshake
+        self.connect = connect_ms / 1000.0
+        self.connected = False
+        self.throttle_rate = throttle_rate
+        # Provisioned write capacity units per second (None: on-demand); batch writes over it come back
+        # as UnprocessedItems. Up to one second of unused capacity is kept as burst.
+        self.write_capacity = write_capacity
+        self._write_tokens = write_capacity or 0.0
+        self._write_refilled = time.monotonic()
+        # Write units per second one GSI partition accepts (None: unlimited), e.g. 1000 as in DynamoDB.
+        # Writes over it fail with ProvisionedThroughputExceededException, or come back as UnprocessedItems.
+        self.index_partition_wcu = index_partition_wcu
+        self._partition_tokens = {}
+        self.partition_writes = {}
+        self.partition_throttles = {}
+        # How long a native export takes to complete, and the S3 stand-in it writes to
+        self.export_seconds = export_seconds
+        self.exports = {}
+        self.s3 = None
+        # Extra time a Scan page takes per MB read, on top of the per-call latency
+        self.scan_ms_per_mb = scan_ms_per_mb
+        self.tables = {}
+        self.client = LocalDynamoDBClient(self)
+        self.resource = LocalDynamoDBResource(self)
+        self.calls = {}
+        self.write_units = 0
+        self.latency_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def create_table(self, name, hash_key, range_key=None, indexes=(), stream=False):
+        self.tables[name] = LocalTable(self, name, hash_key, range_key, indexes, stream)
+        return self.tables[name]
+
+    def table(self, name):
+        if name not in self.tables:
+            raise _client_error("ResourceNotFoundException", f"Requested resource not found: Table: {name}", "DescribeTable")
+        return self.tables[name]
+
+    def call(self, operation, table_name):
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            self.latency_seconds += self.latency
+            if not self.connected:
+                self.connected = True
+                # Calls made meanwhile wait for it
+                time.sleep(self.connect)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.table(table_name) if table_name else None
+
+    def record_write(self, units):
+        with self._lock:
+            self.write_units += units
+
+    def admit_write(self, units):
+        if not self.write_capacity:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._write_tokens = min(self.write_capacity,
+                                     self._write_tokens + (now - self._write_refilled) * self.write_capacity)
+            self._write_refilled = now
+            if self._write_tokens < units:
+                return False
+            self._write_tokens -= units
+            return True
+
+    def admit_partition_write(self, partition, units):
+        with self._lock:
+            now = time.monotonic()
+            tokens, refilled = self._partition_tokens.get(partition, (self.index_partition_wcu, now))
+            tokens = min(self.index_partition_wcu, tokens + (now - refilled) * self.index_partition_wcu)
+            admitted = tokens >= units
+            self._partition_tokens[partition] = (tokens - units if admitted else tokens, now)
+            counts = self.partition_writes if admitted else self.partition_throttles
+            counts[partition] = counts.get(partition, 0) + 1
+            return admitted
+
+    def should_throttle(self):
+        if not self.throttle_rate:
+            return False
+        return random.random() < self.throttle_rate
+
+    def round_trips(self):
+        with self._lock:
+            return sum(self.calls.values())
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls = {}
+            self.write_units = 0
+            self.latency_seconds = 0.0
+            self.partition_writes = {}
+            self.partition_throttles = {}
+
+
+# ---------------------------------------------------------------------------
+# DynamoDB Streams
+# ---------------------------------------------------------------------------
+
+def serialize(value):
+    # Python value -> DynamoDB attribute value, as boto3's TypeSerializer does
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, float, Decimal)):
+        return {"N": str(value)}
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, (bytes, bytearray)):
+        return {"B": bytes(value)}
+    if isinstance(value, dict):
+        return {"M": {k: serialize(v) for k, v in value.items()}}
+    if isinstance(value, (set, frozenset)):
+        if all(isinstance(v, str) for v in value):
+            return {"SS": sorted(value)}
+        return {"NS": sorted(str(v) for v in value)}
+    return {"L": [serialize(v) for v in value]}
+
+
+class TypeDeserializer:
+    def deserialize(self, value):
+        kind, data = next(iter(value.items()))
+        if kind == "NULL":
+            return None
+        if kind in ("S", "BOOL", "B"):
+            return data
+        if kind == "N":
+            return Decimal(data)
+        if kind == "M":
+            return {k: self.deserialize(v) for k, v in data.items()}
+        if kind == "L":
+            return [self.deserialize(v) for v in data]
+        if kind == "SS":
+            return set(data)
+        if kind == "NS":
+            return {Decimal(v) for v in data}
+        raise ValueError(f"Unsupported attribute type {kind}")
+
+
+class LocalStream:
+    """One-shard NEW_IMAGE stream for a table.
+
+    ``trim(count)`` drops the oldest records, standing in for the 24-hour
+    retention; reading from a trimmed position raises
+    TrimmedDataAccessException.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.arn = f"arn:aws:dynamodb:local:000000000000:table/{table.name}/stream/{uuid.uuid4().hex[:12]}"
+        self.shard_id = "shardId-00000000000000000001-00000001"
+        self.records = []
+        self.first_sequence = 1
+        self._next_sequence = 1
+
+    def record(self, event_name, item):
+        keys = {k: item[k] for k in self.table.key_attributes()}
+        dynamodb = {
+            "ApproximateCreationDateTime": time.time(),
+            "Keys": serialize(keys)["M"],
+            "SequenceNumber": f"{self._next_sequence:021d}",
+            "SizeBytes": item_size(item),
+            "StreamViewType": "NEW_IMAGE",
+        }
+        if event_name != "REMOVE":
+            dynamodb["NewImage"] = serialize(item)["M"]
+        self.records.append({"eventID": uuid.uuid4().hex, "eventName": event_name, "eventSource": "aws:dynamodb",
+                             "dynamodb": dynamodb})
+        self._next_sequence += 1
+
+    def trim(self, count):
+        with self.table.lock:
+            del self.records[:count]
+            self.first_sequence += count
+
+
+class LocalDynamoDBStreams:
+    def __init__(self, backend):
+        self.backend = backend
+        self.calls = {}
+
+    def _stream(self, arn):
+        for table in self.backend.tables.values():
+            if table.stream is not None and table.stream.arn == arn:
+                return table.stream
+        raise _client_error("ResourceNotFoundException", f"Requested resource not found: Stream: {arn}", "DescribeStream")
+
+    def _call(self, operation):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def describe_stream(self, StreamArn, **kwargs):
+        self._call("DescribeStream")
+        stream = self._stream(StreamArn)
+        return {"StreamDescription": {
+            "StreamArn": StreamArn,
+            "StreamStatus": "ENABLED",
+            "StreamViewType": "NEW_IMAGE",
+            "Shards": [{"ShardId": stream.shard_id,
+                        "SequenceNumberRange": {"StartingSequenceNumber": f"{stream.first_sequence:021d}"}}],
+        }}
+
+    def get_shard_iterator(self, StreamArn, ShardId, ShardIteratorType, SequenceNumber=None, **kwargs):
+        self._call("GetShardIterator")
+        stream = self._stream(StreamArn)
+        if ShardIteratorType == "TRIM_HORIZON":
+            position = stream.first_sequence
+        elif ShardIteratorType == "LATEST":
+            position = stream._next_sequence
+        else:
+            position = int(SequenceNumber) + (1 if ShardIteratorType == "AFTER_SEQUENCE_NUMBER" else 0)
+            if position < stream.first_sequence:
+                raise _client_error("TrimmedDataAccessException",
+                                    "The operation attempted to read past the oldest stream record", "GetShardIterator")
+        return {"ShardIterator": f"{StreamArn}|{position}"}
+
+    def get_records(self, ShardIterator, Limit=1000, **kwargs):
+        self._call("GetRecords")
+        arn, position = ShardIterator.rsplit("|", 1)
+        stream = self._stream(arn)
+        with stream.table.lock:
+            start = int(position) - stream.first_sequence
+            if start < 0:
+                raise _client_error("TrimmedDataAccessException",
+                                    "The operation attempted to read past the oldest stream record", "GetRecords")
+            records = copy.deepcopy(stream.records[start:start + min(Limit, 1000)])
+        next_position = int(position) + len(records)
+        # The shard stays open, so there is always a next iterator
+        return {"Records": records, "NextShardIterator": f"{arn}|{next_position}"}
+
+
+# ---------------------------------------------------------------------------
+# KMS
+# ---------------------------------------------------------------------------
+
+class LocalKMS:
+    def encrypt(self, KeyId, Plaintext, **kwargs):
+        return {"CiphertextBlob": b"local:" + bytes(Plaintext)[::-1], "KeyId": KeyId}
+
+    def decrypt(self, CiphertextBlob, **kwargs):
+        return {"Plaintext": bytes(CiphertextBlob)[len(b"local:"):][::-1]}
+
+
+# ---------------------------------------------------------------------------
+# SQS
+# ---------------------------------------------------------------------------
+
+class LocalSQSQueue:
+    """In-memory queue with visibility semantics and a dead-letter limit.
+
+    ``poll()`` plays the Lambda event source mapping: it hands out up to
+    ``batch_size`` messages as an SQS event, and ``complete()`` deletes every
+    message except those reported in ``batchItemFailures``, which become
+    visible again (or move to ``dead_letters`` after ``max_receive_count``).
+    """
+
+    def __init__(self, max_receive_count=3):
+        self.max_receive_count = max_receive_count
+        self.visible = []
+        self.in_flight = {}
+        self.dead_letters = []
+        self.receive_counts = {}
+        self._lock = threading.Lock()
+
+    def send_message(self, MessageBody, **kwargs):
+        # Unique across queues, like real message ids (sqs_handler uses them as idempotency keys)
+        message_id = str(uuid.uuid4())
+        with self._lock:
+            self.visible.append({"messageId": message_id, "body": MessageBody})
+        return {"MessageId": message_id}
+
+    def send_message_batch(self, Entries, **kwargs):
+        if len(Entries) > 10:
+            raise _client_error("TooManyEntriesInBatchRequest", "Maximum number of entries per request are 10",
+                                "SendMessageBatch")
+        successful = [dict(self.send_message(entry["MessageBody"]), Id=entry["Id"]) for entry in Entries]
+        return {"Successful": successful, "Failed": []}
+
+    def __len__(self):
+        with self._lock:
+            return len(self.visible) + len(self.in_flight)
+
+    def poll(self, batch_size):
+        with self._lock:
+            batch, self.visible = self.visible[:batch_size], self.visible[batch_size:]
+            records = []
+            for message in batch:
+                self.in_flight[message["messageId"]] = message
+                count = self.receive_counts.get(message["messageId"], 0) + 1
+                self.receive_counts[message["messageId"]] = count
+                records.append({
+                    "messageId": message["messageId"],
+                    "receiptHandle": f"rh-{message['messageId']}-{count}",
+                    "body": message["body"],
+                    "attributes": {"ApproximateReceiveCount": str(count)},
+                    "eventSource": "aws:sqs",
+                })
+        return {"Records": records}
+
+    def complete(self, event, response):
+        failed = {failure["itemIdentifier"] for failure in (response or {}).get("batchItemFailures", [])}
+        with self._lock:
+            for record in event["Records"]:
+                message = self.in_flight.pop(record["messageId"])
+                if record["messageId"] not in failed:
+                    continue
+                if self.receive_counts[record["messageId"]] >= self.max_receive_count:
+                    self.dead_letters.append(message)
+                else:
+                    self.visible.append(message)
+
+
+# ---------------------------------------------------------------------------
+# S3
+# ---------------------------------------------------------------------------
+
+class LocalS3:
+    """In-memory S3 with multipart uploads.
+
+    With ``keep_bodies=False`` only object sizes are kept, so a benchmark's
+    memory reflects the uploader rather than the stored objects.
+    """
+
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, keep_bodies=True, latency_ms=0.0):
+        self.keep_bodies = keep_bodies
+        self.latency = latency_ms / 1000.0
+        self.objects = {}
+        self.sizes = {}
+        self.uploads = {}
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def _call(self, operation):
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _store(self, bucket, key, body):
+        with self._lock:
+            self.sizes[(bucket, key)] = len(body)
+            self.objects[(bucket, key)] = body if self.keep_bodies else b""
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._call("PutObject")
+        body = Body.encode("utf-8") if isinstance(Body, str) else bytes(Body)
+        self._store(Bucket, Key, body)
+        return {"ETag": f'"{zlib.crc32(body):08x}"'}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self._call("GetObject")
+        with self._lock:
+            if (Bucket, Key) not in self.objects:
+                raise _client_error("NoSuchKey", "The specified key does not exist.", "GetObject")
+            body = self.objects[(Bucket, Key)]
+        return {"Body": io.BytesIO(body), "ContentLength": len(body)}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self._call("CreateMultipartUpload")
+        upload_id = str(uuid.uuid4())
+        with self._lock:
+            self.uploads[upload_id] = {"Bucket": Bucket, "Key": Key, "parts": {}}
+        return {"Bucket": Bucket, "Key": Key, "UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        self._call("UploadPart")
+        body = bytes(Body)
+        etag = f'"{zlib.crc32(body):08x}"'
+        with self._lock:
+            if UploadId not in self.uploads:
+                raise _client_error("NoSuchUpload", "The specified upload does not exist.", "UploadPart")
+            self.uploads[UploadId]["parts"][PartNumber] = (etag, body if self.keep_bodies else len(body))
+        return {"ETag": etag}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self._call("CompleteMultipartUpload")
+        with self._lock:
+            upload = self.uploads.pop(UploadId, None)
+        if upload is None:
+            raise _client_error("NoSuchUpload", "The specified upload does not exist.", "CompleteMultipartUpload")
+        parts = MultipartUpload["Parts"]
+        if [p["PartNumber"] for p in parts] != sorted(p["PartNumber"] for p in parts):
+            raise _client_error("InvalidPartOrder", "The list of parts was not in ascending order.", "CompleteMultipartUpload")
+        chunks = []
+        for position, part in enumerate(parts):
+            etag, body = upload["parts"][part["PartNumber"]]
+            size = len(body) if self.keep_bodies else body
+            if etag != part["ETag"]:
+                raise _client_error("InvalidPart", "One or more of the specified parts could not be found.", "CompleteMultipartUpload")
+            if size < self.MIN_PART_SIZE and position < len(parts) - 1:
+                raise _client_error("EntityTooSmall", "Your proposed upload is smaller than the minimum allowed object size.",
+                                    "CompleteMultipartUpload")
+            chunks.append(body)
+        if self.keep_bodies:
+            self._store(Bucket, Key, b"".join(chunks))
+        else:
+            with self._lock:
+                self.sizes[(Bucket, Key)] = sum(chunks)
+                self.objects[(Bucket, Key)] = b""
+        return {"Bucket": Bucket, "Key": Key}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self._call("AbortMultipartUpload")
+        with self._lock:
+            self.uploads.pop(UploadId, None)
+        return {}
+
+
+# ---------------------------------------------------------------------------
+# Fake boto3 / botocore modules
+# ---------------------------------------------------------------------------
+
+class LocalAWS:
+    def __init__(self, dynamodb_latency_ms=0.0, dynamodb_connect_ms=0.0):
+        self.dynamodb = LocalDynamoDB(latency_ms=dynamodb_latency_ms, connect_ms=dynamodb_connect_ms)
+        self.kms = LocalKMS()
+        self.s3 = LocalS3()
+        self.dynamodb.s3 = self.s3
+        self.dynamodbstreams = LocalDynamoDBStreams(self.dynamodb)
+        # A single queue stands in for every queue URL
+        self.sqs = LocalSQSQueue()
+
+    def client(self, service, *args, **kwargs):
+        if service == "dynamodb":
+            return self.dynamodb.client
+        if service == "kms":
+            return self.kms
+        if service == "s3":
+            return self.s3
+        if service == "dynamodbstreams":
+            return self.dynamodbstreams
+        if service == "sqs":
+            return self.sqs
+        raise ValueError(f"No local stand-in for AWS service {service}")
+
+    def resource(self, service, *args, **kwargs):
+        if service == "dynamodb":
+            return self.dynamodb.resource
+        raise ValueError(f"No local stand-in for AWS resource {service}")
+
+    def create_payment_tables(self, ledger_table="Payment-Ledger", audit_table="Payment-AuditTrail", stream=False):
+        # Key schemas mirror dynamodb.tf
+        self.dynamodb.create_table(ledger_table, "transaction_id", "process_type", stream=stream)
+        self.dynamodb.create_table(audit_table, "transaction_id", "event_id", stream=stream)
+        return ledger_table, audit_table
+
+
+def install(aws=None):
+    aws = aws or LocalAWS()
+
+    boto3 = types.ModuleType("boto3")
+    boto3.client = aws.client
+    boto3.resource = aws.resource
+    boto3_dynamodb = types.ModuleType("boto3.dynamodb")
+    boto3_types = types.ModuleType("boto3.dynamodb.types")
+    boto3_types.TypeDeserializer = TypeDeserializer
+    boto3_dynamodb.types = boto3_types
+    boto3.dynamodb = boto3_dynamodb
+    botocore = types.ModuleType("botocore")
+    exceptions = types.ModuleType("botocore.exceptions")
+    exceptions.ClientError = ClientError
+    botocore.exceptions = exceptions
+
+    sys.modules["boto3"] = boto3
+    sys.modules["boto3.dynamodb"] = boto3_dynamodb
+    sys.modules["boto3.dynamodb.types"] = boto3_types
+    sys.modules["botocore"] = botocore
+    sys.modules["botocore.exceptions"] = exceptions
+    return aws
@@ -0,0 +1,57 @@
+"""Items per second for the backup scan at several TotalSegments values.
+
+Fills a local table with ledger-sized rows, then scans it with a single
+unpaginated scan() (the old backup behaviour, which stops at the first 1 MB
+page) and with parallel_scan at each segment count. Every page pays the
+stand-in's per-call latency plus a per-MB read time. Run from the repository
+root:
+
+    python benchmarks/parallel_scan_bench.py --items 50000 --segments 1 4 8 16
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+from parallel_scan import scan_all  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--item-bytes", type=int, default=400)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=10.0)
+    parser.add_argument("--scan-ms-per-mb", type=float, default=80.0)
+    args = parser.parse_args()
+
+    dynamodb = local_aws.LocalDynamoDB(latency_ms=args.dynamodb_latency_ms, scan_ms_per_mb=args.scan_ms_per_mb)
+    table = dynamodb.create_table("Payment-Ledger", "transaction_id", "process_type")
+    padding = "x" * args.item_bytes
+    for _ in range(args.items):
+        item = {"transaction_id": str(uuid.uuid4()), "process_type": "sale",
+                "status": "PAYMENT-SUCCESS", "response_details": padding}
+        table.store(table.key_of(item), item)
+
+    response = dynamodb.client.scan(TableName=table.name)
+    print(f"{'single scan()':<16} items={response['Count']:<8} of {args.items} (LastEvaluatedKey ignored)")
+
+    for segments in args.segments:
+        start = time.perf_counter()
+        items, stats = scan_all(dynamodb.client, table.name, segments)
+        elapsed = time.perf_counter() - start
+        assert len(items) == args.items, (len(items), args.items)
+        rcu = sum(segment["consumed_capacity"] for segment in stats)
+        slowest = max(segment["seconds"] for segment in stats)
+        print(
+            f"{'segments=' + str(segments):<16} items={len(items):<8} items/s={len(items) / elapsed:10.0f} "
+            f"seconds={elapsed:6.2f} slowest_segment={slowest:5.2f}s rcu={rcu:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Ledger item size and write units: details as JSON strings vs payload_codec.
+
+For each payload shape the payment lambda stores, builds the ledger row with
+response_details as the old JSON string and as payload_codec encodes it (a
+native Map, or zlib Binary past PAYLOAD_COMPRESS_THRESHOLD), and reports item
+bytes and write units by the local stand-in's DynamoDB size rules, plus encode
+and decode time. The "large" shape is a processor response carrying receipt
+lines and EMV tags. Run from the repository root:
+
+    python benchmarks/payload_codec_bench.py --iterations 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+import payload_codec  # noqa: E402
+import serializer  # noqa: E402
+
+NORMALIZED = {"status": "success", "message": "Approved", "transaction_id": "EL2024050112345678"}
+PAYLOADS = {
+    "normalized": NORMALIZED,
+    "token": {"token": "tok_" + "a1b2c3d4" * 8},
+    "large": {
+        **NORMALIZED,
+        "amount": Decimal("149.99"),
+        "receipt": [{"line": i, "sku": f"SKU-{i:05d}", "description": "Checked bag fee, economy",
+                     "amount": Decimal("35.00"), "tax": Decimal("2.80")} for i in range(24)],
+        "emv": {f"9F{i:02X}": "0" * 16 for i in range(40)},
+    },
+}
+
+
+def ledger_row(details):
+    return {
+        "transaction_id": "0f8fad5b-d9cb-469f-a165-70867728950e",
+        "process_type": "sale",
+        "status": "PAYMENT-SUCCESS",
+        "timestamp": "2024-05-01 12:30:15.123456+00:00",
+        "response_details": details,
+    }
+
+
+def per_call(fn, value, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(value)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    for name, payload in PAYLOADS.items():
+        rows = [
+            ("json string", serializer.dumps(payload), lambda value: json.loads(value, parse_float=Decimal),
+             serializer.dumps),
+            ("payload_codec", payload_codec.encode(payload), payload_codec.decode, payload_codec.encode),
+        ]
+        for label, stored, decode, encode in rows:
+            assert decode(stored) == json.loads(serializer.dumps(payload), parse_float=Decimal)
+            item = ledger_row(stored)
+            kind = "binary" if isinstance(stored, bytes) else type(stored).__name__
+            print(
+                f"{name:<10} {label:<13} as={kind:<6} item_bytes={local_aws.item_size(item):>5} "
+                f"wcu={local_aws.write_units(item)} encode_us={per_call(encode, payload, args.iterations):6.1f} "
+                f"decode_us={per_call(decode, stored, args.iterations):6.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Payment lambda first-request latency with and without the init-phase prewarm.
+
+Each run is a fresh interpreter: it imports paymentledgeraudittrail (the init
+phase) against the local AWS stand-in and the stub processor, then times the
+container's first and second payment. The stub charges --handshake-ms for each
+new connection, standing in for the processor's TLS handshake. The first
+DynamoDB call pays --dynamodb-connect-ms, standing in for credential lookup
+and the TLS handshake. With PREWARM_ON_INIT=false, that setup (and importing
+requests) lands on the first request. Run from the repository root:
+
+    python benchmarks/prewarm_bench.py --runs 10 --handshake-ms 40 --dynamodb-connect-ms 30
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from stub_processor import StubProcessor  # noqa: E402
+
+CHILD = r"""
+import json, sys, time
+args = json.loads(sys.argv[1])
+sys.path[:0] = [args["benchmarks"], args["lambda_function"]]
+import local_aws
+aws = local_aws.install(local_aws.LocalAWS(args["dynamodb_latency_ms"], args["dynamodb_connect_ms"]))
+aws.create_payment_tables()
+start = time.perf_counter()
+import paymentledgeraudittrail
+timings = {"init_ms": (time.perf_counter() - start) * 1000}
+for label in ("first_ms", "second_ms"):
+    start = time.perf_counter()
+    response = paymentledgeraudittrail.lambda_handler({"process_type": "sale", "amount": "10.00"}, None)
+    assert response["statusCode"] == 200, response
+    timings[label] = (time.perf_counter() - start) * 1000
+timings["prewarm"] = paymentledgeraudittrail.init_prewarm
+print(json.dumps(timings))
+"""
+
+
+def run_child(env, args):
+    child_args = {
+        "benchmarks": HERE,
+        "lambda_function": os.path.join(HERE, "..", "lambda_function"),
+        "dynamodb_latency_ms": args.dynamodb_latency_ms,
+        "dynamodb_connect_ms": args.dynamodb_connect_ms,
+    }
+    child = subprocess.run(
+        [sys.executable, "-c", CHILD, json.dumps(child_args)], env=env, capture_output=True, text=True,
+    )
+    if child.returncode:
+        raise RuntimeError(child.stderr[-2000:])
+    return json.loads(child.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--processor-latency-ms", type=float, default=20.0)
+    parser.add_argument("--handshake-ms", type=float, default=40.0)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=5.0)
+    parser.add_argument("--dynamodb-connect-ms", type=float, default=30.0)
+    args = parser.parse_args()
+
+    with StubProcessor(latency_ms=args.processor_latency_ms, handshake_ms=args.handshake_ms) as processor:
+        env = dict(os.environ)
+        env.update({
+            "DYNAMODB_LEDGER_TABLE_NAME": "Payment-Ledger",
+            "DYNAMODB_AUDIT_TABLE_NAME": "Payment-AuditTrail",
+            "PROCESSOR_URL": processor.url,
+            "API_KEY": "bench",
+        })
+        for prewarm in ("false", "true"):
+            env["PREWARM_ON_INIT"] = prewarm
+            results = [run_child(env, args) for _ in range(args.runs)]
+            print(
+                f"prewarm={prewarm:<5} init_ms={statistics.median(r['init_ms'] for r in results):7.1f} "
+                f"first_request_ms={statistics.median(r['first_ms'] for r in results):7.1f} "
+                f"second_request_ms={statistics.median(r['second_ms'] for r in results):6.1f}"
+            )
+            if results[0]["prewarm"]:
+                steps = results[0]["prewarm"]
+                print("    " + "  ".join(
+                    f"{name}.{timing}={value:.1f}" for name in ("processor", "token", "dynamodb")
+                    for timing, value in steps.get(name, {}).items() if timing.endswith("ms")
+                ) + f"  total_ms={steps['ms']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
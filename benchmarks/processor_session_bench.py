@@ -0,0 +1,66 @@
+"""Per-invocation processor latency with and without pooled connection reuse.
+
+Each simulated invocation makes the two processor calls the payment lambda
+makes (security token, payment intent). The stub speaks plain HTTP on
+loopback, so the gap shown here is only the TCP handshake; against the real
+processor every avoided connection also saves a TLS handshake. Run from the
+repository root:
+
+    python benchmarks/processor_session_bench.py --invocations 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+from stub_processor import StubProcessor  # noqa: E402
+
+
+def run_invocation_unpooled(requests, url):
+    requests.post(f"{url}/security-token", headers={"Authorization": "Bearer bench"}).json()
+    requests.post(f"{url}/payment-intent", json={"transaction_id": "bench", "amount": "1.00", "token": "t"}).json()
+
+
+def run_invocation_pooled(processor_session):
+    processor_session.post("/security-token", headers={"Authorization": "Bearer bench"}).json()
+    processor_session.post("/payment-intent", json={"transaction_id": "bench", "amount": "1.00", "token": "t"}).json()
+
+
+def measure(label, fn, invocations, processor):
+    processor.reset_stats()
+    latencies = []
+    for _ in range(invocations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    stats = processor.stats
+    print(
+        f"{label:<12} p50={statistics.median(latencies):7.3f}ms "
+        f"p95={latencies[int(len(latencies) * 0.95) - 1]:7.3f}ms "
+        f"mean={statistics.mean(latencies):7.3f}ms "
+        f"connections={stats['connections']} requests={stats['requests']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invocations", type=int, default=300)
+    args = parser.parse_args()
+
+    with StubProcessor() as processor:
+        os.environ["PROCESSOR_URL"] = processor.url
+        import requests
+        import processor_session
+
+        measure("no-reuse", lambda: run_invocation_unpooled(requests, processor.url), args.invocations, processor)
+        measure("pooled", lambda: run_invocation_pooled(processor_session), args.invocations, processor)
+        print(f"pool: {processor_session.pool_stats()} healthy={processor_session.check_health()}")
+        processor_session.close_session()
+
+
+if __name__ == "__main__":
+    main()
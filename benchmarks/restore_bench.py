@@ -0,0 +1,93 @@
+"""Restore throughput: parallel BatchWriteItem workers and the write-rate cap.
+
+Backs up a local ledger table with dynamodb_backup, then restores the object
+into a fresh table with dynamodb_restore at several worker counts, with every
+BatchWriteItem paying the stand-in's per-call latency. The sequential row is
+dynamodb_batch.batch_write over the decoded items. The provisioned rows give
+the target table a fixed write capacity: uncapped workers run into throttling
+and back off, a cap just under the capacity avoids most retries. Run from the
+repository root:
+
+    python benchmarks/restore_bench.py --items 20000 --workers 1 4 8 16
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+from backup_format_bench import ledger_row  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=10.0)
+    parser.add_argument("--write-capacity", type=float, default=5000.0, help="WCU/s of the provisioned runs")
+    parser.add_argument("--format", default="ndjson.gz")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    aws = local_aws.install()
+    ledger, audit = aws.create_payment_tables()
+    table = aws.dynamodb.table(ledger)
+    rng = random.Random(args.seed)
+    for _ in range(args.items):
+        item = ledger_row(rng)
+        table.store(table.key_of(item), item)
+
+    os.environ.update({
+        "DYNAMODB_LEDGER_TABLE_NAME": ledger,
+        "DYNAMODB_AUDIT_TABLE_NAME": audit,
+        "S3_BACKUP_BUCKET_NAME": "backup-bucket",
+    })
+    import backup_formats
+    import dynamodb_backup
+    import dynamodb_restore
+    import incremental_backup
+    from dynamodb_batch import batch_write
+
+    key = f"backup/bench.{args.format}"
+    dynamodb_backup.backup_table(ledger, f"bench.{args.format}", args.format)
+    aws.dynamodb.latency = args.dynamodb_latency_ms / 1000.0
+
+    def fresh_table(name, write_capacity=None):
+        aws.dynamodb.create_table(name, "transaction_id", "process_type")
+        aws.dynamodb.write_capacity = write_capacity
+        aws.dynamodb._write_tokens = write_capacity or 0.0
+
+    def report(label, seconds, retries, target):
+        restored = aws.dynamodb.table(target).items
+        assert restored == table.items, f"{label}: restored table differs from the source"
+        print(f"{label:<34} items/s={args.items / seconds:8.0f} retries={retries:>6} seconds={seconds:6.2f}")
+
+    fresh_table("Restore-sequential")
+    start = time.perf_counter()
+    items = backup_formats.iter_items(args.format, incremental_backup.iter_object(aws.s3, "backup-bucket", key))
+    failed = batch_write(aws.dynamodb.client, [("Restore-sequential", {"PutRequest": {"Item": item}}) for item in items])
+    assert not failed
+    report("sequential batch_write", time.perf_counter() - start, 0, "Restore-sequential")
+
+    runs = [(f"workers={workers}", workers, None, None) for workers in args.workers]
+    workers = max(args.workers)
+    runs += [
+        (f"provisioned workers={workers} uncapped", workers, args.write_capacity, None),
+        (f"provisioned workers={workers} cap={args.write_capacity * 0.9:.0f}", workers, args.write_capacity,
+         args.write_capacity * 0.9),
+    ]
+    for label, workers, write_capacity, cap in runs:
+        target = f"Restore-{label}"
+        fresh_table(target, write_capacity)
+        dynamodb_restore.RESTORE_WORKERS = workers
+        dynamodb_restore.RESTORE_MAX_WRITE_RATE = cap
+        start = time.perf_counter()
+        summary = dynamodb_restore.restore_table(target, key)
+        report(label, time.perf_counter() - start, summary["retries"], target)
+
+
+if __name__ == "__main__":
+    main()
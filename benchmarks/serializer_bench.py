@@ -0,0 +1,75 @@
+"""Encode time of ledger/audit payloads: old safe_json_serialize vs serializer.
+
+Payloads are the shapes the payment lambda stores: the normalized processor
+response, the pending-status token details, and a fuller processor response
+carrying a Decimal amount, datetimes and a UUID. "old" is the previous
+safe_json_serialize (json.dumps, "{}" on TypeError); its output size shows
+where it dropped the payload. The orjson row is skipped unless orjson is
+installed. Run from the repository root:
+
+    python benchmarks/serializer_bench.py --iterations 200000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import serializer  # noqa: E402
+
+PAYLOADS = {
+    "normalized": {"status": "success", "message": "Approved", "transaction_id": "EL2024050112345678"},
+    "token": {"token": "tok_" + "a1b2c3d4" * 8},
+    "processor": {
+        "status": "success",
+        "message": "Approved",
+        "transaction_id": "EL2024050112345678",
+        "amount": Decimal("149.99"),
+        "currency": "USD",
+        "authorized_at": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+        "settlement_id": uuid.UUID("6f1c2a9e-3b4d-4e5f-8a7b-9c0d1e2f3a4b"),
+        "card": {"brand": "VISA", "last4": "4242", "exp_month": 12, "exp_year": 2027},
+        "fees": [{"type": "interchange", "amount": Decimal("2.61")}, {"type": "network", "amount": Decimal("0.13")}],
+    },
+}
+
+
+def old_safe_json_serialize(data):
+    try:
+        return json.dumps(data)
+    except (TypeError, ValueError):
+        return "{}"
+
+
+def measure(encode, payload, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode(payload)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    encoders = [("old", old_safe_json_serialize), ("serializer[json]", serializer._dumps_json)]
+    if serializer.orjson is not None:
+        encoders.append(("serializer[orjson]", serializer._dumps_orjson))
+    else:
+        print("serializer[orjson] skipped (orjson not installed)")
+
+    for name, payload in PAYLOADS.items():
+        for label, encode in encoders:
+            output = encode(payload)
+            micros = measure(encode, payload, args.iterations)
+            print(f"{name:<11} {label:<19} us/encode={micros:6.2f} bytes={len(output):>4}")
+
+
+if __name__ == "__main__":
+    main()
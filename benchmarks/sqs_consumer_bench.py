@@ -0,0 +1,70 @@
+"""Throughput of the SQS consumer (sqs_handler) at batch sizes 1, 10 and 100.
+
+Messages are drained from an in-memory queue that mimics the Lambda event
+source mapping, including redelivery of the messages reported in
+batchItemFailures. Run from the repository root:
+
+    python benchmarks/sqs_consumer_bench.py --messages 500 --processor-latency-ms 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+from stub_processor import StubProcessor  # noqa: E402
+
+
+def drain(queue, handler, batch_size):
+    invocations = 0
+    while len(queue):
+        event = queue.poll(batch_size)
+        if not event["Records"]:
+            break
+        queue.complete(event, handler(event, None))
+        invocations += 1
+    return invocations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--processor-latency-ms", type=float, default=20.0)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=5.0)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--invalid-every", type=int, default=50, help="make every Nth message invalid (0 disables)")
+    args = parser.parse_args()
+
+    aws = local_aws.install(local_aws.LocalAWS(dynamodb_latency_ms=args.dynamodb_latency_ms))
+    ledger, audit = aws.create_payment_tables()
+
+    with StubProcessor(latency_ms=args.processor_latency_ms) as processor:
+        os.environ.update({
+            "DYNAMODB_LEDGER_TABLE_NAME": ledger,
+            "DYNAMODB_AUDIT_TABLE_NAME": audit,
+            "PROCESSOR_URL": processor.url,
+            "API_KEY": "bench",
+            # One EMF record per invocation would interleave with the report
+            "TRACE_ENABLED": "false",
+        })
+        import paymentledgeraudittrail
+
+        for batch_size in args.batch_sizes:
+            queue = local_aws.LocalSQSQueue()
+            for index in range(args.messages):
+                invalid = args.invalid_every and index % args.invalid_every == 0
+                queue.send_message(MessageBody=json.dumps({"process_type": "sale", "amount": "0" if invalid else "10.00"}))
+            start = time.perf_counter()
+            invocations = drain(queue, paymentledgeraudittrail.sqs_handler, batch_size)
+            elapsed = time.perf_counter() - start
+            print(
+                f"batch_size={batch_size:<4} messages/s={args.messages / elapsed:8.1f} "
+                f"invocations={invocations:<4} dead_letters={len(queue.dead_letters)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Ledger writes per second under a per-partition index limit: status-index vs the write-sharded status index.
+
+Each GSI partition of the local stand-in takes at most --partition-wcu write
+units per second (DynamoDB's is about 1000); a write over it is rejected with
+ProvisionedThroughputExceededException. --threads writers each run payments
+through the ledger state machine (PAYMENT-INITIATED, then PENDING, then
+SUCCESS) for --seconds. With status-index every write of a status lands on the
+same index partition, so the ledger tops out near three partitions' worth of
+writes. With status-shard-index the same writes spread over --shards partitions
+per status and day. The limit is scaled down from DynamoDB's so the stand-in's
+own speed is not what caps the sharded runs.
+
+Afterwards the sharded table is read back with LedgerRepository.query_status,
+sequentially and with the parallel scatter-gather, at --dynamodb-latency-ms per
+call; both must return every PAYMENT-SUCCESS row, ordered by status_at. Every
+stand-in Query filters the whole table, so CPU time there narrows the gap the
+parallel fan-out shows. Run from the repository root:
+
+    python benchmarks/status_index_bench.py --threads 8 --seconds 3 --shards 4 16
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_function"))
+
+import local_aws  # noqa: E402
+
+# ledger_state_machine imports botocore; the stand-in's fake module provides it
+local_aws.install()
+
+import ledger_state_machine  # noqa: E402
+from ledger_repository import LedgerRepository, STATUS_INDEX  # noqa: E402
+from sharded_index import ShardedIndex  # noqa: E402
+
+TABLE = "Payment-Ledger"
+STATUSES = ("PAYMENT-PENDING", "PAYMENT-SUCCESS")
+
+
+def build(args, index, shards):
+    dynamodb = local_aws.LocalDynamoDB(index_partition_wcu=args.partition_wcu)
+    dynamodb.create_table(TABLE, "transaction_id", "process_type", indexes=[index])
+    status_index = ShardedIndex(STATUS_INDEX.index_name, "status", STATUS_INDEX.key_attribute,
+                                STATUS_INDEX.sort_attribute, shards)
+    return dynamodb, LedgerRepository(dynamodb.client, TABLE, max_workers=args.workers, status_index=status_index)
+
+
+def run_writers(ledger, threads, seconds):
+    counts = {"writes": 0, "throttled": 0, "payments": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def writer():
+        writes = throttled = payments = 0
+        while time.perf_counter() < deadline:
+            transaction_id = str(uuid.uuid4())
+            try:
+                ledger_state_machine.start(ledger, {
+                    "transaction_id": transaction_id, "process_type": "sale",
+                    "status": ledger_state_machine.INITIAL_STATUS, "timestamp": str(datetime.now(timezone.utc)),
+                })
+                writes += 1
+                for status in STATUSES:
+                    ledger_state_machine.advance(ledger, transaction_id, "sale", status, {"status": "success"})
+                    writes += 1
+                payments += 1
+            except local_aws.ClientError as e:
+                if e.response["Error"]["Code"] != "ProvisionedThroughputExceededException":
+                    raise
+                throttled += 1
+        with lock:
+            counts["writes"] += writes
+            counts["throttled"] += throttled
+            counts["payments"] += payments
+
+    workers = [threading.Thread(target=writer) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--partition-wcu", type=float, default=250.0)
+    parser.add_argument("--shards", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--workers", type=int, default=16, help="scatter-gather query threads")
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    layouts = [("status-index", local_aws.LocalIndex("status-index", "status", "timestamp", "KEYS_ONLY"), 1)]
+    layouts += [(f"shard-index x{shards}", local_aws.LocalIndex(
+        STATUS_INDEX.index_name, STATUS_INDEX.key_attribute, STATUS_INDEX.sort_attribute, "KEYS_ONLY"), shards)
+        for shards in args.shards]
+    for label, index, shards in layouts:
+        dynamodb, ledger = build(args, index, shards)
+        start = datetime.now(timezone.utc)
+        counts = run_writers(ledger, args.threads, args.seconds)
+        hottest = max(dynamodb.partition_writes.values())
+        attempts = counts["writes"] + counts["throttled"]
+        print(f"{label:<18} writes/s={counts['writes'] / args.seconds:8.0f} "
+              f"payments/s={counts['payments'] / args.seconds:7.0f} "
+              f"rejected={100.0 * counts['throttled'] / attempts:5.1f}% of attempts "
+              f"index_partitions={len(dynamodb.partition_writes):<4} "
+              f"hottest_partition_writes/s={hottest / args.seconds:6.0f}")
+
+    # Scatter-gather over the last sharded table
+    rows = sorted(item["status_at"] for item in dynamodb.tables[TABLE].items.values()
+                  if item["status"] == "PAYMENT-SUCCESS")
+    dynamodb.latency = args.dynamodb_latency_ms / 1000.0
+    end = datetime.now(timezone.utc) + timedelta(seconds=1)
+    for workers in (1, args.workers):
+        ledger.max_workers = workers
+        dynamodb.reset_counters()
+        began = time.perf_counter()
+        found = ledger.query_status("PAYMENT-SUCCESS", start, end)
+        ms = (time.perf_counter() - began) * 1000
+        assert [item["status_at"] for item in found] == rows, (len(found), len(rows))
+        print(f"query_status workers={workers:<3} rows={len(found):<7} queries={dynamodb.round_trips():<4} "
+              f"ms={ms:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Local stand-in for the payment processor's /security-token and /payment-intent endpoints
+class StubProcessorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this Nagle + delayed ACK
+        # adds ~40ms to every response on a reused connection.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.stats_lock:
+            self.server.stats["connections"] += 1
+        if self.server.handshake_ms:
+            # The stub speaks plain HTTP; this stands in for a TLS handshake on each new connection
+            time.sleep(self.server.handshake_ms / 1000.0)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.stats_lock:
+            self.server.stats["requests"] += 1
+        latency_ms = self.server.latency_ms
+        if self.server.jitter_ms:
+            latency_ms += random.uniform(0, self.server.jitter_ms)
+        if latency_ms:
+            time.sleep(latency_ms / 1000.0)
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            with self.server.stats_lock:
+                self.server.stats["errors"] += 1
+            self._send_json(503, {"message": "Processor temporarily unavailable"})
+            return
+
+        if self.path.endswith("/security-token"):
+            self._send_json(200, {"token": f"tok-{uuid.uuid4()}", "expires_in": 300})
+        elif self.path.endswith("/payment-intent"):
+            self._send_json(200, {
+                "status": "success",
+                "message": "Approved",
+                "transaction_id": body.get("transaction_id"),
+            })
+        else:
+            self._send_json(404, {"message": f"Unknown path {self.path}"})
+
+
+class StubProcessor:
+    # Each POST takes latency_ms plus up to jitter_ms more, and fails with a 503 at error_rate
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0.0, handshake_ms=0.0, jitter_ms=0.0, error_rate=0.0):
+        self.server = ThreadingHTTPServer((host, port), StubProcessorHandler)
+        self.server.daemon_threads = True
+        self.server.latency_ms = latency_ms
+        self.server.handshake_ms = handshake_ms
+        self.server.jitter_ms = jitter_ms
+        self.server.error_rate = error_rate
+        self.server.stats = {"connections": 0, "requests": 0, "errors": 0}
+        self.server.stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self):
+        with self.server.stats_lock:
+            return dict(self.server.stats)
+
+    def reset_stats(self):
+        with self.server.stats_lock:
+            self.server.stats.update({"connections": 0, "requests": 0, "errors": 0})
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,117 @@
+"""Per-invocation trace records and their overhead on the payment hot path.
+
+Each mode runs in a fresh interpreter, because the lambda reads TRACE_ENABLED
+at import. The child runs --payments single payments through lambda_handler
+against the local AWS stand-in and the stub processor, with no added latency.
+The per-payment difference between modes is usually within run-to-run noise,
+so the tracing calls of one invocation are also timed on their own,
+in-process. --show-record prints one invocation's EMF record. Run from the
+repository root:
+
+    python benchmarks/tracing_bench.py --payments 2000 --show-record
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "..", "lambda_function"))
+
+import tracing  # noqa: E402
+from stub_processor import StubProcessor  # noqa: E402
+
+CHILD = r"""
+import io, json, sys, time
+from contextlib import redirect_stdout
+args = json.loads(sys.argv[1])
+sys.path[:0] = [args["benchmarks"], args["lambda_function"]]
+import local_aws
+local_aws.install(local_aws.LocalAWS()).create_payment_tables()
+import paymentledgeraudittrail
+payment = {"process_type": "sale", "amount": "10.00"}
+emitted = io.StringIO()
+with redirect_stdout(emitted):
+    paymentledgeraudittrail.lambda_handler(payment, None)
+    start = time.perf_counter()
+    for _ in range(args["payments"]):
+        assert paymentledgeraudittrail.lambda_handler(payment, None)["statusCode"] == 200
+    elapsed = time.perf_counter() - start
+records = emitted.getvalue().splitlines()
+print(json.dumps({"us_per_payment": elapsed / args["payments"] * 1e6, "records": len(records),
+                  "record": json.loads(records[-1]) if records else None}))
+"""
+
+
+def run_child(env, payments):
+    child_args = {
+        "benchmarks": HERE,
+        "lambda_function": os.path.join(HERE, "..", "lambda_function"),
+        "payments": payments,
+    }
+    child = subprocess.run([sys.executable, "-c", CHILD, json.dumps(child_args)], env=env, capture_output=True, text=True)
+    if child.returncode:
+        raise RuntimeError(child.stderr[-2000:])
+    return json.loads(child.stdout.splitlines()[-1])
+
+
+# The tracing calls a single payment makes: four steps, three DynamoDB calls, two processor calls
+def traced_invocation():
+    tracing.begin("lambda_handler")
+    tracing.annotate(cold_start=False, transaction_id="0f8fad5b-d9cb-469f-a165-70867728950e")
+    for name in ("token", "create_ledger", "intent", "success_update"):
+        with tracing.step(name):
+            pass
+    for _ in range(3):
+        tracing.record_dynamodb_call(5.0, {"TableName": "Payment-Ledger", "CapacityUnits": 2.0})
+    tracing.record_processor_call()
+    tracing.record_processor_call()
+    tracing.finish(status_code=200)
+
+
+def layer_us(iterations=20000):
+    tracing.TRACE_ENABLED = True
+    with redirect_stdout(StringIO()):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            traced_invocation()
+        return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payments", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--show-record", action="store_true")
+    args = parser.parse_args()
+
+    with StubProcessor() as processor:
+        env = dict(os.environ)
+        env.update({
+            "DYNAMODB_LEDGER_TABLE_NAME": "Payment-Ledger",
+            "DYNAMODB_AUDIT_TABLE_NAME": "Payment-AuditTrail",
+            "PROCESSOR_URL": processor.url,
+            "API_KEY": "bench",
+            "PREWARM_ON_INIT": "false",
+        })
+        baseline = None
+        for enabled in ("false", "true"):
+            env["TRACE_ENABLED"] = enabled
+            results = [run_child(env, args.payments) for _ in range(args.runs)]
+            us = statistics.median(result["us_per_payment"] for result in results)
+            baseline = baseline or us
+            print(f"trace={enabled:<5} us/payment={us:8.1f} overhead={us - baseline:+6.1f}us "
+                  f"records={results[0]['records']}")
+        print(f"tracing layer alone: {layer_us():.1f}us per invocation (JSON backend: {tracing.serializer.BACKEND})")
+        if args.show_record:
+            print(json.dumps(results[0]["record"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Transaction history through transaction_id-index vs a Query on the re-keyed audit table, and migration speed.
+
+Builds an audit trail in the old layout: audit_id-keyed records with
+transaction_id-index and bucket-index, --events hash-chained records per
+transaction. It is then copied into the (transaction_id, event_id) table with
+scripts/migrate_audit_table.py at each --segments count, and the copy is
+sealed and verified. Per transaction, history is read two ways:
+- "gsi + batch get": the old layout. transaction_id-index is queried (it can
+  only be read eventually consistently and projects no hashes), then the
+  records are fetched with a consistent BatchGetItem for the chain check.
+- "base query": one consistent Query on the transaction's partition.
+
+Calls, read units and latency are per history read; write units are per
+audit record written, index writes included. Last, one payment runs through
+lambda_handler and is read back with get_transaction_history. Run from the
+repository root:
+
+    python benchmarks/transaction_history_bench.py --transactions 3000 --segments 1 4 16
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "..", "lambda_function"))
+sys.path.insert(0, os.path.join(HERE, "..", "scripts"))
+
+import local_aws  # noqa: E402
+import audit_chain  # noqa: E402
+import audit_verifier  # noqa: E402
+import dynamodb_batch  # noqa: E402
+import migrate_audit_table  # noqa: E402
+from stub_processor import StubProcessor  # noqa: E402
+
+LEGACY_TABLE = "Payment-AuditTrail"
+TABLE = "Payment-AuditTrail-v2"
+BASE = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def build_legacy(dynamodb, transactions, events, hours):
+    # The layout before the re-key: audit_position was set before record_hash, so it is hashed too
+    dynamodb.create_table(LEGACY_TABLE, "audit_id", "transaction_id", indexes=[
+        local_aws.LocalIndex("transaction_id-index", "transaction_id", "timestamp", "INCLUDE",
+                             ["action_details", "action_type"]),
+        local_aws.LocalIndex(audit_chain.BUCKET_INDEX, audit_chain.BUCKET_ATTRIBUTE, "audit_position"),
+    ])
+    chain = audit_chain.AuditChain()
+    span = timedelta(hours=hours) / (transactions * events)
+    transaction_ids, requests = [], []
+    for i in range(transactions * events):
+        if i % events == 0:
+            transaction_ids.append(str(uuid.uuid4()))
+        moment = BASE + span * i
+        item = {
+            "audit_id": str(uuid.uuid4()),
+            "transaction_id": transaction_ids[-1],
+            "action_type": "PAYMENT-SUCCESS",
+            "timestamp": str(moment),
+            "action_details": {"status": "approved", "amount": "10.00", "processor": "elavon"},
+        }
+        item["audit_position"] = f"{item['timestamp']}#{item['audit_id']}"
+        requests.append(dynamodb_batch.put_request(LEGACY_TABLE, chain.link(item, moment, i % events == 0)))
+    dynamodb.reset_counters()
+    dynamodb_batch.batch_write(dynamodb.client, requests)
+    return transaction_ids, dynamodb.write_units / len(requests)
+
+
+def history_from_gsi(client, transaction_id):
+    listed = client.query(
+        TableName=LEGACY_TABLE, IndexName="transaction_id-index",
+        KeyConditionExpression="transaction_id = :transaction_id",
+        ExpressionAttributeValues={":transaction_id": transaction_id},
+        ReturnConsumedCapacity="TOTAL",
+    )
+    keys = [{"audit_id": item["audit_id"], "transaction_id": transaction_id} for item in listed["Items"]]
+    fetched = client.batch_get_item(RequestItems={LEGACY_TABLE: {"Keys": keys, "ConsistentRead": True}},
+                                    ReturnConsumedCapacity="TOTAL")
+    events = sorted(fetched["Responses"][LEGACY_TABLE], key=lambda item: int(item["chain_seq"]))
+    units = listed["ConsumedCapacity"]["CapacityUnits"] + sum(
+        entry["CapacityUnits"] for entry in fetched.get("ConsumedCapacity", []))
+    return events, units
+
+
+def history_from_table(client, transaction_id):
+    response = client.query(
+        TableName=TABLE,
+        KeyConditionExpression="transaction_id = :transaction_id",
+        ExpressionAttributeValues={":transaction_id": transaction_id},
+        ConsistentRead=True,
+        ReturnConsumedCapacity="TOTAL",
+    )
+    return response["Items"], response["ConsumedCapacity"]["CapacityUnits"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=3000)
+    parser.add_argument("--events", type=int, default=3)
+    parser.add_argument("--hours", type=int, default=6)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--reads", type=int, default=300)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    dynamodb = local_aws.LocalDynamoDB(latency_ms=args.dynamodb_latency_ms)
+    transaction_ids, legacy_wcu = build_legacy(dynamodb, args.transactions, args.events, args.hours)
+    records = args.transactions * args.events
+    print(f"old layout: {records} records, wcu/record={legacy_wcu:.2f}")
+
+    for segments in args.segments:
+        dynamodb.tables.pop(TABLE, None)
+        table = dynamodb.create_table(TABLE, audit_chain.HASH_KEY, audit_chain.RANGE_KEY, indexes=[
+            local_aws.LocalIndex(audit_chain.BUCKET_INDEX, audit_chain.BUCKET_ATTRIBUTE, audit_chain.RANGE_KEY),
+        ])
+        dynamodb.reset_counters()
+        summary = migrate_audit_table.migrate(dynamodb.client, LEGACY_TABLE, TABLE, segments)
+        assert summary["copied"] == records == len(table.items), summary
+        print(f"migrate segments={segments:<3} items/s={summary['items_per_second']:8.0f} "
+              f"seconds={summary['seconds']:6.2f} wcu/record={dynamodb.write_units / records:.2f}")
+
+    # Rerunning the copy rewrites the same keys
+    migrate_audit_table.migrate(dynamodb.client, LEGACY_TABLE, TABLE, args.segments[-1])
+    assert len(dynamodb.tables[TABLE].items) == records
+    end = BASE + timedelta(hours=args.hours)
+    sealed = audit_chain.seal_pending(dynamodb.client, TABLE, now=end, delay_seconds=0, max_buckets=args.hours + 1,
+                                      first_bucket=audit_chain.bucket_of(BASE))
+    report = audit_verifier.verify_range(dynamodb.client, TABLE, BASE, end)
+    print(f"sealed {len(sealed)} buckets; verify_range problems={len(report['problems'])} "
+          f"links_checked={report['links_checked']}")
+    assert not report["problems"], report["problems"][:5]
+
+    for label, read in (("gsi + batch get", history_from_gsi), ("base query", history_from_table)):
+        latencies, units, problems = [], 0.0, 0
+        dynamodb.reset_counters()
+        for transaction_id in transaction_ids[:args.reads]:
+            start = time.perf_counter()
+            events, read_units = read(dynamodb.client, transaction_id)
+            latencies.append((time.perf_counter() - start) * 1000)
+            units += read_units
+            assert len(events) == args.events
+            problems += len(audit_chain.check_chain(transaction_id, events)) if label == "base query" else 0
+        print(f"history {label:<16} calls={dynamodb.round_trips() / args.reads:.2f} "
+              f"rcu={units / args.reads:.2f} p50={statistics.median(latencies):6.2f}ms "
+              f"consistent={'no (GSI)' if label.startswith('gsi') else 'yes'} chain_problems={problems}")
+
+    # End to end through the lambda
+    aws = local_aws.install(local_aws.LocalAWS())
+    ledger, audit = aws.create_payment_tables()
+    with StubProcessor() as processor:
+        os.environ.update({
+            "DYNAMODB_LEDGER_TABLE_NAME": ledger,
+            "DYNAMODB_AUDIT_TABLE_NAME": audit,
+            "PROCESSOR_URL": processor.url,
+            "API_KEY": "bench",
+            "PREWARM_ON_INIT": "false",
+            "TRACE_ENABLED": "false",
+        })
+        import paymentledgeraudittrail
+        response = paymentledgeraudittrail.lambda_handler({"process_type": "sale", "amount": "10.00"}, None)
+        history = paymentledgeraudittrail.get_transaction_history(json.loads(response["body"])["transaction_id"])
+    print(f"get_transaction_history: ledger_rows={len(history['ledger'])} events={len(history['events'])} "
+          f"chain_problems={len(history['chain_problems'])}")
+    assert history["ledger"] and history["events"] and not history["chain_problems"], history
+
+
+if __name__ == "__main__":
+    main()
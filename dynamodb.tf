@@ -5,6 +5,10 @@ resource "aws_dynamodb_table" "payment_ledger" {
   hash_key     = "transaction_id"
   range_key    = "process_type"
 
+  # NEW_IMAGE stream feeds incremental backups (dynamodb_backup with mode "incremental")
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
+
   attribute {
     name = "transaction_id"
     type = "S"
@@ -31,22 +35,22 @@ resource "aws_dynamodb_table" "payment_ledger" {
   }
 
   attribute {
-    name = "status"
+    name = "status_shard"
     type = "S"
   }
 
   attribute {
-    name = "error_code"
+    name = "status_at"
     type = "S"
   }
 
   attribute {
-    name = "gateway_response"
+    name = "error_code"
     type = "S"
   }
 
   attribute {
-    name = "response_details"
+    name = "gateway_response"
     type = "S"
   }
 
@@ -65,11 +69,6 @@ resource "aws_dynamodb_table" "payment_ledger" {
     type = "S"
   }
 
-  attribute {
-    name = "expiration_time"
-    type = "N"
-  }
-
   global_secondary_index {
     name            = "payment_processor-index"
     hash_key        = "payment_processor"
@@ -84,11 +83,13 @@ resource "aws_dynamodb_table" "payment_ledger" {
     projection_type = "ALL"
   }
 
+  # Write-sharded by status, shard and day (ledger_repository.py), so no status is one hot index partition.
+  # Read with LedgerRepository.query_status, which queries every shard and day in range and merges by status_at.
   global_secondary_index {
-    name            = "status-index"
-    hash_key        = "status"
-    range_key       = "timestamp"
-    projection_type = "ALL"
+    name            = "status-shard-index"
+    hash_key        = "status_shard"
+    range_key       = "status_at"
+    projection_type = "KEYS_ONLY"
   }
 
   global_secondary_index {
@@ -105,12 +106,8 @@ resource "aws_dynamodb_table" "payment_ledger" {
     projection_type = "ALL"
   }
 
-  global_secondary_index {
-    name            = "response_details-index"
-    hash_key        = "response_details"
-    range_key       = "timestamp"
-    projection_type = "ALL"
-  }
+  # No response_details-index: response_details is a Map or Binary (payload_codec.py), and a String index
+  # key of another type would reject the write.
 
   global_secondary_index {
     name            = "transaction_origin-index"
@@ -152,13 +149,18 @@ resource "aws_dynamodb_table" "payment_ledger" {
   }
 }
 
-# payment_audit_trail
+# payment_audit_trail: the audit table before it was re-keyed, kept as the source for
+# scripts/migrate_audit_table.py. Nothing writes to it once the lambdas use payment_audit_trail_v2.
+# Its indexes are left as they were deployed.
 resource "aws_dynamodb_table" "payment_audit_trail" {
   name         = "${var.dynamodb_table_name}-AuditTrail"
   billing_mode = "PAY_PER_REQUEST"
   hash_key     = "audit_id"
   range_key    = "transaction_id"
 
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
+
   attribute {
     name = "audit_id"
     type = "S"
@@ -209,11 +211,6 @@ resource "aws_dynamodb_table" "payment_audit_trail" {
     type = "S"
   }
 
-  attribute {
-    name = "stage_name"
-    type = "S"
-  }
-
   global_secondary_index {
     name            = "transaction_id-index"
     hash_key        = "transaction_id"
@@ -281,3 +278,132 @@ resource "aws_dynamodb_table" "payment_audit_trail" {
     Name = "${var.dynamodb_table_name}-AuditTrail"
   }
 }
+
+# payment_audit_trail_v2: one partition per transaction, events in event_id (ULID) order, so a transaction's
+# history is a single strongly consistent Query on the table itself and needs no transaction_id GSI.
+# Checkpoints of the hash chain live in the CHECKPOINT partition.
+resource "aws_dynamodb_table" "payment_audit_trail_v2" {
+  name         = "${var.dynamodb_table_name}-AuditTrail-v2"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "transaction_id"
+  range_key    = "event_id"
+
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
+
+  attribute {
+    name = "transaction_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "event_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "timestamp"
+    type = "S"
+  }
+
+  attribute {
+    name = "action_type"
+    type = "S"
+  }
+
+  attribute {
+    name = "user_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "source_ip"
+    type = "S"
+  }
+
+  attribute {
+    name = "payment_result"
+    type = "S"
+  }
+
+  attribute {
+    name = "error_code"
+    type = "S"
+  }
+
+  attribute {
+    name = "PNR"
+    type = "S"
+  }
+
+  attribute {
+    name = "audit_bucket"
+    type = "S"
+  }
+
+  # The old table's indexes, less transaction_id-index (the table key serves it) and action_details-index
+  # (action_details is a Map or Binary, payload_codec.py, and a String index key of another type would reject
+  # the write)
+  global_secondary_index {
+    name            = "user_id-index"
+    hash_key        = "user_id"
+    range_key       = "action_type"
+    projection_type = "ALL"
+  }
+
+  global_secondary_index {
+    name            = "error_code-index"
+    hash_key        = "error_code"
+    range_key       = "timestamp"
+    projection_type = "ALL"
+  }
+
+  global_secondary_index {
+    name            = "payment_result-index"
+    hash_key        = "payment_result"
+    range_key       = "timestamp"
+    projection_type = "ALL"
+  }
+
+  global_secondary_index {
+    name            = "source_ip-index"
+    hash_key        = "source_ip"
+    range_key       = "timestamp"
+    projection_type = "ALL"
+  }
+
+  global_secondary_index {
+    name            = "PNR-index"
+    hash_key        = "PNR"
+    range_key       = "timestamp"
+    projection_type = "ALL"
+  }
+
+  # Hash-chained records by time bucket, in order, for Merkle checkpoints and range verification (audit_chain.py).
+  # audit_bucket is <hour>#<shard>, AUDIT_BUCKET_SHARDS partitions per hour, so no one partition takes every
+  # audit write. Sparse: checkpoint items carry no audit_bucket.
+  global_secondary_index {
+    name            = "bucket-index"
+    hash_key        = "audit_bucket"
+    range_key       = "event_id"
+    projection_type = "ALL" # The verifier recomputes each record's hash from every attribute
+  }
+
+  ttl {
+    attribute_name = "expiration_time"
+    enabled        = true
+  }
+
+  point_in_time_recovery {
+    enabled = true
+  }
+
+  server_side_encryption {
+    enabled     = true
+    kms_key_arn = aws_kms_key.dynamodb_key.arn
+  }
+
+  tags = {
+    Name = "${var.dynamodb_table_name}-AuditTrail-v2"
+  }
+}
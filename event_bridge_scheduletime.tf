@@ -16,3 +16,42 @@ resource "aws_lambda_permission" "allow_eventbridge" {
   principal     = "events.amazonaws.com"
   source_arn    = aws_cloudwatch_event_rule.monthly_backup_schedule.arn
 }
+
+resource "aws_cloudwatch_event_rule" "incremental_backup_schedule" {
+  name                = "incremental_backup_schedule"
+  schedule_expression = "rate(6 hours)" # Exports stream changes since the previous run
+}
+
+resource "aws_cloudwatch_event_target" "incremental_backup_lambda_target" {
+  rule      = aws_cloudwatch_event_rule.incremental_backup_schedule.name
+  target_id = "dynamodb_incremental_backup_target"
+  arn       = aws_lambda_function.dynamodb_backup.arn
+  input     = jsonencode({ mode = "incremental" })
+}
+
+resource "aws_lambda_permission" "allow_eventbridge_incremental" {
+  statement_id  = "AllowIncrementalExecutionFromEventBridge"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.dynamodb_backup.arn
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.incremental_backup_schedule.arn
+}
+
+resource "aws_cloudwatch_event_rule" "audit_checkpoint_schedule" {
+  name                = "audit_checkpoint_schedule"
+  schedule_expression = "rate(15 minutes)" # Seals each audit bucket soon after AUDIT_SEAL_DELAY_SECONDS
+}
+
+resource "aws_cloudwatch_event_target" "audit_checkpoint_lambda_target" {
+  rule      = aws_cloudwatch_event_rule.audit_checkpoint_schedule.name
+  target_id = "audit_checkpoint_target"
+  arn       = aws_lambda_function.paymentledgeraudittrail_audit_checkpoint.arn
+}
+
+resource "aws_lambda_permission" "allow_eventbridge_audit_checkpoint" {
+  statement_id  = "AllowAuditCheckpointExecutionFromEventBridge"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.paymentledgeraudittrail_audit_checkpoint.arn
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.audit_checkpoint_schedule.arn
+}
@@ -43,14 +43,21 @@ resource "aws_iam_role_policy" "paymentaudittrail_policy" {
         Action = [
           "dynamodb:PutItem",
           "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",
           "dynamodb:Query",
           "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem",
+          "dynamodb:BatchWriteItem",
           "dynamodb:Scan",
           "dynamodb:ExportTableToPointInTime",
           "dynamodb:DescribeContinuousBackups",
           "dynamodb:DescribeExport",
           "dynamodb:ListExports",
-          "dynamodb:DescribeTable"
+          "dynamodb:DescribeTable",
+          "dynamodb:DescribeStream",
+          "dynamodb:GetShardIterator",
+          "dynamodb:GetRecords",
+          "dynamodb:ListStreams"
         ]
         Resource = [
           "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/*"
@@ -66,7 +73,8 @@ resource "aws_iam_role_policy" "paymentaudittrail_policy" {
           "s3:ListBucket",
           "s3:DeleteObject",
           "s3:GetBucketLocation",
-          "s3:PutObjectAcl"
+          "s3:PutObjectAcl",
+          "s3:AbortMultipartUpload"
         ]
         Resource = [
           "arn:aws:s3:::${var.s3_backup_bucket_name}",
@@ -74,6 +82,32 @@ resource "aws_iam_role_policy" "paymentaudittrail_policy" {
         ]
       },
 
+      # Permissions for the payment request queue (SQS event source mapping)
+      {
+        Effect = "Allow"
+        Action = [
+          "sqs:ReceiveMessage",
+          "sqs:DeleteMessage",
+          "sqs:GetQueueAttributes",
+          "sqs:ChangeMessageVisibility"
+        ]
+        Resource = [
+          aws_sqs_queue.payment_requests.arn,
+          aws_sqs_queue.audit_spill.arn
+        ]
+      },
+
+      # Spilling audit entries the async audit writer could not write
+      {
+        Effect = "Allow"
+        Action = [
+          "sqs:SendMessage"
+        ]
+        Resource = [
+          aws_sqs_queue.audit_spill.arn
+        ]
+      },
+
       # CloudWatch Logs Permissions
       {
         Effect = "Allow"
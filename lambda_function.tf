@@ -8,11 +8,14 @@ resource "aws_lambda_function" "paymentledgeraudittrail" {
 
   environment {
     variables = {
-      DYNAMODB_LEDGER_TABLE_NAME = aws_dynamodb_table.payment_ledger.name
-      DYNAMODB_AUDIT_TABLE_NAME  = aws_dynamodb_table.payment_audit_trail.name
-      KMS_KEY_ARN                = aws_kms_alias.ledger_audit_key_alias.arn
-      PROCESSOR_URL              = var.paynuity_api_url
-      API_KEY                    = var.paynuity_api_key
+      DYNAMODB_LEDGER_TABLE_NAME    = aws_dynamodb_table.payment_ledger.name
+      DYNAMODB_AUDIT_TABLE_NAME     = aws_dynamodb_table.payment_audit_trail_v2.name
+      KMS_KEY_ARN                   = aws_kms_alias.ledger_audit_key_alias.arn
+      PROCESSOR_URL                 = var.paynuity_api_url
+      API_KEY                       = var.paynuity_api_key
+      AUDIT_SPILL_QUEUE_URL         = aws_sqs_queue.audit_spill.url
+      # Just over the function timeout below, so a crashed attempt locks its key out only briefly
+      IDEMPOTENCY_IN_FLIGHT_SECONDS = 330
     }
   }
 
@@ -24,6 +27,77 @@ resource "aws_lambda_function" "paymentledgeraudittrail" {
   # }
 }
 
+# SQS consumer for payment requests; same package as the synchronous handler
+resource "aws_lambda_function" "paymentledgeraudittrail_sqs" {
+  function_name    = "${var.dynamodb_table_name}-ledgeraudittrail-sqs"
+  role             = aws_iam_role.paymentaudittrail_role.arn
+  handler          = "paymentledgeraudittrail.sqs_handler"
+  runtime          = "python3.8"
+  filename         = "lambda_function/paymentledgeraudittrail.zip"
+  source_code_hash = filebase64sha256("lambda_function/paymentledgeraudittrail.zip")
+
+  environment {
+    variables = {
+      DYNAMODB_LEDGER_TABLE_NAME    = aws_dynamodb_table.payment_ledger.name
+      DYNAMODB_AUDIT_TABLE_NAME     = aws_dynamodb_table.payment_audit_trail_v2.name
+      KMS_KEY_ARN                   = aws_kms_alias.ledger_audit_key_alias.arn
+      PROCESSOR_URL                 = var.paynuity_api_url
+      API_KEY                       = var.paynuity_api_key
+      AUDIT_SPILL_QUEUE_URL         = aws_sqs_queue.audit_spill.url
+      # A claim must outlive the visibility timeout, or a redelivered message could take over its key
+      IDEMPOTENCY_IN_FLIGHT_SECONDS = aws_sqs_queue.payment_requests.visibility_timeout_seconds
+    }
+  }
+
+  timeout = 300
+}
+
+# Seals closed audit buckets with Merkle checkpoints; same package as the payment handlers
+resource "aws_lambda_function" "paymentledgeraudittrail_audit_checkpoint" {
+  function_name    = "${var.dynamodb_table_name}-ledgeraudittrail-audit-checkpoint"
+  role             = aws_iam_role.paymentaudittrail_role.arn
+  handler          = "paymentledgeraudittrail.audit_checkpoint_handler"
+  runtime          = "python3.8"
+  filename         = "lambda_function/paymentledgeraudittrail.zip"
+  source_code_hash = filebase64sha256("lambda_function/paymentledgeraudittrail.zip")
+
+  environment {
+    variables = {
+      DYNAMODB_LEDGER_TABLE_NAME = aws_dynamodb_table.payment_ledger.name
+      DYNAMODB_AUDIT_TABLE_NAME  = aws_dynamodb_table.payment_audit_trail_v2.name
+      KMS_KEY_ARN                = aws_kms_alias.ledger_audit_key_alias.arn
+      PROCESSOR_URL              = var.paynuity_api_url
+      API_KEY                    = var.paynuity_api_key
+      PREWARM_ON_INIT            = "false" # Never calls the processor
+    }
+  }
+
+  timeout = 300
+}
+
+# Replays audit entries spilled to the audit spill queue; same package as the payment handlers
+resource "aws_lambda_function" "paymentledgeraudittrail_audit_spill" {
+  function_name    = "${var.dynamodb_table_name}-ledgeraudittrail-audit-spill"
+  role             = aws_iam_role.paymentaudittrail_role.arn
+  handler          = "paymentledgeraudittrail.audit_spill_handler"
+  runtime          = "python3.8"
+  filename         = "lambda_function/paymentledgeraudittrail.zip"
+  source_code_hash = filebase64sha256("lambda_function/paymentledgeraudittrail.zip")
+
+  environment {
+    variables = {
+      DYNAMODB_LEDGER_TABLE_NAME = aws_dynamodb_table.payment_ledger.name
+      DYNAMODB_AUDIT_TABLE_NAME  = aws_dynamodb_table.payment_audit_trail_v2.name
+      KMS_KEY_ARN                = aws_kms_alias.ledger_audit_key_alias.arn
+      PROCESSOR_URL              = var.paynuity_api_url
+      API_KEY                    = var.paynuity_api_key
+      PREWARM_ON_INIT            = "false" # Never calls the processor
+    }
+  }
+
+  timeout = 60
+}
+
 resource "aws_lambda_function" "dynamodb_backup" {
   filename      = "lambda_function/dynamodb_backup.zip"
   function_name = "LedgerAuditTrail-dynamodb_backup"
@@ -34,12 +108,23 @@ resource "aws_lambda_function" "dynamodb_backup" {
   environment {
     variables = {
       DYNAMODB_LEDGER_TABLE_NAME = aws_dynamodb_table.payment_ledger.name
-      DYNAMODB_AUDIT_TABLE_NAME  = aws_dynamodb_table.payment_audit_trail.name
+      DYNAMODB_AUDIT_TABLE_NAME  = aws_dynamodb_table.payment_audit_trail_v2.name
       S3_BACKUP_BUCKET_NAME      = aws_s3_bucket.dynamodb_backup.id
+      SCAN_TOTAL_SEGMENTS        = 8
+      BACKUP_PART_SIZE_MB        = 8
+      BACKUP_UPLOAD_CONCURRENCY  = 4
+      BACKUP_FORMAT              = "ndjson.gz"
+      # Monthly backups use native PITR exports; "full" scans instead
+      BACKUP_MODE                = "export"
+      # Incremental runs every 6 hours; merge the deltas into a new full snapshot weekly
+      BACKUP_COMPACT_EVERY       = 28
+      # Keep multipart part buffers mmap-backed so glibc returns them to the OS once uploaded
+      MALLOC_MMAP_THRESHOLD_     = 131072
     }
   }
 
-  timeout = 300
+  # Long enough for most exports to finish while polling; longer ones are resumed from the manifest
+  timeout = 900
 
   # vpc_config {
   #   subnet_ids         = [data.aws_subnet.private_subnet.id]
@@ -47,3 +132,25 @@ resource "aws_lambda_function" "dynamodb_backup" {
   # }
 }
 
+
+# Restores a backup object (or the latest incremental chain) into a table; invoked on demand
+resource "aws_lambda_function" "dynamodb_restore" {
+  filename      = "lambda_function/dynamodb_backup.zip"
+  function_name = "LedgerAuditTrail-dynamodb_restore"
+  role          = aws_iam_role.paymentaudittrail_role.arn
+  handler       = "dynamodb_restore.lambda_handler"
+  runtime       = "python3.9"
+
+  environment {
+    variables = {
+      S3_BACKUP_BUCKET_NAME  = aws_s3_bucket.dynamodb_backup.id
+      RESTORE_WORKERS        = 8
+      # WCU/s ceiling for the load; 0 lets the table's own throttling set the pace
+      RESTORE_MAX_WRITE_RATE = 0
+      RESTORE_MAX_ATTEMPTS   = 10
+    }
+  }
+
+  timeout     = 900
+  memory_size = 1024
+}
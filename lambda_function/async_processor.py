@@ -0,0 +1,56 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# Initialize Logging
+logger = logging.getLogger()
+
+# Blocking processor calls are offloaded to this pool; it lives as long as the warm container
+MAX_THREADS = int(os.getenv("ASYNC_PROCESSOR_THREADS", os.getenv("PROCESSOR_POOL_SIZE", "10")))
+
+_executor = None
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+# Helper Function: Shared thread-offload executor, created on first use
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_THREADS, thread_name_prefix="processor")
+    return _executor
+
+
+# Run one blocking call off the event loop, bounded by semaphore and cut off at deadline seconds
+async def run_call(call, semaphore, deadline):
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(_get_executor(), call), timeout=deadline)
+        except asyncio.TimeoutError:
+            # The worker thread finishes on its own (processor calls carry their own socket timeouts);
+            # the caller stops waiting for it here.
+            raise DeadlineExceeded(f"Processor call exceeded its {deadline}s deadline") from None
+
+
+# Run all calls with at most max_concurrency in flight; returns (result, error) pairs in input order
+async def gather_calls(calls, max_concurrency, deadline):
+    semaphore = asyncio.Semaphore(max_concurrency)
+    outcomes = await asyncio.gather(
+        *(run_call(call, semaphore, deadline) for call in calls),
+        return_exceptions=True,
+    )
+    return [
+        (None, outcome) if isinstance(outcome, BaseException) else (outcome, None)
+        for outcome in outcomes
+    ]
+
+
+# Synchronous entry point for handlers that are not themselves async
+def run_calls(calls, max_concurrency, deadline):
+    if not calls:
+        return []
+    return asyncio.run(gather_calls(calls, max_concurrency, deadline))
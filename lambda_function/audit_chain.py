@@ -0,0 +1,336 @@
+import os
+import json
+import base64
+import struct
+import hashlib
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, Context
+import event_ids
+
+# Initialize Logging
+logger = logging.getLogger()
+
+# Audit Chain Settings
+AUDIT_BUCKET_SECONDS = int(os.getenv("AUDIT_BUCKET_SECONDS", "3600"))
+AUDIT_CHUNK_LEAVES = int(os.getenv("AUDIT_CHUNK_LEAVES", "256"))
+# Shards per bucket in bucket-index; may be raised but never lowered (see bucket_key)
+AUDIT_BUCKET_SHARDS = int(os.getenv("AUDIT_BUCKET_SHARDS", "8"))
+
+# Audit table key schema (dynamodb.tf): hash key transaction_id, range key event_id (event_ids.py)
+HASH_KEY = "transaction_id"
+RANGE_KEY = "event_id"
+
+# Sparse audit-table GSI (dynamodb.tf): one partition per time bucket and shard, records in event_id order
+BUCKET_INDEX = "bucket-index"
+BUCKET_ATTRIBUTE = "audit_bucket"
+
+# Checkpoints live in the audit table in a partition of their own, keyed by bucket, outside bucket-index
+CHECKPOINT_PARTITION = "CHECKPOINT"
+CHECKPOINT_HEAD_ID = "head"
+
+BUCKET_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+EMPTY_ROOT = hashlib.sha256(b"").digest()
+
+# DynamoDB numbers carry up to 38 significant digits; normalizing at that precision never rounds
+_NUMBER_CONTEXT = Context(prec=38)
+
+
+# Helper Function: An attribute value as it hashes, the same whether it was just built or read back from DynamoDB
+# (which returns every number as Decimal, without trailing zeros, and Binary wrapped in boto3's Binary)
+def _canonical(value):
+    if isinstance(value, dict):
+        return {key: _canonical(entry) for key, entry in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(entry) for entry in value]
+    if isinstance(value, (set, frozenset)):
+        return {"$set": sorted(json.dumps(_canonical(entry), sort_keys=True) for entry in value)}
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, Decimal)):
+        return {"$number": str(Decimal(value).normalize(_NUMBER_CONTEXT))}
+    raw = getattr(value, "value", value)
+    if isinstance(raw, (bytes, bytearray)):
+        return {"$binary": base64.b64encode(bytes(raw)).decode("ascii")}
+    raise TypeError(f"Cannot hash attribute value of type {type(value).__name__}")
+
+
+# Helper Function: Hash of an audit record: every attribute except record_hash itself, so changing any
+# stored field (or the prev_hash link) changes it. The event_id key is left out so a record keeps its hash
+# when it is re-keyed (scripts/migrate_audit_table.py); verifiers bind it to the hashed timestamp instead.
+# audit_bucket is left out so a record can be filed again (file_record); checkpoints cover where it is filed.
+def record_hash(item):
+    fields = {key: value for key, value in item.items() if key not in ("record_hash", RANGE_KEY, BUCKET_ATTRIBUTE)}
+    canonical = json.dumps(_canonical(fields), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).digest()
+
+
+# Helper Function: prev_hash of the first record in a transaction's chain
+def genesis_hash(transaction_id):
+    return hashlib.sha256(f"genesis:{transaction_id}".encode("utf-8")).digest()
+
+
+# Helper Function: bytes of a hash attribute, plain or wrapped in boto3's Binary
+def hash_bytes(value):
+    return bytes(getattr(value, "value", value))
+
+
+# Helper Function: Name of the time bucket a moment falls in, e.g. 2026-10-17T13:00:00Z
+def bucket_of(moment, bucket_seconds=AUDIT_BUCKET_SECONDS):
+    epoch = int(moment.timestamp()) // bucket_seconds * bucket_seconds
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(BUCKET_FORMAT)
+
+
+# Helper Function: Shard of a record's bucket, from its transaction_id
+def shard_of(transaction_id, shards=AUDIT_BUCKET_SHARDS):
+    return zlib.crc32(str(transaction_id).encode("utf-8")) % shards
+
+
+# Helper Function: bucket-index hash key of one shard of a bucket, e.g. 2026-10-17T13:00:00Z#03. Each key is one
+# index partition (about 1,000 writes per second), so a bucket takes `shards` times that. Readers fan out over
+# the shard count a checkpoint recorded, so raising it is safe; lowering it would hide the higher shards.
+def bucket_key(bucket, shard):
+    return f"{bucket}#{shard:02d}"
+
+
+# Helper Function: The bucket a bucket-index hash key belongs to (keys written before sharding are the bucket)
+def bucket_of_key(key):
+    return key.split("#", 1)[0]
+
+
+# Helper Function: File a record (in place) under the bucket-index shard of the bucket `moment` falls in.
+# Records are filed as they are linked, and spilled records again when they are replayed, at the time of the
+# replay: a bucket is only sealed once it has been closed for a while, so a late record never lands in a bucket
+# that may already be sealed.
+def file_record(item, moment, bucket_seconds=AUDIT_BUCKET_SECONDS, shards=AUDIT_BUCKET_SHARDS):
+    item[BUCKET_ATTRIBUTE] = bucket_key(bucket_of(moment, bucket_seconds), shard_of(item[HASH_KEY], shards))
+    return item
+
+
+# Helper Function: File a replayed record under the bucket open now; items that are not chained audit records
+# are left alone
+def refile(item):
+    if BUCKET_ATTRIBUTE in item:
+        file_record(item, datetime.now(timezone.utc))
+    return item
+
+
+# Helper Function: Start of a bucket, as an aware datetime
+def bucket_start(bucket):
+    return datetime.strptime(bucket, BUCKET_FORMAT).replace(tzinfo=timezone.utc)
+
+
+# Helper Function: The bucket after this one
+def next_bucket(bucket, bucket_seconds=AUDIT_BUCKET_SECONDS):
+    return (bucket_start(bucket) + timedelta(seconds=bucket_seconds)).strftime(BUCKET_FORMAT)
+
+
+# Helper Function: The bucket before this one
+def previous_bucket(bucket, bucket_seconds=AUDIT_BUCKET_SECONDS):
+    return (bucket_start(bucket) - timedelta(seconds=bucket_seconds)).strftime(BUCKET_FORMAT)
+
+
+# Helper Function: Merkle root of a list of hashes. Inner nodes are sha256(0x01 + left + right); an odd node
+# out is carried up a level unchanged. An empty list has EMPTY_ROOT.
+def merkle_root(hashes):
+    level = list(hashes)
+    if not level:
+        return EMPTY_ROOT
+    while len(level) > 1:
+        paired = [hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+# Helper Function: Hash binding a checkpoint to its bucket, its root and the checkpoint before it
+def checkpoint_hash(prev_checkpoint_hash, bucket, root, leaf_count):
+    return hashlib.sha256(prev_checkpoint_hash + bucket.encode("utf-8") + root + struct.pack(">Q", leaf_count)).digest()
+
+
+# Helper Function: Key of a bucket's checkpoint item
+def checkpoint_key(bucket):
+    return {HASH_KEY: CHECKPOINT_PARTITION, RANGE_KEY: bucket}
+
+
+# Helper Function: Key of the item tracking the newest checkpoint (sorts after every bucket name)
+def head_key():
+    return {HASH_KEY: CHECKPOINT_PARTITION, RANGE_KEY: CHECKPOINT_HEAD_ID}
+
+
+# Helper Function: Whether an audit record's event_id was minted at its timestamp's millisecond
+def event_id_matches(item):
+    moment = datetime.fromisoformat(item["timestamp"])
+    return event_ids.event_id_millis(item[RANGE_KEY]) == event_ids.to_millis(moment)
+
+
+# Helper Function: Check a transaction's full audit history, in event_id order, as one chain: each record's
+# hash and event_id, and each link. Returns a list of problems, empty when the chain verifies.
+def check_chain(transaction_id, items):
+    problems, prev_hash, seq = [], genesis_hash(transaction_id), 0
+    for item in items:
+        if "chain_seq" not in item:
+            # Written before audit records were chained
+            continue
+        seq += 1
+        if int(item["chain_seq"]) != seq:
+            problems.append(f"event {item[RANGE_KEY]}: chain position {item['chain_seq']}, expected {seq}")
+        if record_hash(item) != hash_bytes(item["record_hash"]):
+            problems.append(f"event {item[RANGE_KEY]}: contents do not match record_hash")
+        if not event_id_matches(item):
+            problems.append(f"event {item[RANGE_KEY]}: event_id does not match timestamp")
+        if hash_bytes(item["prev_hash"]) != prev_hash:
+            problems.append(f"event {item[RANGE_KEY]}: chain broken at position {seq}")
+        prev_hash = hash_bytes(item["record_hash"])
+    return problems
+
+
+# Links audit records into one hash chain per transaction as they are built: each record carries chain_seq,
+# prev_hash (the previous record's record_hash, or the transaction's genesis hash) and its own record_hash,
+# plus the bucket-index key that files it in a time bucket. The head of recently written chains is cached,
+# so only a record continuing a chain started in another container needs head_loader (one lookup).
+class AuditChain:
+    def __init__(self, bucket_seconds=AUDIT_BUCKET_SECONDS, cache_size=1024, head_loader=None,
+                 shards=AUDIT_BUCKET_SHARDS):
+        self.bucket_seconds = bucket_seconds
+        self.shards = shards
+        self.cache_size = cache_size
+        self.head_loader = head_loader
+        self._heads = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Add the chain attributes to item (which must have transaction_id, event_id and timestamp) in place.
+    # new_chain says the transaction has no audit records yet, so no lookup is needed.
+    def link(self, item, moment, new_chain=False):
+        transaction_id = item["transaction_id"]
+        with self._lock:
+            head = self._heads.pop(transaction_id, None)
+        if head is None and not new_chain and self.head_loader is not None:
+            head = self.head_loader(transaction_id)
+        seq, prev_hash = head if head is not None else (0, genesis_hash(transaction_id))
+        item["chain_seq"] = seq + 1
+        item["prev_hash"] = prev_hash
+        file_record(item, moment, self.bucket_seconds, self.shards)
+        item["record_hash"] = record_hash(item)
+        with self._lock:
+            self._heads[transaction_id] = (seq + 1, item["record_hash"])
+            while len(self._heads) > self.cache_size:
+                self._heads.popitem(last=False)
+        return item
+
+    # Drop a cached head whose record was never written, so the next record is linked to what is stored
+    def forget(self, transaction_id):
+        with self._lock:
+            self._heads.pop(transaction_id, None)
+
+
+# Helper Function: Stream one bucket-index partition (bucket_key) in event_id order, from start_event_id on,
+# a page at a time
+def iter_bucket(client, table_name, partition, start_event_id=None, limit=None):
+    params = {
+        "TableName": table_name,
+        "IndexName": BUCKET_INDEX,
+        "KeyConditionExpression": "#bucket = :bucket",
+        "ExpressionAttributeNames": {"#bucket": BUCKET_ATTRIBUTE},
+        "ExpressionAttributeValues": {":bucket": partition},
+    }
+    if start_event_id is not None:
+        params["KeyConditionExpression"] += " AND event_id >= :start"
+        params["ExpressionAttributeValues"][":start"] = start_event_id
+    returned = 0
+    while True:
+        if limit is not None:
+            params["Limit"] = limit - returned
+        response = client.query(**params)
+        for item in response.get("Items", []):
+            yield item
+            returned += 1
+        if "LastEvaluatedKey" not in response or (limit is not None and returned >= limit):
+            return
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+# Helper Function: Checkpoint for a bucket, streaming each shard's records in turn: the Merkle root over chunk
+# roots, where each chunk root covers AUDIT_CHUNK_LEAVES consecutive record hashes of one shard. Chunk roots (shard
+# by shard), the event_id each chunk starts at and each shard's record count are stored too, so a verifier can
+# check any chunk on its own.
+def build_checkpoint(client, table_name, bucket, prev_checkpoint_hash, chunk_leaves=AUDIT_CHUNK_LEAVES,
+                     shards=AUDIT_BUCKET_SHARDS):
+    chunk_roots, chunk_starts, shard_leaf_counts = [], [], []
+    for shard in range(shards):
+        starts, leaves, leaf_count = [], [], 0
+        for item in iter_bucket(client, table_name, bucket_key(bucket, shard)):
+            leaf = record_hash(item)
+            if leaf != hash_bytes(item["record_hash"]):
+                logger.error(f"Audit record {item[RANGE_KEY]} does not match its record_hash; "
+                             f"sealing its current contents")
+            if not leaves:
+                starts.append(item[RANGE_KEY])
+            leaves.append(leaf)
+            leaf_count += 1
+            if len(leaves) == chunk_leaves:
+                chunk_roots.append(merkle_root(leaves))
+                leaves = []
+        if leaves:
+            chunk_roots.append(merkle_root(leaves))
+        chunk_starts.append(starts)
+        shard_leaf_counts.append(leaf_count)
+    root = merkle_root(chunk_roots)
+    leaf_count = sum(shard_leaf_counts)
+    return {
+        **checkpoint_key(bucket),
+        "root": root,
+        "leaf_count": leaf_count,
+        "shard_leaf_counts": shard_leaf_counts,
+        "chunk_leaves": chunk_leaves,
+        "chunk_roots": b"".join(chunk_roots),
+        "chunk_starts": chunk_starts,
+        "prev_checkpoint_hash": prev_checkpoint_hash,
+        "checkpoint_hash": checkpoint_hash(prev_checkpoint_hash, bucket, root, leaf_count),
+        "sealed_at": str(datetime.now(timezone.utc)),
+    }
+
+
+# Seal every bucket that closed at least delay_seconds ago and has no checkpoint yet, oldest first, up to
+# max_buckets per call, reading each of the bucket's `shards` bucket-index partitions. Each checkpoint and the
+# move of the checkpoint head are one transaction conditioned on the head, so concurrent sealers cannot fork the
+# checkpoint chain. Returns the buckets sealed.
+def seal_pending(client, table_name, now=None, delay_seconds=900, max_buckets=48, first_bucket=None,
+                 bucket_seconds=AUDIT_BUCKET_SECONDS, shards=AUDIT_BUCKET_SHARDS):
+    now = now or datetime.now(timezone.utc)
+    last_closed = bucket_of(now - timedelta(seconds=delay_seconds + bucket_seconds), bucket_seconds)
+    head = client.get_item(TableName=table_name, Key=head_key(), ConsistentRead=True).get("Item")
+    if head is None:
+        # The first checkpoint starts the chain at first_bucket, or the latest closed bucket; older records
+        # stay unsealed
+        bucket, prev_hash = first_bucket or last_closed, EMPTY_ROOT
+    else:
+        bucket, prev_hash = next_bucket(head["last_bucket"], bucket_seconds), hash_bytes(head["checkpoint_hash"])
+
+    sealed = []
+    while bucket <= last_closed and len(sealed) < max_buckets:
+        checkpoint = build_checkpoint(client, table_name, bucket, prev_hash, shards=shards)
+        head_update = {
+            "TableName": table_name,
+            "Key": head_key(),
+            "UpdateExpression": "SET last_bucket = :bucket, checkpoint_hash = :hash",
+            "ExpressionAttributeValues": {":bucket": bucket, ":hash": checkpoint["checkpoint_hash"]},
+        }
+        if head is None and not sealed:
+            head_update["ConditionExpression"] = "attribute_not_exists(last_bucket)"
+        else:
+            head_update["ConditionExpression"] = "last_bucket = :previous"
+            head_update["ExpressionAttributeValues"][":previous"] = sealed[-1] if sealed else head["last_bucket"]
+        client.transact_write_items(TransactItems=[
+            {"Put": {"TableName": table_name, "Item": checkpoint, "ConditionExpression": "attribute_not_exists(event_id)"}},
+            {"Update": head_update},
+        ])
+        logger.info(f"Sealed audit bucket {bucket}: {checkpoint['leaf_count']} records")
+        sealed.append(bucket)
+        prev_hash = checkpoint["checkpoint_hash"]
+        bucket = next_bucket(bucket, bucket_seconds)
+    return sealed
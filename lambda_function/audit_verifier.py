@@ -0,0 +1,177 @@
+from datetime import timezone
+import audit_chain
+import event_ids
+from audit_chain import RANGE_KEY, hash_bytes
+
+
+# Helper Function: Checkpoints of the buckets from first to last, with one consistent Query on the checkpoint
+# partition; returns {bucket: checkpoint}
+def query_checkpoints(client, table_name, first, last):
+    params = {
+        "TableName": table_name,
+        "KeyConditionExpression": "transaction_id = :partition AND event_id BETWEEN :first AND :last",
+        "ExpressionAttributeValues": {":partition": audit_chain.CHECKPOINT_PARTITION, ":first": first, ":last": last},
+        "ConsistentRead": True,
+    }
+    checkpoints = {}
+    while True:
+        response = client.query(**params)
+        for item in response.get("Items", []):
+            checkpoints[item[RANGE_KEY]] = item
+        if "LastEvaluatedKey" not in response:
+            return checkpoints
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+# Checks the audit trail between start and end (aware datetimes) without scanning the table. Reads only:
+# - the checkpoints of the buckets in range and the one before, checking each hash and the links between them;
+# - for sealed buckets, in each shard the checkpoint covers, the chunks of records that overlap the range,
+#   checking each record's hash and each chunk's root against the checkpoint (the stored roots of the other
+#   chunks stand in for their records);
+# - for buckets not sealed yet, every shard's records, checking record hashes only.
+# Hash-chain links between records read are checked too. Spilled records replayed late are filed under the
+# bucket open at replay (audit_chain.file_record), so they are read with that bucket. Returns a report;
+# report["problems"] is empty when the range verifies.
+def verify_range(client, table_name, start, end, bucket_seconds=audit_chain.AUDIT_BUCKET_SECONDS,
+                 shards=audit_chain.AUDIT_BUCKET_SHARDS):
+    start, end = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+    start_key, end_key = event_ids.event_id_floor(start), event_ids.event_id_floor(end)
+    buckets = []
+    bucket = audit_chain.bucket_of(start, bucket_seconds)
+    while audit_chain.bucket_start(bucket) < end:
+        buckets.append(bucket)
+        bucket = audit_chain.next_bucket(bucket, bucket_seconds)
+
+    report = {"buckets": len(buckets), "sealed": 0, "unsealed": 0, "chunks_read": 0, "records_read": 0,
+              "records_in_range": 0, "links_checked": 0, "links_outside_range": 0, "problems": []}
+    problems = report["problems"]
+
+    head = client.get_item(TableName=table_name, Key=audit_chain.head_key(), ConsistentRead=True).get("Item")
+    last_sealed = head["last_bucket"] if head else ""
+    previous_bucket = audit_chain.previous_bucket(buckets[0], bucket_seconds) if buckets else None
+    wanted = [bucket for bucket in [previous_bucket] + buckets if bucket and bucket <= last_sealed]
+    checkpoints = query_checkpoints(client, table_name, wanted[0], wanted[-1]) if wanted else {}
+
+    records = {}
+    prev_checkpoint = checkpoints.get(previous_bucket)
+    for bucket in buckets:
+        if bucket > last_sealed:
+            report["unsealed"] += 1
+            for shard in range(shards):
+                for item in audit_chain.iter_bucket(client, table_name, audit_chain.bucket_key(bucket, shard)):
+                    report["records_read"] += 1
+                    _check_record(item, start_key, end_key, records, report)
+            continue
+
+        report["sealed"] += 1
+        checkpoint = checkpoints.get(bucket)
+        if checkpoint is None:
+            problems.append(f"{bucket}: checkpoint missing")
+            prev_checkpoint = None
+            continue
+        _check_checkpoint(bucket, checkpoint, prev_checkpoint, problems)
+        if bucket == last_sealed and hash_bytes(head["checkpoint_hash"]) != hash_bytes(checkpoint["checkpoint_hash"]):
+            problems.append(f"{bucket}: checkpoint does not match the checkpoint head")
+        prev_checkpoint = checkpoint
+
+        shard_leaf_counts = [int(count) for count in checkpoint["shard_leaf_counts"]]
+        if sum(shard_leaf_counts) != int(checkpoint["leaf_count"]) or \
+                len(shard_leaf_counts) != len(checkpoint["chunk_starts"]):
+            problems.append(f"{bucket}: shard record counts do not match the checkpoint")
+            continue
+        roots = hash_bytes(checkpoint["chunk_roots"])
+        first_chunk = 0
+        for shard, (starts, leaf_count) in enumerate(zip(checkpoint["chunk_starts"], shard_leaf_counts)):
+            _check_shard(client, table_name, bucket, shard, checkpoint, starts, leaf_count,
+                         roots[first_chunk * 32:(first_chunk + len(starts)) * 32], start_key, end_key, records, report)
+            first_chunk += len(starts)
+
+    _check_links(records, report)
+    return report
+
+
+# Helper Function: Check one shard of a sealed bucket: read the chunks of its records that overlap the range and
+# compare each chunk's root with the checkpoint's (roots holds the shard's chunk roots)
+def _check_shard(client, table_name, bucket, shard, checkpoint, starts, leaf_count, roots, start_key, end_key,
+                 records, report):
+    partition = audit_chain.bucket_key(bucket, shard)
+    if not starts:
+        # Sealed empty: any record there now was added later
+        if next(audit_chain.iter_bucket(client, table_name, partition, limit=1), None) is not None:
+            report["problems"].append(f"{bucket} shard {shard}: records added after the bucket was sealed")
+        return
+    chunk_leaves = int(checkpoint["chunk_leaves"])
+    # The chunks overlapping the range are consecutive, so they are read with one (paginated) query
+    selected = [index for index, chunk_start in enumerate(starts)
+                if chunk_start < end_key and (index + 1 == len(starts) or starts[index + 1] > start_key)]
+    if not selected:
+        return
+    first, last = selected[0], selected[-1]
+    sizes = [min(chunk_leaves, leaf_count - index * chunk_leaves) for index in selected]
+    # Reading the first chunk from the start of the shard, and the last one a record past its end,
+    # shows records added before or after the sealed ones too
+    at_end = last == len(starts) - 1
+    items = list(audit_chain.iter_bucket(
+        client, table_name, partition,
+        start_event_id=None if first == 0 else starts[first],
+        limit=sum(sizes) + (1 if at_end else 0),
+    ))
+    report["chunks_read"] += len(selected)
+    report["records_read"] += len(items)
+    leaves = [_check_record(item, start_key, end_key, records, report) for item in items]
+    offset = 0
+    for index, size in zip(selected, sizes):
+        chunk = leaves[offset:offset + size]
+        offset += size
+        if len(chunk) != size or audit_chain.merkle_root(chunk) != roots[index * 32:(index + 1) * 32]:
+            report["problems"].append(f"{bucket} shard {shard}: chunk {index} does not match its checkpoint "
+                                      f"(records added, removed, reordered or altered since sealing)")
+    if at_end and len(leaves) > offset:
+        report["problems"].append(f"{bucket} shard {shard}: records added after the bucket was sealed")
+
+
+# Helper Function: Recompute one record's hash and check its event_id, remember it for the link check and count
+# it if it is in range; returns the recomputed hash (the Merkle leaf)
+def _check_record(item, start_key, end_key, records, report):
+    leaf = audit_chain.record_hash(item)
+    if leaf != hash_bytes(item["record_hash"]):
+        report["problems"].append(f"audit record {item[RANGE_KEY]}: contents do not match record_hash")
+    if not audit_chain.event_id_matches(item):
+        report["problems"].append(f"audit record {item[RANGE_KEY]}: event_id does not match timestamp")
+    key = (item["transaction_id"], int(item["chain_seq"]))
+    if key in records and records[key][0] != leaf:
+        report["problems"].append(f"transaction {key[0]}: two records claim chain position {key[1]}")
+    records[key] = (leaf, hash_bytes(item["prev_hash"]))
+    if start_key <= item[RANGE_KEY] < end_key:
+        report["records_in_range"] += 1
+    return leaf
+
+
+# Helper Function: A checkpoint's own hash, its root over the chunk roots and its link to the checkpoint before
+def _check_checkpoint(bucket, checkpoint, prev_checkpoint, problems):
+    roots = hash_bytes(checkpoint["chunk_roots"])
+    root = hash_bytes(checkpoint["root"])
+    prev_hash = hash_bytes(checkpoint["prev_checkpoint_hash"])
+    if audit_chain.merkle_root([roots[i:i + 32] for i in range(0, len(roots), 32)]) != root:
+        problems.append(f"{bucket}: chunk roots do not match the checkpoint root")
+    if audit_chain.checkpoint_hash(prev_hash, bucket, root, int(checkpoint["leaf_count"])) != \
+            hash_bytes(checkpoint["checkpoint_hash"]):
+        problems.append(f"{bucket}: checkpoint hash does not match its contents")
+    if prev_checkpoint is not None and hash_bytes(prev_checkpoint["checkpoint_hash"]) != prev_hash:
+        problems.append(f"{bucket}: checkpoint does not link to the checkpoint before it")
+
+
+# Helper Function: Every record read must link to the previous record of its transaction; links to records
+# outside what was read are counted, not checked
+def _check_links(records, report):
+    for (transaction_id, seq), (_, prev_hash) in records.items():
+        if seq == 1:
+            expected = audit_chain.genesis_hash(transaction_id)
+        elif (transaction_id, seq - 1) in records:
+            expected = records[transaction_id, seq - 1][0]
+        else:
+            report["links_outside_range"] += 1
+            continue
+        report["links_checked"] += 1
+        if prev_hash != expected:
+            report["problems"].append(f"transaction {transaction_id}: chain broken at position {seq}")
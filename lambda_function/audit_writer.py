@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import atexit
+import base64
+import signal
+import time
+import logging
+import threading
+from collections import deque
+from decimal import Decimal
+import dynamodb_batch
+import audit_chain
+
+# Initialize Logging
+logger = logging.getLogger()
+
+# Audit Writer Settings
+AUDIT_QUEUE_MAX = int(os.getenv("AUDIT_QUEUE_MAX", "1000"))
+AUDIT_SPILL_PATH = os.getenv("AUDIT_SPILL_PATH", "/tmp/audit-spill.jsonl")
+
+# Spilled items are JSON, with the DynamoDB types JSON lacks tagged: {"$binary": base64} for binary
+# attributes (compressed details) and {"$number": "..."} for numbers, so every digit survives
+BINARY_KEY = "$binary"
+NUMBER_KEY = "$number"
+# SendMessageBatch takes at most 10 messages
+SQS_BATCH_LIMIT = 10
+
+
+# Helper Function: Tag the values of an item that JSON cannot carry as they are
+def _tag(value):
+    if isinstance(value, dict):
+        return {key: _tag(entry) for key, entry in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_tag(entry) for entry in value]
+    if isinstance(value, Decimal):
+        return {NUMBER_KEY: str(value)}
+    # boto3 hands Binary attributes back wrapped in boto3.dynamodb.types.Binary
+    raw = getattr(value, "value", value)
+    if isinstance(raw, (bytes, bytearray)):
+        return {BINARY_KEY: base64.b64encode(bytes(raw)).decode("ascii")}
+    return value
+
+
+# Helper Function: Undo _tag for one decoded JSON object
+def _untag(value):
+    if len(value) == 1:
+        if BINARY_KEY in value:
+            return base64.b64decode(value[BINARY_KEY])
+        if NUMBER_KEY in value:
+            return Decimal(value[NUMBER_KEY])
+    return value
+
+
+# Helper Function: A (table_name, item) pair as one line of JSON
+def encode_item(table_name, item):
+    return json.dumps({"table": table_name, "item": _tag(item)}, separators=(",", ":"))
+
+
+# Helper Function: (table_name, item) from encode_item's JSON
+def decode_item(text):
+    record = json.loads(text, object_hook=_untag)
+    return record["table"], record["item"]
+
+
+# Queues audit items and writes them to DynamoDB from a background thread, up to 25 per BatchWriteItem:
+# a write starts as soon as items are queued, and items queued while it is in flight go in the next one.
+# flush() waits for the queue to drain and is called before each invocation returns. Items DynamoDB
+# still rejects after batch_write's retries are spilled to SQS (spill_queue_url) or, failing that, to a
+# local file that a later flush retries once a write has gone through again. enqueue() blocks while
+# max_queue items are waiting.
+class AuditWriter:
+    def __init__(self, client, table_name, max_queue=AUDIT_QUEUE_MAX, sqs_client=None, spill_queue_url=None,
+                 spill_path=AUDIT_SPILL_PATH):
+        self.client = client
+        self.table_name = table_name
+        self.max_queue = max_queue
+        self.sqs_client = sqs_client
+        self.spill_queue_url = spill_queue_url
+        self.spill_path = spill_path
+        self._pending = deque()
+        self._in_flight = 0
+        self._thread = None
+        # False while the last BatchWriteItem left items unprocessed; the spill file waits until it is True
+        self._healthy = True
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._stats = {"enqueued": 0, "written": 0, "batches": 0, "spilled_sqs": 0, "spilled_file": 0, "replayed": 0}
+
+    def enqueue(self, item, table_name=None):
+        with self._cond:
+            while len(self._pending) >= self.max_queue:
+                self._cond.wait()
+            self._pending.append((table_name or self.table_name, item))
+            self._stats["enqueued"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    # Wait until every queued item is written or spilled, then retry the spill file if DynamoDB is taking
+    # writes again. Returns False (after spilling whatever had not started writing) if that takes longer
+    # than timeout seconds.
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        drained = self._drain(deadline)
+        if drained and self._healthy and self._replay_spill_file():
+            drained = self._drain(deadline)
+        return drained
+
+    def stats(self):
+        with self._cond:
+            return {**self._stats, "pending": len(self._pending), "in_flight": self._in_flight}
+
+    def _drain(self, deadline):
+        with self._cond:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            drained = self._cond.wait_for(lambda: not self._pending and not self._in_flight, remaining)
+            stranded = [] if drained else list(self._pending)
+            self._pending.clear()
+            self._cond.notify_all()
+        if stranded:
+            logger.error(f"Audit flush timed out; spilling {len(stranded)} queued items")
+            self._spill(stranded)
+        return drained
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch = [self._pending.popleft() for _ in range(min(dynamodb_batch.BATCH_WRITE_LIMIT, len(self._pending)))]
+                self._in_flight += len(batch)
+                self._cond.notify_all()
+            try:
+                self._write(batch)
+            finally:
+                with self._cond:
+                    self._in_flight -= len(batch)
+                    self._cond.notify_all()
+
+    def _write(self, batch):
+        requests = [dynamodb_batch.put_request(table_name, item) for table_name, item in batch]
+        try:
+            failed = dynamodb_batch.batch_write(self.client, requests)
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} audit items: {str(e)}")
+            failed = requests
+        with self._cond:
+            self._stats["written"] += len(batch) - len(failed)
+            self._stats["batches"] += 1
+            self._healthy = not failed
+        if failed:
+            self._spill([(table_name, request["PutRequest"]["Item"]) for table_name, request in failed])
+
+    def _spill(self, entries):
+        lines = [encode_item(table_name, item) for table_name, item in entries]
+        if self.sqs_client is not None and self.spill_queue_url:
+            lines = self._spill_to_sqs(lines)
+        if lines:
+            with self._spill_lock, open(self.spill_path, "a") as spill_file:
+                spill_file.write("".join(line + "\n" for line in lines))
+            with self._cond:
+                self._stats["spilled_file"] += len(lines)
+            logger.warning(f"Spilled {len(lines)} audit items to {self.spill_path}")
+
+    # Returns the lines SQS did not accept
+    def _spill_to_sqs(self, lines):
+        rejected = []
+        for start in range(0, len(lines), SQS_BATCH_LIMIT):
+            chunk = lines[start:start + SQS_BATCH_LIMIT]
+            try:
+                response = self.sqs_client.send_message_batch(
+                    QueueUrl=self.spill_queue_url,
+                    Entries=[{"Id": str(i), "MessageBody": line} for i, line in enumerate(chunk)],
+                )
+                rejected.extend(chunk[int(entry["Id"])] for entry in response.get("Failed", []))
+            except Exception as e:
+                logger.error(f"Error spilling {len(chunk)} audit items to SQS: {str(e)}")
+                rejected.extend(chunk)
+        with self._cond:
+            self._stats["spilled_sqs"] += len(lines) - len(rejected)
+        return rejected
+
+    # Requeue items spilled to the local file earlier in this container, filed under the bucket open now
+    # (audit_chain.refile) in case theirs has been sealed meanwhile; returns whether there were any
+    def _replay_spill_file(self):
+        replaying = f"{self.spill_path}.replaying"
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return False
+            os.replace(self.spill_path, replaying)
+        entries = []
+        with open(replaying) as spill_file:
+            for line in spill_file:
+                try:
+                    entries.append(decode_item(line))
+                except (ValueError, KeyError) as e:
+                    logger.error(f"Discarding unreadable spilled audit item: {str(e)}")
+        os.remove(replaying)
+        with self._cond:
+            self._stats["replayed"] += len(entries)
+        for table_name, item in entries:
+            self.enqueue(audit_chain.refile(item), table_name)
+        return bool(entries)
+
+
+# Flush the writer when the runtime shuts the container down. Lambda sends SIGTERM (with about 500 ms to
+# finish) only to functions that have an extension registered; the atexit hook covers a normal exit.
+def install_shutdown_hook(writer, timeout=0.4):
+    def on_sigterm(signum, frame):
+        writer.flush(timeout)
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            sys.exit(0)
+
+    try:
+        previous = signal.signal(signal.SIGTERM, on_sigterm)
+    except ValueError:
+        # signal handlers can only be installed from the main thread
+        logger.warning("Audit writer SIGTERM hook not installed: not on the main thread")
+    atexit.register(writer.flush, timeout)
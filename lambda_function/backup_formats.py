@@ -0,0 +1,297 @@
+import sys
+import json
+import base64
+import zlib
+import struct
+from array import array
+from decimal import Decimal
+
+# zstandard is not in the Lambda runtime; the zstd format is only offered when it is bundled
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMATS = ("ndjson", "ndjson.gz", "ndjson.zst", "pcol")
+
+# Columnar ("pcol") layout, Parquet-style:
+#   PCOL1\n | row group | ... | 0 (4 bytes) | footer JSON | footer length (4 bytes, big-endian) | PCOL
+# A row group is a 4-byte header length, a JSON header {"rows", "columns": [{"name", "encoding", "length"}]}
+# and one zlib-compressed block per column. "dict" columns store their distinct values once followed by
+# 16-bit indexes into them; "plain" columns store a JSON array of values. Missing attributes are null;
+# attributes holding NULL are {"$null": true}.
+# The footer lists each row group's offset and row count so readers can seek without a full pass.
+PCOL_MAGIC = b"PCOL1\n"
+PCOL_TAIL = b"PCOL"
+# A column is dictionary-encoded when it has at most this many distinct values in the row group
+DICTIONARY_MAX_VALUES = 4096
+
+
+# DynamoDB types JSON lacks are tagged, as audit_writer does: {"$binary": "<base64>"} for Binary (e.g.
+# compressed payloads), {"$number": "<digits>"} for numbers a double cannot hold exactly (DynamoDB keeps up
+# to 38 digits), and {"$ss"|"$ns"|"$bs": [...]} for string, number and binary sets
+BINARY_KEY = "$binary"
+NUMBER_KEY = "$number"
+STRING_SET_KEY = "$ss"
+NUMBER_SET_KEY = "$ns"
+BINARY_SET_KEY = "$bs"
+NULL_KEY = "$null"
+PCOL_NULL = '{"%s":true}' % NULL_KEY
+
+
+# Helper Function: bytes of a Binary attribute (boto3 wraps them in boto3.dynamodb.types.Binary), or None
+def _binary(value):
+    raw = getattr(value, "value", value)
+    return bytes(raw) if isinstance(raw, (bytes, bytearray)) else None
+
+
+# Helper Function: DynamoDB numbers come back as Decimal, binaries as bytes or boto3 Binary, sets as set
+def json_default(value):
+    if isinstance(value, Decimal):
+        if value == value.to_integral_value():
+            return int(value)
+        if Decimal(repr(float(value))) == value:
+            return float(value)
+        return {NUMBER_KEY: str(value)}
+    if isinstance(value, (set, frozenset)):
+        if all(isinstance(member, str) for member in value):
+            return {STRING_SET_KEY: sorted(value)}
+        if all(isinstance(member, (Decimal, int, float)) for member in value):
+            return {NUMBER_SET_KEY: sorted(str(member) for member in value)}
+        return {BINARY_SET_KEY: sorted(base64.b64encode(_binary(member)).decode("ascii") for member in value)}
+    raw = _binary(value)
+    if raw is not None:
+        return {BINARY_KEY: base64.b64encode(raw).decode("ascii")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value):
+    return json.dumps(value, default=json_default, separators=(",", ":"))
+
+
+def content_type(backup_format):
+    return "application/octet-stream" if backup_format == "pcol" else "application/x-ndjson"
+
+
+# Encoder writing newline-delimited JSON to sink, optionally through a streaming compressor
+class NdjsonEncoder:
+    def __init__(self, sink, compressor=None):
+        self.sink = sink
+        self.compressor = compressor
+        self.raw_bytes = 0
+
+    def write_items(self, items):
+        data = "".join(_dumps(item) + "\n" for item in items).encode("utf-8")
+        self.raw_bytes += len(data)
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+        if data:
+            self.sink.write(data)
+
+    def close(self):
+        if self.compressor is not None:
+            tail = self.compressor.flush()
+            if tail:
+                self.sink.write(tail)
+
+
+# Encoder writing the columnar format: rows are buffered up to row_group_rows, then written as one row group
+class ColumnarEncoder:
+    def __init__(self, sink, row_group_rows=50000, level=6):
+        self.sink = sink
+        self.row_group_rows = row_group_rows
+        self.level = level
+        self.raw_bytes = 0
+        self._rows = []
+        self._row_groups = []
+        self._offset = len(PCOL_MAGIC)
+        sink.write(PCOL_MAGIC)
+
+    def write_items(self, items):
+        for item in items:
+            self._rows.append(item)
+            if len(self._rows) >= self.row_group_rows:
+                self._flush_row_group()
+
+    def _flush_row_group(self):
+        rows, self._rows = self._rows, []
+        if not rows:
+            return
+        names = sorted({name for row in rows for name in row})
+        header = {"rows": len(rows), "columns": []}
+        blocks = []
+        for name in names:
+            values = [("null" if name not in row else PCOL_NULL if row[name] is None else _dumps(row[name]))
+                      for row in rows]
+            distinct = {}
+            for value in values:
+                if value not in distinct:
+                    if len(distinct) == DICTIONARY_MAX_VALUES:
+                        distinct = None
+                        break
+                    distinct[value] = len(distinct)
+            if distinct is not None:
+                dictionary = ("[" + ",".join(distinct) + "]").encode("utf-8")
+                indexes = array("H", (distinct[value] for value in values))
+                if sys.byteorder == "little":
+                    indexes.byteswap()  # stored big-endian like every other length in the file
+                raw = struct.pack(">I", len(dictionary)) + dictionary + indexes.tobytes()
+                encoding = "dict"
+            else:
+                raw = ("[" + ",".join(values) + "]").encode("utf-8")
+                encoding = "plain"
+            # Approximate NDJSON size of this column, for the compression ratio
+            self.raw_bytes += sum(len(value) + len(name) + 4 for value in values)
+            block = zlib.compress(raw, self.level)
+            header["columns"].append({"name": name, "encoding": encoding, "length": len(block)})
+            blocks.append(block)
+
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        group = struct.pack(">I", len(header_bytes)) + header_bytes + b"".join(blocks)
+        self.sink.write(group)
+        self._row_groups.append({"offset": self._offset, "rows": len(rows)})
+        self._offset += len(group)
+
+    def close(self):
+        self._flush_row_group()
+        footer = json.dumps({"row_groups": self._row_groups}, separators=(",", ":")).encode("utf-8")
+        self.sink.write(struct.pack(">I", 0) + footer + struct.pack(">I", len(footer)) + PCOL_TAIL)
+
+
+def open_encoder(backup_format, sink, row_group_rows=50000, level=6):
+    if backup_format == "ndjson":
+        return NdjsonEncoder(sink)
+    if backup_format == "ndjson.gz":
+        return NdjsonEncoder(sink, zlib.compressobj(level, zlib.DEFLATED, 31))
+    if backup_format == "ndjson.zst":
+        if zstandard is None:
+            raise ValueError("Backup format ndjson.zst needs the zstandard package in the deployment bundle")
+        return NdjsonEncoder(sink, zstandard.ZstdCompressor(level=3).compressobj())
+    if backup_format == "pcol":
+        return ColumnarEncoder(sink, row_group_rows, level)
+    raise ValueError(f"Unknown backup format {backup_format}; expected one of {', '.join(FORMATS)}")
+
+
+# ---------------------------------------------------------------------------
+# Decoding
+# ---------------------------------------------------------------------------
+
+def _decompressed_chunks(backup_format, chunks):
+    if backup_format == "ndjson":
+        return chunks
+    if backup_format == "ndjson.gz":
+        decompressor = zlib.decompressobj(31)
+    elif backup_format == "ndjson.zst":
+        if zstandard is None:
+            raise ValueError("Backup format ndjson.zst needs the zstandard package in the deployment bundle")
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+    else:
+        raise ValueError(f"Not an NDJSON backup format: {backup_format}")
+    return (decompressor.decompress(chunk) for chunk in chunks)
+
+
+# Yield items from an NDJSON backup given an iterable of raw byte chunks, without holding the whole object
+def iter_ndjson(backup_format, chunks):
+    pending = b""
+    for chunk in _decompressed_chunks(backup_format, chunks):
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line:
+                yield json.loads(line, parse_float=Decimal)
+    if pending.strip():
+        yield json.loads(pending, parse_float=Decimal)
+
+
+# Helper Function: Read exactly size bytes from a chunk iterator, keeping the remainder
+class _ChunkReader:
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buffer = bytearray()
+
+    def read(self, size):
+        while len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+
+# Yield items from a columnar backup one row group at a time
+def iter_columnar(chunks):
+    reader = _ChunkReader(chunks)
+    if reader.read(len(PCOL_MAGIC)) != PCOL_MAGIC:
+        raise ValueError("Not a pcol backup")
+    while True:
+        prefix = reader.read(4)
+        if len(prefix) < 4:
+            raise ValueError("Truncated pcol backup")
+        (length,) = struct.unpack(">I", prefix)
+        if length == 0:
+            # Footer marker: every row group has been read
+            return
+        header = json.loads(reader.read(length))
+        columns = {}
+        for column in header["columns"]:
+            raw = zlib.decompress(reader.read(column["length"]))
+            if column["encoding"] == "dict":
+                (dictionary_length,) = struct.unpack(">I", raw[:4])
+                dictionary = json.loads(raw[4:4 + dictionary_length], parse_float=Decimal)
+                indexes = array("H")
+                indexes.frombytes(raw[4 + dictionary_length:])
+                if sys.byteorder == "little":
+                    indexes.byteswap()
+                columns[column["name"]] = [dictionary[i] for i in indexes]
+            else:
+                columns[column["name"]] = json.loads(raw, parse_float=Decimal)
+        for row in range(header["rows"]):
+            yield {
+                name: None if values[row] == {NULL_KEY: True} else values[row]
+                for name, values in columns.items() if values[row] is not None
+            }
+
+
+def iter_items(backup_format, chunks):
+    if backup_format == "pcol":
+        return iter_columnar(chunks)
+    return iter_ndjson(backup_format, chunks)
+
+
+# Helper Function: The value a tagged attribute stands for, or the value itself if it is not tagged
+def _untag(value):
+    if not isinstance(value, dict) or len(value) != 1:
+        return value
+    if BINARY_KEY in value:
+        return base64.b64decode(value[BINARY_KEY])
+    if NUMBER_KEY in value:
+        return Decimal(value[NUMBER_KEY])
+    if STRING_SET_KEY in value:
+        return set(value[STRING_SET_KEY])
+    if NUMBER_SET_KEY in value:
+        return {Decimal(member) for member in value[NUMBER_SET_KEY]}
+    if BINARY_SET_KEY in value:
+        return {base64.b64decode(member) for member in value[BINARY_SET_KEY]}
+    return value
+
+
+# Helper Function: A decoded value with tagged values turned back into their DynamoDB types, through Maps and Lists
+def _restore(value):
+    if isinstance(value, list):
+        return [_restore(member) for member in value]
+    if not isinstance(value, dict):
+        return value
+    untagged = _untag(value)
+    if untagged is not value:
+        return untagged
+    return {name: _restore(member) for name, member in value.items()}
+
+
+# Helper Function: Turn the tagged attributes of a decoded item back into their DynamoDB types, in place
+def restore_item(item):
+    for name, value in item.items():
+        item[name] = _restore(value)
+    return item
@@ -1,51 +1,318 @@
 import boto3
 import json
 import os
+import time
+import threading
 from datetime import datetime
+from botocore.exceptions import ClientError
+from parallel_scan import parallel_scan
+from multipart_upload import MultipartUploader
+import backup_formats
+import incremental_backup
 
 # Initialize clients
 dynamodb = boto3.resource('dynamodb')
 s3 = boto3.client('s3')
+streams = boto3.client('dynamodbstreams')
+
+# The resource's low-level client is thread-safe and returns plain Python items, so scan workers share it
+dynamodb_client = dynamodb.meta.client
 
 # Environment variables
 DYNAMODB_LEDGER_TABLE = os.getenv('DYNAMODB_LEDGER_TABLE_NAME')
 DYNAMODB_AUDIT_TABLE = os.getenv('DYNAMODB_AUDIT_TABLE_NAME')
 S3_BUCKET_NAME = os.getenv('S3_BACKUP_BUCKET_NAME')
+SCAN_TOTAL_SEGMENTS = int(os.getenv('SCAN_TOTAL_SEGMENTS', '8'))
+SCAN_MAX_WORKERS = int(os.getenv('SCAN_MAX_WORKERS', str(SCAN_TOTAL_SEGMENTS)))
+SCAN_PAGE_SIZE = int(os.getenv('SCAN_PAGE_SIZE', '0')) or None
+BACKUP_PART_SIZE_MB = int(os.getenv('BACKUP_PART_SIZE_MB', '8'))
+BACKUP_UPLOAD_CONCURRENCY = int(os.getenv('BACKUP_UPLOAD_CONCURRENCY', '4'))
+BACKUP_FORMAT = os.getenv('BACKUP_FORMAT', 'ndjson')
+BACKUP_ROW_GROUP_ROWS = int(os.getenv('BACKUP_ROW_GROUP_ROWS', '50000'))
+BACKUP_COMPRESSION_LEVEL = int(os.getenv('BACKUP_COMPRESSION_LEVEL', '6'))
+BACKUP_MODE = os.getenv('BACKUP_MODE', 'full')
+BACKUP_COMPACT_EVERY = int(os.getenv('BACKUP_COMPACT_EVERY', '28'))
+EXPORT_POLL_SECONDS = float(os.getenv('EXPORT_POLL_SECONDS', '5'))
+EXPORT_POLL_MAX_SECONDS = float(os.getenv('EXPORT_POLL_MAX_SECONDS', '60'))
+# Time kept back from the invocation timeout to write the manifest
+EXPORT_DEADLINE_MARGIN = 20
 
-# Tables
-payment_ledger_table = dynamodb.Table(DYNAMODB_LEDGER_TABLE)
-payment_audit_table = dynamodb.Table(DYNAMODB_AUDIT_TABLE)
+# Native exports that cannot start for these reasons fall back to a scan backup of that table
+EXPORT_FALLBACK_ERRORS = ('PointInTimeRecoveryUnavailableException', 'LimitExceededException')
 
-def backup_to_s3(data, file_name):
+# Helper Function: Stream whatever write(encoder) produces into backup/<file_name>; returns (upload, encoder, result)
+def write_backup_object(file_name, backup_format, write):
     try:
-        # Store the data in S3 as a JSON file
-        s3.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=f'backup/{file_name}',
-            Body=json.dumps(data)
-        )
+        with MultipartUploader(
+            s3, S3_BUCKET_NAME, f'backup/{file_name}',
+            part_size=BACKUP_PART_SIZE_MB * 1024 * 1024,
+            max_concurrency=BACKUP_UPLOAD_CONCURRENCY,
+            content_type=backup_formats.content_type(backup_format),
+        ) as upload:
+            encoder = backup_formats.open_encoder(
+                backup_format, upload, row_group_rows=BACKUP_ROW_GROUP_ROWS, level=BACKUP_COMPRESSION_LEVEL
+            )
+            result = write(encoder)
+            encoder.close()
         print(f"Backup successful: {file_name}")
+        return upload, encoder, result
     except Exception as e:
-        print(f"Error uploading to S3: {str(e)}")
+        print(f"Error writing backup {file_name} to S3: {str(e)}")
+        raise
+
+# Stream the table to S3: each scan page is encoded in backup_format and written into the multipart upload
+# as it arrives, so memory is bounded by the part buffers, in-flight pages and (for pcol) one row group
+# rather than by the table size. Returns a summary with per-segment stats.
+def backup_table(table_name, file_name, backup_format='ndjson'):
+    start = time.monotonic()
+    write_lock = threading.Lock()
+
+    def scan_into(encoder):
+        # Segments call this concurrently; a blocked write (all upload slots busy) holds back every segment
+        def write_page(segment, items):
+            with write_lock:
+                encoder.write_items(items)
+
+        return parallel_scan(
+            dynamodb_client, table_name, SCAN_TOTAL_SEGMENTS, write_page,
+            max_workers=SCAN_MAX_WORKERS, page_size=SCAN_PAGE_SIZE,
+        )
+
+    upload, encoder, segments = write_backup_object(file_name, backup_format, scan_into)
+
+    seconds = time.monotonic() - start
+    items = sum(segment['items'] for segment in segments)
+    summary = {
+        'table': table_name,
+        'file': file_name,
+        'format': backup_format,
+        'items': items,
+        'bytes': upload.bytes_written,
+        'compression_ratio': round(encoder.raw_bytes / upload.bytes_written, 2) if upload.bytes_written else 0.0,
+        'seconds': round(seconds, 3),
+        'items_per_second': round(items / seconds, 1) if seconds else 0.0,
+        'mb_per_second': round(encoder.raw_bytes / 1048576 / seconds, 1) if seconds else 0.0,
+        'consumed_capacity': sum(segment['consumed_capacity'] for segment in segments),
+        'segments': segments,
+    }
+    print(f"Backed up {items} items from {table_name} in {seconds:.2f}s "
+          f"({SCAN_TOTAL_SEGMENTS} segments, {summary['consumed_capacity']:.1f} RCU)")
+    return summary
+
+# Helper Function: Full snapshot that starts a new incremental chain. Stream positions restart at the
+# oldest retained record, so the first delta may replay changes the snapshot already holds; applied in
+# order they converge on the same final state.
+def start_incremental_chain(table_name, label, timestamp, backup_format, stream_arn, state_key):
+    summary = backup_table(table_name, f'{label}_backup_{timestamp}.{backup_format}', backup_format)
+    incremental_backup.save_state(s3, S3_BUCKET_NAME, state_key, {
+        'stream_arn': stream_arn,
+        'format': backup_format,
+        'full': f"backup/{summary['file']}",
+        'deltas': [],
+        'positions': {},
+    })
+    return {**summary, 'mode': 'incremental-full'}
+
+# Export only what changed since the last run, read from the table's DynamoDB stream (no table read capacity),
+# as a delta file. Every BACKUP_COMPACT_EVERY deltas the last full snapshot and its deltas are merged into a
+# new full snapshot, again without scanning the table.
+def incremental_backup_table(table_name, label, timestamp, backup_format):
+    start = time.monotonic()
+    state_key = f'backup/state/{label}.json'
+    description = dynamodb_client.describe_table(TableName=table_name)['Table']
+    stream_arn = description.get('LatestStreamArn')
+    if not stream_arn:
+        raise ValueError(f"Incremental backups need DynamoDB Streams enabled on {table_name}")
+
+    state = incremental_backup.load_state(s3, S3_BUCKET_NAME, state_key)
+    if state is None or state['stream_arn'] != stream_arn or state['format'] != backup_format:
+        print(f"No incremental chain for {table_name} in {backup_format}; taking a full snapshot")
+        return start_incremental_chain(table_name, label, timestamp, backup_format, stream_arn, state_key)
+
+    delta_name = f'incremental/{label}_delta_{timestamp}.{backup_format}'
+    changes = [0]
+
+    def read_into(encoder):
+        def write_rows(rows):
+            changes[0] += len(rows)
+            encoder.write_items(rows)
+
+        return incremental_backup.read_changes(streams, stream_arn, state['positions'], write_rows)
+
+    try:
+        upload, encoder, positions = write_backup_object(delta_name, backup_format, read_into)
+    except incremental_backup.StreamPositionLost as e:
+        print(f"Incremental chain for {table_name} broken ({str(e)}); taking a full snapshot")
+        return start_incremental_chain(table_name, label, timestamp, backup_format, stream_arn, state_key)
+
+    state['positions'] = positions
+    state['deltas'].append(f'backup/{delta_name}')
+    compacted = None
+    if len(state['deltas']) >= BACKUP_COMPACT_EVERY:
+        compacted = f'{label}_backup_{timestamp}.{backup_format}'
+        key_names = [key['AttributeName'] for key in description['KeySchema']]
+        write_backup_object(compacted, backup_format, lambda full: incremental_backup.compact(
+            s3, S3_BUCKET_NAME, state['full'], state['deltas'], backup_format, key_names, full
+        ))
+        state['full'], state['deltas'] = f'backup/{compacted}', []
+    incremental_backup.save_state(s3, S3_BUCKET_NAME, state_key, state)
+
+    seconds = time.monotonic() - start
+    print(f"Backed up {changes[0]} changes from {table_name} in {seconds:.2f}s"
+          + (f", compacted into {compacted}" if compacted else ""))
+    return {
+        'table': table_name,
+        'mode': 'incremental',
+        'file': delta_name,
+        'format': backup_format,
+        'changes': changes[0],
+        'bytes': upload.bytes_written,
+        'seconds': round(seconds, 3),
+        'consumed_capacity': 0.0,
+        'compacted': compacted,
+    }
+
+# Helper Function: Seconds left before the invocation times out, less the margin for writing the manifest
+def time_left(context):
+    if context is None:
+        return float('inf')
+    return context.get_remaining_time_in_millis() / 1000.0 - EXPORT_DEADLINE_MARGIN
+
+# Helper Function: Manifest entry for one table's export
+def export_entry(table_name, label, s3_prefix, description):
+    return {
+        'table': table_name,
+        'label': label,
+        'mode': 'export',
+        'export_arn': description['ExportArn'],
+        'status': description['ExportStatus'],
+        's3_prefix': s3_prefix,
+        'export_time': str(description.get('ExportTime', '')),
+        'export_manifest': description.get('ExportManifest'),
+        'items': description.get('ItemCount'),
+        'billed_bytes': description.get('BilledSizeBytes'),
+        'failure': description.get('FailureMessage'),
+        'consumed_capacity': 0.0,
+    }
+
+# Start a native ExportTableToPointInTime of the table into the backup bucket. Exports read from the PITR
+# backup, not the table, so they consume no read capacity. The client token is built from the run timestamp,
+# which a retried invocation of the same scheduled event shares (see run_timestamp), so the retry picks up
+# the same export rather than start a second one.
+def start_export(table_name, label, timestamp):
+    table_arn = dynamodb_client.describe_table(TableName=table_name)['Table']['TableArn']
+    s3_prefix = f'backup/export/{label}_{timestamp}'
+    response = dynamodb_client.export_table_to_point_in_time(
+        TableArn=table_arn,
+        S3Bucket=S3_BUCKET_NAME,
+        S3Prefix=s3_prefix,
+        ExportFormat='DYNAMODB_JSON',
+        ClientToken=f'{label}-{timestamp}',
+    )
+    print(f"Started export of {table_name} to s3://{S3_BUCKET_NAME}/{s3_prefix}")
+    return export_entry(table_name, label, s3_prefix, response['ExportDescription'])
+
+# Helper Function: Poll in-progress exports with exponential backoff until they finish or the invocation
+# is about to time out; returns the number of polls
+def wait_for_exports(entries, context):
+    delay, polls = EXPORT_POLL_SECONDS, 0
+    while any(entry['status'] == 'IN_PROGRESS' for entry in entries) and time_left(context) > delay:
+        time.sleep(delay)
+        polls += 1
+        for entry in entries:
+            if entry.get('status') == 'IN_PROGRESS':
+                description = dynamodb_client.describe_export(ExportArn=entry['export_arn'])['ExportDescription']
+                entry.update(export_entry(entry['table'], entry['label'], entry['s3_prefix'], description))
+        delay = min(delay * 2, EXPORT_POLL_MAX_SECONDS)
+    return polls
+
+# Helper Function: Scan backup standing in for a table's export
+def fallback_scan(table_name, label, timestamp, backup_format, reason):
+    print(f"Cannot export {table_name} ({reason}); falling back to a scan backup")
+    summary = backup_table(table_name, f'{label}_backup_{timestamp}.{backup_format}', backup_format)
+    return {**summary, 'label': label, 'mode': 'scan', 'status': 'COMPLETED', 'export_failure': reason}
+
+# Back up every table with a native export, falling back to a scan backup for tables whose export cannot
+# start or fails. Writes a manifest to manifest_key listing each export's status, S3 location and item count.
+# Exports still running when the invocation nears its timeout are recorded as IN_PROGRESS; invoking again
+# with {"mode": "export", "manifest": manifest_key} resumes polling them.
+def export_backup(tables, timestamp, backup_format, context, manifest_key=None):
+    if manifest_key:
+        manifest = json.loads(s3.get_object(Bucket=S3_BUCKET_NAME, Key=manifest_key)['Body'].read())
+    else:
+        manifest_key = f'backup/export/manifests/{timestamp}.json'
+        manifest = {'timestamp': timestamp, 'tables': []}
+        for table_name, label in tables:
+            try:
+                manifest['tables'].append(start_export(table_name, label, timestamp))
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code')
+                if code not in EXPORT_FALLBACK_ERRORS:
+                    raise
+                manifest['tables'].append(fallback_scan(table_name, label, timestamp, backup_format, code))
+
+    polls = wait_for_exports(manifest['tables'], context)
+    manifest['tables'] = [
+        fallback_scan(entry['table'], entry['label'], manifest['timestamp'], backup_format, entry['failure'])
+        if entry['status'] == 'FAILED' else entry
+        for entry in manifest['tables']
+    ]
+    manifest['complete'] = all(entry['status'] == 'COMPLETED' for entry in manifest['tables'])
+    s3.put_object(
+        Bucket=S3_BUCKET_NAME, Key=manifest_key, Body=json.dumps(manifest, indent=2), ContentType='application/json'
+    )
+    print(f"Export manifest written to {manifest_key} after {polls} polls")
+    return manifest_key, manifest
+
+# Helper Function: Timestamp naming this run's backup files and export client tokens. Scheduled full and export
+# runs take it from the EventBridge event's time, which Lambda's retries of the event keep. Incremental runs and
+# manual invocations use the clock, so a retried incremental run never overwrites a delta already recorded.
+def run_timestamp(event, mode):
+    if event.get('time') and mode != 'incremental':
+        return datetime.strptime(event['time'], '%Y-%m-%dT%H:%M:%SZ').strftime('%Y-%m-%d-%H-%M-%S')
+    return datetime.utcnow().strftime('%Y-%m-%d-%H-%M-%S')
 
 def lambda_handler(event, context):
     try:
-        # Query payment ledger and audit trail data
-        ledger_data = payment_ledger_table.scan()
-        audit_data = payment_audit_table.scan()
-        
-        # Backup the data to S3
-        timestamp = datetime.utcnow().strftime('%Y-%m-%d-%H-%M-%S')
-        backup_to_s3(ledger_data['Items'], f'payment_ledger_backup_{timestamp}.json')
-        backup_to_s3(audit_data['Items'], f'payment_audit_backup_{timestamp}.json')
-        
+        event = event or {}
+        backup_format = event.get('format', BACKUP_FORMAT)
+        mode = event.get('mode', BACKUP_MODE)
+        if backup_format not in backup_formats.FORMATS:
+            raise ValueError(f"Unknown backup format {backup_format}")
+        timestamp = run_timestamp(event, mode)
+        tables = [(DYNAMODB_LEDGER_TABLE, 'payment_ledger'), (DYNAMODB_AUDIT_TABLE, 'payment_audit')]
+
+        if mode == 'full':
+            # Scan payment ledger and audit trail data in parallel segments and back it up to S3
+            summaries = [
+                backup_table(table_name, f'{label}_backup_{timestamp}.{backup_format}', backup_format)
+                for table_name, label in tables
+            ]
+        elif mode == 'incremental':
+            summaries = [
+                incremental_backup_table(table_name, label, timestamp, backup_format)
+                for table_name, label in tables
+            ]
+        elif mode == 'export':
+            manifest_key, manifest = export_backup(tables, timestamp, backup_format, context, event.get('manifest'))
+            return {
+                'statusCode': 200 if manifest['complete'] else 202,
+                'body': json.dumps({
+                    'message': 'Export completed successfully.' if manifest['complete'] else 'Export in progress.',
+                    'manifest': manifest_key,
+                    'tables': manifest['tables'],
+                })
+            }
+        else:
+            raise ValueError(f"Unknown backup mode {mode}")
+
         return {
             'statusCode': 200,
-            'body': 'Backup completed successfully.'
+            'body': json.dumps({'message': 'Backup completed successfully.', 'tables': summaries})
         }
-    
+
     except Exception as e:
         return {
             'statusCode': 500,
             'body': f"Error during backup: {str(e)}"
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,45 @@
+import time
+import random
+import logging
+
+# Initialize Logging
+logger = logging.getLogger()
+
+# DynamoDB accepts at most 25 put/delete requests per BatchWriteItem call
+BATCH_WRITE_LIMIT = 25
+
+
+# Helper Function: Split (table_name, request) pairs into BatchWriteItem-sized RequestItems
+def chunk_requests(requests, size=BATCH_WRITE_LIMIT):
+    for start in range(0, len(requests), size):
+        request_items = {}
+        for table_name, request in requests[start:start + size]:
+            request_items.setdefault(table_name, []).append(request)
+        yield request_items
+
+
+# Helper Function: PutRequest for a single item
+def put_request(table_name, item):
+    return table_name, {"PutRequest": {"Item": item}}
+
+
+# Write all requests in chunks of 25, retrying UnprocessedItems with exponential backoff.
+# Returns the (table_name, request) pairs still unprocessed once max_attempts is exhausted.
+def batch_write(client, requests, max_attempts=8, base_delay=0.05, max_delay=2.0):
+    failed = []
+    for request_items in chunk_requests(list(requests)):
+        attempt = 0
+        while request_items:
+            attempt += 1
+            response = client.batch_write_item(RequestItems=request_items)
+            request_items = response.get("UnprocessedItems") or {}
+            if not request_items:
+                break
+            if attempt >= max_attempts:
+                pending = sum(len(reqs) for reqs in request_items.values())
+                logger.error(f"BatchWriteItem left {pending} items unprocessed after {attempt} attempts")
+                failed.extend((table_name, req) for table_name, reqs in request_items.items() for req in reqs)
+                break
+            # Full jitter keeps retries from many containers from landing in lockstep
+            time.sleep(random.uniform(0, min(max_delay, base_delay * (2 ** attempt))))
+    return failed
@@ -0,0 +1,103 @@
+import boto3
+import json
+import os
+from parallel_batch_write import parallel_batch_write
+import backup_formats
+import incremental_backup
+
+# Initialize clients
+dynamodb = boto3.resource('dynamodb')
+s3 = boto3.client('s3')
+
+# The resource's low-level client is thread-safe and takes plain Python items, so writer threads share it
+dynamodb_client = dynamodb.meta.client
+
+# Environment variables
+S3_BUCKET_NAME = os.getenv('S3_BACKUP_BUCKET_NAME')
+RESTORE_WORKERS = int(os.getenv('RESTORE_WORKERS', '8'))
+# Cap on consumed write capacity units per second; 0 leaves it to the table's throttling
+RESTORE_MAX_WRITE_RATE = float(os.getenv('RESTORE_MAX_WRITE_RATE', '0')) or None
+RESTORE_MAX_ATTEMPTS = int(os.getenv('RESTORE_MAX_ATTEMPTS', '10'))
+RESTORE_CHUNK_SIZE = 1024 * 1024
+
+# Helper Function: The backup format is the file extension dynamodb_backup gave the object
+def format_of(key):
+    for backup_format in sorted(backup_formats.FORMATS, key=len, reverse=True):
+        if key.endswith(f'.{backup_format}'):
+            return backup_format
+    raise ValueError(f"Cannot tell the backup format of {key}; pass \"format\"")
+
+# Helper Function: Latest image per key across incremental delta files, in the order they were taken
+def collect_changes(delta_keys, backup_format, key_names):
+    changes = {}
+    for delta_key in delta_keys:
+        chunks = incremental_backup.iter_object(s3, S3_BUCKET_NAME, delta_key, RESTORE_CHUNK_SIZE)
+        for row in backup_formats.iter_items(backup_format, chunks):
+            keys = backup_formats.restore_item(row['keys'])
+            changes[tuple(keys[name] for name in key_names)] = row
+    return changes
+
+# Helper Function: PutRequests for the snapshot with delta changes applied, then the items created after it
+def restore_requests(backup_key, backup_format, key_names, changes):
+    chunks = incremental_backup.iter_object(s3, S3_BUCKET_NAME, backup_key, RESTORE_CHUNK_SIZE)
+    for item in backup_formats.iter_items(backup_format, chunks):
+        item = backup_formats.restore_item(item)
+        key = tuple(item.get(name) for name in key_names)
+        if key in changes:
+            item = changes.pop(key).get('new_image')
+            if item is not None:
+                item = backup_formats.restore_item(item)
+        if item is not None:
+            yield {'PutRequest': {'Item': item}}
+    for row in changes.values():
+        if 'new_image' in row:
+            yield {'PutRequest': {'Item': backup_formats.restore_item(row['new_image'])}}
+
+# Load a backup object into table_name. The object is read from S3 in chunks and decoded as it streams, and
+# decoded items are written by parallel BatchWriteItem workers, so memory does not grow with the backup.
+# Delta files (from incremental backups taken after the snapshot) are merged in on the way.
+def restore_table(table_name, backup_key, backup_format=None, delta_keys=()):
+    backup_format = backup_format or format_of(backup_key)
+    key_names = [key['AttributeName'] for key in dynamodb_client.describe_table(TableName=table_name)['Table']['KeySchema']]
+    changes = collect_changes(delta_keys, backup_format, key_names)
+    try:
+        summary = parallel_batch_write(
+            dynamodb_client, table_name, restore_requests(backup_key, backup_format, key_names, changes),
+            workers=RESTORE_WORKERS, max_write_rate=RESTORE_MAX_WRITE_RATE, max_attempts=RESTORE_MAX_ATTEMPTS,
+        )
+    except Exception as e:
+        print(f"Error restoring {backup_key} into {table_name}: {str(e)}")
+        raise
+
+    unprocessed = summary.pop('unprocessed')
+    summary.update({'source': backup_key, 'format': backup_format, 'deltas': len(delta_keys), 'failed': len(unprocessed)})
+    print(f"Restored {summary['items']} items from {backup_key} into {table_name} in {summary['seconds']:.2f}s "
+          f"({summary['items_per_second']:.0f} items/s, {summary['write_rate']:.0f} WCU/s, {summary['retries']} retries)")
+    if unprocessed:
+        raise RuntimeError(f"{len(unprocessed)} items were still throttled after {RESTORE_MAX_ATTEMPTS} attempts")
+    return summary
+
+# Event: {"table": target table, "key": backup object} restores one backup (format from the extension or
+# "format"), optionally with "deltas": [delta objects]; {"table", "state": "backup/state/<table>.json"}
+# restores the latest incremental chain (full snapshot plus its deltas).
+def lambda_handler(event, context):
+    try:
+        table_name = event['table']
+        if 'state' in event:
+            state = incremental_backup.load_state(s3, S3_BUCKET_NAME, event['state'])
+            if state is None:
+                raise ValueError(f"No incremental backup state at {event['state']}")
+            summary = restore_table(table_name, state['full'], state['format'], state['deltas'])
+        else:
+            summary = restore_table(table_name, event['key'], event.get('format'), event.get('deltas', []))
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({'message': 'Restore completed successfully.', 'table': summary})
+        }
+
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'body': f"Error during restore: {str(e)}"
+        }
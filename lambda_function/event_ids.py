@@ -0,0 +1,70 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+# ULID-style event ids: 48-bit Unix milliseconds then 80 random bits, as 26 Crockford base32 characters.
+# They sort by time as plain strings, so they order a transaction's audit events as the table's range key.
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+TIME_LENGTH = 10
+RANDOM_LENGTH = 16
+RANDOM_BITS = 80
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+# Helper Function: value as a fixed number of base32 characters
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(CROCKFORD[digit])
+    return "".join(reversed(chars))
+
+
+# Helper Function: Milliseconds since the epoch of an aware datetime (exact, unlike float timestamps)
+def to_millis(moment):
+    return (moment - EPOCH) // timedelta(milliseconds=1)
+
+
+# Helper Function: Event id from its parts
+def event_id(millis, randomness):
+    return _encode(millis, TIME_LENGTH) + _encode(randomness, RANDOM_LENGTH)
+
+
+# Helper Function: Smallest event id at or after a moment, for range conditions on event_id
+def event_id_floor(moment):
+    return event_id(to_millis(moment), 0)
+
+
+# Helper Function: Milliseconds since the epoch an event id was minted at
+def event_id_millis(value):
+    millis = 0
+    for char in value[:TIME_LENGTH]:
+        millis = millis * 32 + CROCKFORD.index(char)
+    return millis
+
+
+# Mints event ids that are monotonic within a container: ids minted in the same millisecond increment the
+# previous id's random part instead of drawing a new one, so they keep the order they were minted in
+class EventIdGenerator:
+    def __init__(self):
+        self._last_millis = -1
+        self._last_random = 0
+        self._lock = threading.Lock()
+
+    def new(self, moment=None):
+        millis = to_millis(moment or datetime.now(timezone.utc))
+        with self._lock:
+            if millis == self._last_millis and self._last_random + 1 < 2 ** RANDOM_BITS:
+                self._last_random += 1
+            else:
+                self._last_millis = millis
+                self._last_random = int.from_bytes(os.urandom(RANDOM_BITS // 8), "big") >> 1
+            return event_id(millis, self._last_random)
+
+
+_generator = EventIdGenerator()
+
+
+# Helper Function: New event id for a moment (an aware datetime; now if not given)
+def new_event_id(moment=None):
+    return _generator.new(moment)
@@ -0,0 +1,157 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from botocore.exceptions import ClientError
+
+# Initialize Logging
+logger = logging.getLogger()
+
+IN_FLIGHT = "IN_FLIGHT"
+COMPLETE = "COMPLETE"
+
+
+class IdempotencyConflict(ValueError):
+    pass
+
+
+# An earlier attempt sent the payment intent and its claim timed out before it recorded the outcome
+class IdempotencyUnrecorded(IdempotencyConflict):
+    pass
+
+
+# Helper Function: Stable fingerprint of a request, so a reused key with a different payload is rejected
+def payload_hash(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+# Idempotency records live in the ledger table under their own sort key and expire through its
+# expiration_time TTL. The record status is kept in idempotency_status so it never lands in status-shard-index.
+# Once an attempt marks its key intent_sent the key is never taken over or released: the processor may have
+# charged, so only that attempt's complete() settles it.
+class IdempotencyStore:
+    def __init__(self, ledger, ttl_seconds=86400, in_flight_seconds=1800, cache_size=1024):
+        self.ledger = ledger
+        self.ttl_seconds = ttl_seconds
+        self.in_flight_seconds = in_flight_seconds
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, idempotency_key):
+        return f"idempotency#{idempotency_key}", "IDEMPOTENCY"
+
+    # Claim the key for this request. Returns the stored response if the request already completed,
+    # None if the caller should process it, and raises IdempotencyConflict while another attempt is in flight
+    # (IdempotencyUnrecorded if that attempt sent its intent and then timed out).
+    def begin(self, idempotency_key, payload, transaction_id):
+        fingerprint = payload_hash(payload)
+        cached = self._cache_get(idempotency_key)
+        if cached is not None:
+            return self._replay(idempotency_key, cached, fingerprint)
+
+        now = int(time.time())
+        try:
+            self.ledger.put(
+                {
+                    **self.ledger.key(*self._key(idempotency_key)),
+                    "idempotency_status": IN_FLIGHT,
+                    "payload_hash": fingerprint,
+                    "transaction_ref": transaction_id,
+                    "in_flight_until": now + self.in_flight_seconds,
+                    "expiration_time": now + self.ttl_seconds,
+                },
+                # A crashed attempt leaves an IN_FLIGHT record behind; it can be taken over once it times out,
+                # unless it got as far as sending the intent
+                condition="attribute_not_exists(transaction_id) OR "
+                          "(idempotency_status = :in_flight AND in_flight_until < :now "
+                          "AND attribute_not_exists(intent_sent))",
+                values={":in_flight": IN_FLIGHT, ":now": now},
+            )
+            return None
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+
+        record = self.ledger.get(*self._key(idempotency_key), consistent=True)
+        if record is None:
+            raise IdempotencyConflict(f"Idempotency key {idempotency_key} changed state during the request")
+        if record.get("idempotency_status") != COMPLETE:
+            if record.get("intent_sent") and int(record.get("in_flight_until", 0)) < now:
+                raise IdempotencyUnrecorded(
+                    f"A request with idempotency key {idempotency_key} was sent to the processor "
+                    f"but its outcome was not recorded"
+                )
+            raise IdempotencyConflict(f"A request with idempotency key {idempotency_key} is already in progress")
+        entry = {
+            "payload_hash": record.get("payload_hash"),
+            "response": json.loads(record["response_body"]),
+            "expires_at": float(record.get("expiration_time", 0)),
+        }
+        self._cache_put(idempotency_key, entry)
+        return self._replay(idempotency_key, entry, fingerprint)
+
+    # Mark the key before the payment intent is sent. Fails (ConditionalCheckFailedException) unless this
+    # attempt still holds the claim, in which case the intent must not be sent.
+    def mark_intent_sent(self, idempotency_key, transaction_id):
+        params = self.ledger.build_update(*self._key(idempotency_key), {"intent_sent": True})
+        params["ConditionExpression"] = "idempotency_status = :in_flight AND transaction_ref = :transaction_ref"
+        params["ExpressionAttributeValues"].update({":in_flight": IN_FLIGHT, ":transaction_ref": transaction_id})
+        self.ledger.client.update_item(**params)
+
+    # Record the final response so retries are answered without reprocessing
+    def complete(self, idempotency_key, payload, response):
+        expires_at = int(time.time()) + self.ttl_seconds
+        self.ledger.update(
+            *self._key(idempotency_key),
+            {
+                "idempotency_status": COMPLETE,
+                "response_body": json.dumps(response),
+                "expiration_time": expires_at,
+            },
+            remove=("in_flight_until",),
+        )
+        self._cache_put(idempotency_key, {
+            "payload_hash": payload_hash(payload),
+            "response": response,
+            "expires_at": float(expires_at),
+        })
+
+    # Drop this attempt's claim so the request can be retried; a key marked intent_sent, or since taken over by
+    # another attempt, is left alone
+    def release(self, idempotency_key, transaction_id):
+        try:
+            self.ledger.client.delete_item(
+                TableName=self.ledger.table_name,
+                Key=self.ledger.key(*self._key(idempotency_key)),
+                ConditionExpression="transaction_ref = :transaction_ref AND attribute_not_exists(intent_sent)",
+                ExpressionAttributeValues={":transaction_ref": transaction_id},
+            )
+        except Exception as e:
+            logger.error(f"Failed to release idempotency key {idempotency_key}: {str(e)}")
+
+    def _replay(self, idempotency_key, entry, fingerprint):
+        if entry["payload_hash"] and entry["payload_hash"] != fingerprint:
+            raise IdempotencyConflict(f"Idempotency key {idempotency_key} was already used with a different request")
+        logger.info(f"Replaying stored response for idempotency key {idempotency_key}")
+        return entry["response"]
+
+    def _cache_get(self, idempotency_key):
+        with self._lock:
+            entry = self._cache.get(idempotency_key)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.time():
+                del self._cache[idempotency_key]
+                return None
+            self._cache.move_to_end(idempotency_key)
+            return entry
+
+    def _cache_put(self, idempotency_key, entry):
+        with self._lock:
+            self._cache[idempotency_key] = entry
+            self._cache.move_to_end(idempotency_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
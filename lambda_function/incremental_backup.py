@@ -0,0 +1,150 @@
+import json
+import logging
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+import backup_formats
+
+# Initialize Logging
+logger = logging.getLogger()
+
+# Position recorded for a shard that has been read to its end
+CLOSED = "CLOSED"
+
+deserializer = TypeDeserializer()
+
+
+class StreamPositionLost(RuntimeError):
+    pass
+
+
+# Helper Function: Stream images are typed attribute values ({"S": ...}); backups hold plain items
+def _plain(image):
+    return {name: deserializer.deserialize(value) for name, value in image.items()}
+
+
+# Helper Function: One delta row per stream record
+def delta_row(record):
+    change = record["dynamodb"]
+    row = {
+        "event": record["eventName"],
+        "sequence_number": change["SequenceNumber"],
+        "keys": _plain(change["Keys"]),
+    }
+    if "NewImage" in change:
+        row["new_image"] = _plain(change["NewImage"])
+    return row
+
+
+def load_state(s3, bucket, key):
+    try:
+        return json.loads(s3.get_object(Bucket=bucket, Key=key)["Body"].read())
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+            return None
+        raise
+
+
+def save_state(s3, bucket, key, state):
+    s3.put_object(Bucket=bucket, Key=key, Body=json.dumps(state, indent=2), ContentType="application/json")
+
+
+def list_shards(streams, stream_arn):
+    shards, params = [], {"StreamArn": stream_arn}
+    while True:
+        description = streams.describe_stream(**params)["StreamDescription"]
+        shards.extend(description["Shards"])
+        last = description.get("LastEvaluatedShardId")
+        if not last:
+            return shards
+        params["ExclusiveStartShardId"] = last
+
+
+# Helper Function: Parents before children, so each item's changes are read in order across shard splits
+def _lineage_order(shards):
+    pending = {shard["ShardId"]: shard for shard in shards}
+    ordered = []
+    while pending:
+        ready = [shard for shard in pending.values() if shard.get("ParentShardId") not in pending]
+        for shard in ready:
+            ordered.append(pending.pop(shard["ShardId"]))
+    return ordered
+
+
+# Read every stream record after positions ({shard_id: sequence number or CLOSED}) and hand delta rows to
+# on_rows in order. Returns the new positions. Raises StreamPositionLost when records the previous run did not
+# read have already been trimmed (streams keep 24 hours), in which case only a full snapshot is safe.
+def read_changes(streams, stream_arn, positions, on_rows, page_size=1000):
+    shards = _lineage_order(list_shards(streams, stream_arn))
+    listed = {shard["ShardId"] for shard in shards}
+    lost = [shard_id for shard_id, position in positions.items() if position != CLOSED and shard_id not in listed]
+    if lost:
+        raise StreamPositionLost(f"Stream shards {', '.join(lost)} were trimmed before they were read")
+
+    new_positions = {shard_id: position for shard_id, position in positions.items() if shard_id in listed}
+    for shard in shards:
+        shard_id = shard["ShardId"]
+        position = new_positions.get(shard_id)
+        if position == CLOSED:
+            continue
+        parent = shard.get("ParentShardId")
+        if positions and position is None and parent and parent not in listed and parent not in positions:
+            raise StreamPositionLost(f"Parent shard {parent} of {shard_id} was trimmed before it was read")
+
+        params = {"StreamArn": stream_arn, "ShardId": shard_id}
+        if position:
+            params.update(ShardIteratorType="AFTER_SEQUENCE_NUMBER", SequenceNumber=position)
+        else:
+            params["ShardIteratorType"] = "TRIM_HORIZON"
+        try:
+            iterator = streams.get_shard_iterator(**params)["ShardIterator"]
+            while iterator:
+                response = streams.get_records(ShardIterator=iterator, Limit=page_size)
+                records = response.get("Records", [])
+                if records:
+                    on_rows([delta_row(record) for record in records])
+                    position = records[-1]["dynamodb"]["SequenceNumber"]
+                iterator = response.get("NextShardIterator")
+                if iterator is None:
+                    position = CLOSED
+                elif not records:
+                    # An open shard with nothing new: caught up
+                    break
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("TrimmedDataAccessException", "ExpiredIteratorException"):
+                raise StreamPositionLost(f"Stream shard {shard_id} no longer holds position {position}") from e
+            raise
+        if position:
+            new_positions[shard_id] = position
+    return new_positions
+
+
+# Helper Function: Raw chunks of an S3 object, read as a stream
+def iter_object(s3, bucket, key, chunk_size=1024 * 1024):
+    body = s3.get_object(Bucket=bucket, Key=key)["Body"]
+    return iter(lambda: body.read(chunk_size), b"")
+
+
+# Merge a full snapshot with the delta files taken after it into a new full snapshot, written to encoder.
+# Only the deltas' latest image per key is held in memory; the snapshot itself is streamed. Returns item count.
+def compact(s3, bucket, full_key, delta_keys, backup_format, key_names, encoder, batch_size=1000):
+    changes = {}
+    for delta_key in delta_keys:
+        for row in backup_formats.iter_items(backup_format, iter_object(s3, bucket, delta_key)):
+            key = tuple(row["keys"][name] for name in key_names)
+            changes[key] = row.get("new_image")  # None for REMOVE
+
+    written, batch = 0, []
+    for item in backup_formats.iter_items(backup_format, iter_object(s3, bucket, full_key)):
+        key = tuple(item.get(name) for name in key_names)
+        if key in changes:
+            item = changes.pop(key)
+        if item is not None:
+            batch.append(item)
+        if len(batch) >= batch_size:
+            encoder.write_items(batch)
+            written += len(batch)
+            batch = []
+    # Items created after the snapshot
+    batch.extend(image for image in changes.values() if image is not None)
+    encoder.write_items(batch)
+    return written + len(batch)
@@ -0,0 +1,171 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import dynamodb_batch
+import payload_codec
+from sharded_index import ShardedIndex
+
+# Initialize Logging
+logger = logging.getLogger()
+
+# Ledger key schema (dynamodb.tf): hash key transaction_id, range key process_type
+HASH_KEY = "transaction_id"
+RANGE_KEY = "process_type"
+
+# Attributes written through payload_codec, decoded on read
+DETAILS_ATTRIBUTES = ("response_details",)
+
+# DynamoDB accepts at most 100 keys per BatchGetItem call
+BATCH_GET_LIMIT = 100
+
+# Write-sharded status index (dynamodb.tf): status#<shard>#<day> -> status_at. Every write that sets status
+# sets both, so no status lands on a single hot index partition.
+LEDGER_STATUS_SHARDS = int(os.getenv("LEDGER_STATUS_SHARDS", "16"))
+STATUS_INDEX = ShardedIndex("status-shard-index", "status", "status_shard", "status_at", LEDGER_STATUS_SHARDS)
+
+
+# All ledger I/O goes through here: it owns the composite key and caches prepared update templates
+class LedgerRepository:
+    def __init__(self, client, table_name, max_workers=10, status_index=STATUS_INDEX):
+        self.client = client
+        self.table_name = table_name
+        self.max_workers = max_workers
+        self.status_index = status_index
+        self._templates = {}
+        self._templates_lock = threading.Lock()
+
+    def key(self, transaction_id, process_type):
+        return {HASH_KEY: transaction_id, RANGE_KEY: process_type}
+
+    # Helper Function: Prepared UpdateExpression/names for a set of attributes, built once per shape
+    def _update_template(self, attribute_names, expected_status, remove):
+        shape = (attribute_names, expected_status is not None, remove)
+        template = self._templates.get(shape)
+        if template is None:
+            names = {f"#a{i}": name for i, name in enumerate(attribute_names)}
+            expression = "SET " + ", ".join(f"#a{i} = :a{i}" for i in range(len(attribute_names)))
+            if remove:
+                names.update({f"#r{i}": name for i, name in enumerate(remove)})
+                expression += " REMOVE " + ", ".join(f"#r{i}" for i in range(len(remove)))
+            template = {"UpdateExpression": expression, "ExpressionAttributeNames": names}
+            if expected_status is not None:
+                names["#expected_status"] = "status"
+                template["ConditionExpression"] = "#expected_status = :expected_status"
+            with self._templates_lock:
+                self._templates[shape] = template
+        return template
+
+    # Parameters for one UpdateItem (also usable inside TransactWriteItems)
+    def build_update(self, transaction_id, process_type, attributes, expected_status=None, remove=()):
+        attributes = self.status_index.stamp(attributes, transaction_id)
+        attribute_names = tuple(sorted(attributes))
+        template = self._update_template(attribute_names, expected_status, tuple(remove))
+        values = {f":a{i}": attributes[name] for i, name in enumerate(attribute_names)}
+        if expected_status is not None:
+            values[":expected_status"] = expected_status
+        return {
+            "TableName": self.table_name,
+            "Key": self.key(transaction_id, process_type),
+            "UpdateExpression": template["UpdateExpression"],
+            "ExpressionAttributeNames": dict(template["ExpressionAttributeNames"]),
+            "ExpressionAttributeValues": values,
+            **({"ConditionExpression": template["ConditionExpression"]} if "ConditionExpression" in template else {}),
+        }
+
+    # Parameters for one PutItem (also usable inside TransactWriteItems)
+    def build_put(self, item, condition=None, values=None):
+        params = {"TableName": self.table_name, "Item": self.status_index.stamp(item, item.get(HASH_KEY))}
+        if condition:
+            params["ConditionExpression"] = condition
+        if values:
+            params["ExpressionAttributeValues"] = values
+        return params
+
+    # (table_name, request) pair for dynamodb_batch.batch_write
+    def put_request(self, item):
+        return dynamodb_batch.put_request(self.table_name, self.status_index.stamp(item, item.get(HASH_KEY)))
+
+    def put(self, item, condition=None, values=None):
+        return self.client.put_item(**self.build_put(item, condition, values))
+
+    def get(self, transaction_id, process_type, consistent=False):
+        response = self.client.get_item(
+            TableName=self.table_name,
+            Key=self.key(transaction_id, process_type),
+            ConsistentRead=consistent,
+        )
+        return payload_codec.decode_item(response.get("Item"), DETAILS_ATTRIBUTES)
+
+    # Every row of one transaction (one per process_type), with a paginated Query on the hash key
+    def query_transaction(self, transaction_id, consistent=False):
+        params = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": f"{HASH_KEY} = :transaction_id",
+            "ExpressionAttributeValues": {":transaction_id": transaction_id},
+            "ConsistentRead": consistent,
+        }
+        items = []
+        while True:
+            response = self.client.query(**params)
+            items.extend(payload_codec.decode_item(item, DETAILS_ATTRIBUTES) for item in response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                return items
+            params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def update(self, transaction_id, process_type, attributes, expected_status=None, remove=()):
+        return self.client.update_item(**self.build_update(
+            transaction_id, process_type, attributes, expected_status, remove
+        ))
+
+    def delete(self, transaction_id, process_type):
+        return self.client.delete_item(TableName=self.table_name, Key=self.key(transaction_id, process_type))
+
+    # Keys (plus status_shard/status_at) of the rows that entered status between start and end (aware
+    # datetimes), oldest first: a scatter-gather over every status shard and day, merged by status_at
+    def query_status(self, status, start, end, limit=None, descending=False):
+        return self.status_index.query(self.client, self.table_name, status, start, end,
+                                       max_workers=self.max_workers, limit=limit, descending=descending)
+
+    # Fetch many rows by (transaction_id, process_type), 100 keys per BatchGetItem, retrying UnprocessedKeys
+    def batch_get(self, keys, consistent=False, max_attempts=8, base_delay=0.05, max_delay=2.0):
+        items = []
+        keys = [self.key(transaction_id, process_type) for transaction_id, process_type in keys]
+        for start in range(0, len(keys), BATCH_GET_LIMIT):
+            request = {self.table_name: {"Keys": keys[start:start + BATCH_GET_LIMIT], "ConsistentRead": consistent}}
+            attempt = 0
+            while request:
+                attempt += 1
+                response = self.client.batch_get_item(RequestItems=request)
+                items.extend(
+                    payload_codec.decode_item(item, DETAILS_ATTRIBUTES)
+                    for item in response.get("Responses", {}).get(self.table_name, [])
+                )
+                request = response.get("UnprocessedKeys") or {}
+                if request and attempt >= max_attempts:
+                    raise RuntimeError(f"BatchGetItem left keys unprocessed after {attempt} attempts")
+                if request:
+                    time.sleep(random.uniform(0, min(max_delay, base_delay * (2 ** attempt))))
+        return items
+
+    # Write many full rows with BatchWriteItem; returns the items left unprocessed
+    def batch_put(self, items):
+        failed = dynamodb_batch.batch_write(self.client, [self.put_request(item) for item in items])
+        return [request["PutRequest"]["Item"] for _, request in failed]
+
+    # Apply many (transaction_id, process_type, attributes[, expected_status]) updates concurrently.
+    # UpdateItem has no batch form; returns (update, error) pairs for the ones that failed.
+    def bulk_update(self, updates):
+        def apply(update):
+            try:
+                self.update(*update)
+                return None
+            except Exception as e:
+                return update, e
+
+        if not updates:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(updates))) as pool:
+            return [failure for failure in pool.map(apply, updates) if failure is not None]
@@ -0,0 +1,82 @@
+import logging
+from botocore.exceptions import ClientError
+
+# Initialize Logging
+logger = logging.getLogger()
+
+# Legal ledger status transitions: target status -> status the row must currently hold
+INITIAL_STATUS = "PAYMENT-INITIATED"
+# Statuses a row may be created in. A payment that already holds its security token is created straight in
+# PAYMENT-PENDING, which folds the INITIATED put and the PENDING update into one conditional put.
+START_STATUSES = (INITIAL_STATUS, "PAYMENT-PENDING")
+LEDGER_TRANSITIONS = {
+    "PAYMENT-PENDING": "PAYMENT-INITIATED",
+    "PAYMENT-SUCCESS": "PAYMENT-PENDING",
+}
+
+
+class InvalidLedgerTransition(ValueError):
+    pass
+
+
+# Helper Function: Put operation creating a new ledger row in a start status
+def build_initial_put(repository, item):
+    if item.get("status") not in START_STATUSES:
+        raise InvalidLedgerTransition(
+            f"Ledger rows must start in {' or '.join(START_STATUSES)}, not {item.get('status')}"
+        )
+    return repository.build_put(item, condition="attribute_not_exists(transaction_id)")
+
+
+# Helper Function: Update operation moving a ledger row to its next status
+def build_transition_update(repository, transaction_id, process_type, to_status, response_details):
+    from_status = LEDGER_TRANSITIONS.get(to_status)
+    if from_status is None:
+        raise InvalidLedgerTransition(f"No legal transition into {to_status}")
+    return repository.build_update(
+        transaction_id,
+        process_type,
+        {"status": to_status, "response_details": response_details},
+        expected_status=from_status,
+    )
+
+
+# Helper Function: Is this ClientError a failed condition (i.e. an illegal transition)?
+def _is_condition_failure(error):
+    code = error.response.get("Error", {}).get("Code")
+    if code == "ConditionalCheckFailedException":
+        return True
+    if code == "TransactionCanceledException":
+        reasons = error.response.get("CancellationReasons", [])
+        return any(reason.get("Code") == "ConditionalCheckFailed" for reason in reasons)
+    return False
+
+
+# Create the ledger row; fails if the transaction already has one
+def start(repository, item):
+    try:
+        repository.client.put_item(**build_initial_put(repository, item))
+    except ClientError as e:
+        if _is_condition_failure(e):
+            raise InvalidLedgerTransition(f"Ledger entry for {item.get('transaction_id')} already exists") from e
+        raise
+
+
+# Move the ledger row to to_status, writing any audit items in the same round trip
+def advance(repository, transaction_id, process_type, to_status, response_details, audit_puts=()):
+    update = build_transition_update(repository, transaction_id, process_type, to_status, response_details)
+    try:
+        if not audit_puts:
+            repository.client.update_item(**update)
+        else:
+            # One TransactWriteItems: the transition and its audit record land together or not at all
+            repository.client.transact_write_items(
+                TransactItems=[{"Update": update}] + [{"Put": put} for put in audit_puts]
+            )
+    except ClientError as e:
+        if _is_condition_failure(e):
+            raise InvalidLedgerTransition(
+                f"Illegal ledger transition to {to_status} for {transaction_id}/{process_type}: "
+                f"row is not in {LEDGER_TRANSITIONS[to_status]}"
+            ) from e
+        raise
@@ -0,0 +1,132 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Initialize Logging
+logger = logging.getLogger()
+
+# S3 rejects multipart parts under 5 MiB (except the last one) and uploads of more than 10,000 parts
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+
+# File-like writer that streams to S3 as a multipart upload. Written chunks collect until they add up to
+# part_size and are then joined into one part (parts may differ in size; only the last may be under 5 MiB);
+# full parts are uploaded on a thread pool with at most max_concurrency in flight, and write() blocks
+# while that many are pending, so memory stays under (max_concurrency + 1) * part_size whatever the
+# object size (plus one write). An object smaller than one part is sent with a single PutObject.
+class MultipartUploader:
+    def __init__(self, s3, bucket, key, part_size=8 * 1024 * 1024, max_concurrency=4, content_type=None):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.max_concurrency = max_concurrency
+        self.content_type = content_type
+        self.bytes_written = 0
+        self._chunks = []
+        self._buffered = 0
+        self._upload_id = None
+        self._futures = []
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._buffered += len(data)
+        self.bytes_written += len(data)
+        if self._buffered >= self.part_size:
+            self._submit(self._take_buffer())
+        return len(data)
+
+    def _take_buffer(self):
+        body = b"".join(self._chunks)
+        self._chunks, self._buffered = [], 0
+        return body
+
+    # Helper Function: Queue one part, waiting for a free upload slot first
+    def _submit(self, body):
+        if self._upload_id is None:
+            params = {"Bucket": self.bucket, "Key": self.key}
+            if self.content_type:
+                params["ContentType"] = self.content_type
+            self._upload_id = self.s3.create_multipart_upload(**params)["UploadId"]
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="s3-part")
+        part_number = len(self._futures) + 1
+        if part_number > MAX_PARTS:
+            raise ValueError(f"Upload to {self.key} needs more than {MAX_PARTS} parts; raise the part size")
+        self._slots.acquire()
+        # Stop streaming as soon as any earlier part has failed
+        for done in self._futures:
+            if done.done() and done.exception() is not None:
+                self._slots.release()
+                raise done.exception()
+        future = self._executor.submit(self._upload_part, part_number, body)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def _upload_part(self, part_number, body):
+        response = self.s3.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=part_number, Body=body
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    # Upload what is left and finish the object
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._upload_id is None:
+                params = {"Bucket": self.bucket, "Key": self.key, "Body": self._take_buffer()}
+                if self.content_type:
+                    params["ContentType"] = self.content_type
+                self.s3.put_object(**params)
+                return
+            if self._chunks:
+                self._submit(self._take_buffer())
+            parts = [future.result() for future in self._futures]
+            self.s3.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, MultipartUpload={"Parts": parts}
+            )
+        except Exception:
+            self._abort_upload()
+            raise
+        finally:
+            self._shutdown()
+
+    # Discard the upload so no orphaned parts are left behind (and billed)
+    def abort(self):
+        self._closed = True
+        self._abort_upload()
+        self._shutdown()
+
+    def _abort_upload(self):
+        if self._upload_id is None:
+            return
+        for future in self._futures:
+            future.cancel()
+        # Let parts already in flight finish first, or they could land after the abort
+        self._shutdown()
+        try:
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+        except Exception as e:
+            logger.error(f"Failed to abort multipart upload of {self.key}: {str(e)}")
+        self._upload_id = None
+
+    def _shutdown(self):
+        self._chunks, self._buffered = [], 0
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
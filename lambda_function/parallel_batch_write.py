@@ -0,0 +1,192 @@
+import time
+import queue
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dynamodb_batch import BATCH_WRITE_LIMIT
+
+# Initialize Logging
+logger = logging.getLogger()
+
+
+# Token bucket over write capacity units per second, shared by every writer thread. With max_rate=None it
+# lets everything through until the table throttles; after that it paces writes at a rate that drops by
+# 30% when batches come back throttled (at most once a second, since every in-flight batch sees the same
+# throttling) and grows by a fifth of the units written on each clean batch, i.e. about 20% a second,
+# never above max_rate. Callers take one unit per item before writing and settle the rest of the consumed
+# capacity afterwards, so the bucket may go briefly negative for items over 1 KB.
+class WriteRateLimiter:
+    def __init__(self, max_rate=None, min_rate=25.0):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate) if max_rate else min_rate
+        self.rate = max_rate
+        self._tokens = max_rate or 0.0
+        self._refilled = time.monotonic()
+        self._decreased = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.rate, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def acquire(self, units):
+        while True:
+            with self._lock:
+                if self.rate is None:
+                    return
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= min(units, self.rate):
+                    self._tokens -= units
+                    return
+                wait = (min(units, self.rate) - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def settle(self, units):
+        with self._lock:
+            if self.rate is not None:
+                self._tokens -= units
+
+    def throttled(self, observed_rate):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._decreased < 1.0:
+                return
+            self._decreased = now
+            self.rate = max(self.min_rate, (self.rate or observed_rate or self.min_rate) * 0.7)
+            self._tokens = min(self._tokens, self.rate)
+
+    def succeeded(self, units):
+        with self._lock:
+            if self.rate is not None:
+                self.rate += units / 5.0
+                if self.max_rate:
+                    self.rate = min(self.rate, self.max_rate)
+
+
+# Helper Function: Write one batch of requests, retrying UnprocessedItems with jittered exponential backoff.
+# Returns (consumed WCU, retries, requests still unprocessed after max_attempts).
+def _write_batch(client, table_name, requests, limiter, stats, max_attempts, base_delay, max_delay):
+    consumed, retries, attempt = 0.0, 0, 0
+    pending = requests
+    while pending:
+        attempt += 1
+        limiter.acquire(len(pending))
+        response = client.batch_write_item(RequestItems={table_name: pending}, ReturnConsumedCapacity="TOTAL")
+        units = sum(float(entry.get("CapacityUnits", 0)) for entry in response.get("ConsumedCapacity", []))
+        consumed += units
+        limiter.settle(units - len(pending))
+        pending = (response.get("UnprocessedItems") or {}).get(table_name, [])
+        if not pending:
+            limiter.succeeded(units)
+            break
+        limiter.throttled(stats.rate())
+        if attempt >= max_attempts:
+            logger.error(f"BatchWriteItem left {len(pending)} items unprocessed after {attempt} attempts")
+            break
+        retries += 1
+        time.sleep(random.uniform(0, min(max_delay, base_delay * (2 ** attempt))))
+    return consumed, retries, pending
+
+
+class _Stats:
+    def __init__(self):
+        self.start = time.monotonic()
+        self.items = 0
+        self.batches = 0
+        self.retries = 0
+        self.consumed_capacity = 0.0
+        self.unprocessed = []
+        self._lock = threading.Lock()
+
+    def add(self, written, consumed, retries, unprocessed):
+        with self._lock:
+            self.items += written
+            self.batches += 1
+            self.consumed_capacity += consumed
+            self.retries += retries
+            self.unprocessed.extend(unprocessed)
+
+    # Write units per second so far, the starting point when an uncapped load first throttles
+    def rate(self):
+        elapsed = time.monotonic() - self.start
+        return self.consumed_capacity / elapsed if elapsed else 0.0
+
+
+# Write an iterable of PutRequest/DeleteRequest dicts to table_name with `workers` threads sharing one
+# thread-safe low-level client. Requests are grouped into 25-item batches and handed to the workers through
+# a queue of at most 2 * workers batches, so a streamed source is never read far ahead of the writes.
+# A request may not appear twice (DynamoDB rejects duplicate keys in one batch, and the order of writes
+# across workers is not defined). max_write_rate caps consumed WCU per second. Returns load stats;
+# requests still unprocessed after max_attempts are returned under "unprocessed".
+def parallel_batch_write(client, table_name, requests, workers=8, max_write_rate=None,
+                         max_attempts=10, base_delay=0.05, max_delay=5.0):
+    limiter = WriteRateLimiter(max_write_rate)
+    stats = _Stats()
+    batches = queue.Queue(maxsize=2 * workers)
+    failed = threading.Event()
+
+    def worker():
+        while True:
+            try:
+                batch = batches.get(timeout=0.1)
+            except queue.Empty:
+                if failed.is_set():
+                    return
+                continue
+            if batch is None:
+                return
+            try:
+                consumed, retries, unprocessed = _write_batch(
+                    client, table_name, batch, limiter, stats, max_attempts, base_delay, max_delay
+                )
+            except Exception:
+                failed.set()
+                raise
+            stats.add(len(batch) - len(unprocessed), consumed, retries, unprocessed)
+
+    # Helper Function: Queue a batch unless a worker has failed, in which case stop reading the source
+    def put(batch):
+        while not failed.is_set():
+            try:
+                batches.put(batch, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-write") as pool:
+        futures = [pool.submit(worker) for _ in range(workers)]
+        batch = []
+        for request in requests:
+            batch.append(request)
+            if len(batch) == BATCH_WRITE_LIMIT:
+                if not put(batch):
+                    break
+                batch = []
+        if batch:
+            put(batch)
+        for _ in futures:
+            put(None)
+        # result() re-raises the first failing worker's error
+        for future in futures:
+            future.result()
+
+    seconds = time.monotonic() - stats.start
+    summary = {
+        "table": table_name,
+        "items": stats.items,
+        "batches": stats.batches,
+        "retries": stats.retries,
+        "consumed_capacity": stats.consumed_capacity,
+        "seconds": round(seconds, 3),
+        "items_per_second": round(stats.items / seconds, 1) if seconds else 0.0,
+        "write_rate": round(stats.consumed_capacity / seconds, 1) if seconds else 0.0,
+        "unprocessed": stats.unprocessed,
+    }
+    logger.info(
+        f"Wrote {stats.items} items to {table_name} in {seconds:.2f}s with {workers} workers: "
+        f"{summary['items_per_second']:.0f} items/s, {summary['write_rate']:.0f} WCU/s, {stats.retries} retries"
+    )
+    return summary
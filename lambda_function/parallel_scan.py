@@ -0,0 +1,68 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# Initialize Logging
+logger = logging.getLogger()
+
+
+# Scan one segment to completion, following LastEvaluatedKey. Each page is handed to on_page(segment, items);
+# returns the segment's stats.
+def scan_segment(client, table_name, segment, total_segments, on_page, page_size=None, consistent=False):
+    params = {
+        "TableName": table_name,
+        "Segment": segment,
+        "TotalSegments": total_segments,
+        "ConsistentRead": consistent,
+        "ReturnConsumedCapacity": "TOTAL",
+    }
+    if page_size:
+        params["Limit"] = page_size
+
+    stats = {"segment": segment, "items": 0, "pages": 0, "consumed_capacity": 0.0}
+    start = time.monotonic()
+    while True:
+        response = client.scan(**params)
+        items = response.get("Items", [])
+        stats["items"] += len(items)
+        stats["pages"] += 1
+        stats["consumed_capacity"] += float(response.get("ConsumedCapacity", {}).get("CapacityUnits", 0))
+        on_page(segment, items)
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        params["ExclusiveStartKey"] = last_key
+    stats["seconds"] = time.monotonic() - start
+    stats["items_per_second"] = stats["items"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+# Scan the whole table as total_segments parallel segments. The low-level client is thread-safe, so all
+# workers share it. on_page may be called from several threads at once. Returns per-segment stats.
+def parallel_scan(client, table_name, total_segments, on_page, max_workers=None, page_size=None, consistent=False):
+    workers = min(max_workers or total_segments, total_segments)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+        futures = [
+            pool.submit(scan_segment, client, table_name, segment, total_segments, on_page, page_size, consistent)
+            for segment in range(total_segments)
+        ]
+        # result() re-raises the first failing segment's error
+        stats = [future.result() for future in futures]
+    for segment in stats:
+        logger.info(
+            f"Scan {table_name} segment {segment['segment']}/{total_segments}: {segment['items']} items, "
+            f"{segment['pages']} pages, {segment['items_per_second']:.0f} items/s, "
+            f"{segment['consumed_capacity']:.1f} RCU"
+        )
+    return stats
+
+
+# Convenience wrapper returning every item alongside the stats
+def scan_all(client, table_name, total_segments, max_workers=None, page_size=None, consistent=False):
+    pages = [[] for _ in range(total_segments)]
+    stats = parallel_scan(
+        client, table_name, total_segments,
+        lambda segment, items: pages[segment].extend(items),
+        max_workers, page_size, consistent,
+    )
+    return [item for page in pages for item in page], stats
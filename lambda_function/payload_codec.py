@@ -0,0 +1,61 @@
+import os
+import json
+import zlib
+from decimal import Decimal
+import serializer
+
+# Details whose JSON is at least this many bytes are stored compressed
+PAYLOAD_COMPRESS_THRESHOLD = int(os.getenv("PAYLOAD_COMPRESS_THRESHOLD", "1024"))
+PAYLOAD_COMPRESSION_LEVEL = int(os.getenv("PAYLOAD_COMPRESSION_LEVEL", "6"))
+
+# Binary payloads start with this marker naming their encoding: zlib-compressed JSON, version 1
+ZLIB_JSON = b"zj1:"
+
+
+# Helper Function: Details as plain DynamoDB values: floats become Decimal, datetimes/UUIDs strings, etc.
+def _to_attribute_values(encoded):
+    return json.loads(encoded, parse_float=Decimal)
+
+
+# Encode details (ledger response_details, audit action_details) for storage. Small payloads become a native
+# Map (or List) attribute, so fields can be read with a ProjectionExpression such as
+# response_details.#status; payloads of PAYLOAD_COMPRESS_THRESHOLD bytes or more become Binary holding
+# ZLIB_JSON + zlib(JSON), when that is smaller. None stays None.
+def encode(details):
+    if details is None:
+        return None
+    encoded = serializer.dumps(details)
+    if len(encoded) >= PAYLOAD_COMPRESS_THRESHOLD:
+        compressed = ZLIB_JSON + zlib.compress(encoded.encode("utf-8"), PAYLOAD_COMPRESSION_LEVEL)
+        if len(compressed) < len(encoded):
+            return compressed
+    if not isinstance(details, (dict, list, tuple)):
+        # A bare string would read back as JSON text; scalars are stored as their JSON
+        return encoded
+    return _to_attribute_values(encoded)
+
+
+# Decode a stored details attribute back to plain Python: Maps come back as they are, Binary is inflated,
+# and strings (rows written before the codec, as JSON text) are parsed
+def decode(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return json.loads(value, parse_float=Decimal) if value else None
+    # boto3 hands Binary attributes back wrapped in boto3.dynamodb.types.Binary
+    raw = getattr(value, "value", value)
+    if isinstance(raw, (bytes, bytearray)):
+        raw = bytes(raw)
+        if raw.startswith(ZLIB_JSON):
+            return json.loads(zlib.decompress(raw[len(ZLIB_JSON):]).decode("utf-8"), parse_float=Decimal)
+        raise ValueError(f"Unknown payload encoding {raw[:8]!r}")
+    return value
+
+
+# Helper Function: Decode the named details attributes of an item in place; returns the item
+def decode_item(item, names):
+    if item:
+        for name in names:
+            if name in item:
+                item[name] = decode(item[name])
+    return item
@@ -1,11 +1,24 @@
 import os
+import time
 import uuid
 import boto3
 import json
 from datetime import datetime, timezone
 from decimal import Decimal
-import requests
 import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor, wait
+import processor_session
+import ledger_state_machine
+from ledger_repository import LedgerRepository
+import dynamodb_batch
+import payload_codec
+import tracing
+from token_cache import TokenCache, DynamoDBTokenStore
+from idempotency import IdempotencyStore, IdempotencyConflict, IdempotencyUnrecorded
+from audit_writer import AuditWriter, install_shutdown_hook, decode_item
+import audit_chain
+import event_ids
 
 # Initialize Logging
 logger = logging.getLogger()
@@ -13,6 +26,10 @@ logger.setLevel(logging.INFO)
 
 # Initialize DynamoDB
 dynamodb = boto3.resource("dynamodb")
+dynamodb_client = dynamodb.meta.client
+if tracing.TRACE_ENABLED:
+    # Ledger, batch and transactional writes report their consumed capacity into each invocation's trace
+    dynamodb_client = tracing.TracedDynamoDBClient(dynamodb_client)
 
 # Fetch and Validate Environment Variables
 PAYMENT_LEDGER_TABLE = os.getenv("DYNAMODB_LEDGER_TABLE_NAME")
@@ -20,6 +37,24 @@ AUDIT_TRAIL_TABLE = os.getenv("DYNAMODB_AUDIT_TABLE_NAME")
 PROCESSOR_URL = os.getenv("PROCESSOR_URL")
 API_KEY = os.getenv("API_KEY")
 KMS_KEY_ARN = os.getenv("KMS_KEY_ARN")
+TOKEN_TTL_SECONDS = int(os.getenv("TOKEN_TTL_SECONDS", "300"))
+TOKEN_REFRESH_AHEAD_SECONDS = int(os.getenv("TOKEN_REFRESH_AHEAD_SECONDS", "60"))
+TOKEN_CACHE_SHARED = os.getenv("TOKEN_CACHE_SHARED", "false").lower() == "true"
+BATCH_MAX_PAYMENTS = int(os.getenv("BATCH_MAX_PAYMENTS", "500"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", os.getenv("PROCESSOR_POOL_SIZE", "10")))
+BATCH_EXECUTION_MODE = os.getenv("BATCH_EXECUTION_MODE", "threads").lower()
+PROCESSOR_CALL_DEADLINE_SECONDS = float(os.getenv("PROCESSOR_CALL_DEADLINE_SECONDS", "30"))
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Longer than the synchronous Lambda's 300s timeout, so a live attempt is never taken over. The SQS consumer is
+# given its queue's visibility timeout instead (lambda_function.tf), so a claim outlives the redelivery of its message
+IDEMPOTENCY_IN_FLIGHT_SECONDS = int(os.getenv("IDEMPOTENCY_IN_FLIGHT_SECONDS", "330"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1024"))
+AUDIT_WRITE_MODE = os.getenv("AUDIT_WRITE_MODE", "transactional").lower()
+AUDIT_SPILL_QUEUE_URL = os.getenv("AUDIT_SPILL_QUEUE_URL")
+AUDIT_FLUSH_TIMEOUT_SECONDS = float(os.getenv("AUDIT_FLUSH_TIMEOUT_SECONDS", "10"))
+AUDIT_SEAL_DELAY_SECONDS = int(os.getenv("AUDIT_SEAL_DELAY_SECONDS", "900"))
+PREWARM_ON_INIT = os.getenv("PREWARM_ON_INIT", "true").lower() == "true"
+PREWARM_TIMEOUT_SECONDS = float(os.getenv("PREWARM_TIMEOUT_SECONDS", "5"))
 
 if not PAYMENT_LEDGER_TABLE or not AUDIT_TRAIL_TABLE or not PROCESSOR_URL or not API_KEY:
     logger.error("Required environment variables are missing.")
@@ -29,65 +64,155 @@ if not PAYMENT_LEDGER_TABLE or not AUDIT_TRAIL_TABLE or not PROCESSOR_URL or not
 payment_ledger_table = dynamodb.Table(PAYMENT_LEDGER_TABLE)
 audit_table = dynamodb.Table(AUDIT_TRAIL_TABLE)
 
-# Helper Function: Validate JSON Serialization
-def safe_json_serialize(data):
+# Ledger Repository: all ledger reads and writes, keyed on (transaction_id, process_type)
+ledger = LedgerRepository(dynamodb_client, PAYMENT_LEDGER_TABLE, max_workers=BATCH_MAX_WORKERS)
+
+# Idempotency Store: records in the ledger table, fronted by a warm-container LRU
+idempotency_store = IdempotencyStore(
+    ledger,
+    ttl_seconds=IDEMPOTENCY_TTL_SECONDS,
+    in_flight_seconds=IDEMPOTENCY_IN_FLIGHT_SECONDS,
+    cache_size=IDEMPOTENCY_CACHE_SIZE,
+)
+
+# Audit Writer: by default (AUDIT_WRITE_MODE=transactional) the audit entry is written in the success
+# TransactWriteItems, two round trips per payment. AUDIT_WRITE_MODE=async makes the success step a plain conditional
+# update and writes audit entries in the background, up to 25 per BatchWriteItem, flushed before each invocation
+# returns: 3 WCU instead of 5, but the flush is one more round trip unless an idempotency write overlaps it.
+audit_writer = None
+if AUDIT_WRITE_MODE == "async":
+    audit_writer = AuditWriter(
+        dynamodb_client,
+        AUDIT_TRAIL_TABLE,
+        sqs_client=boto3.client("sqs") if AUDIT_SPILL_QUEUE_URL else None,
+        spill_queue_url=AUDIT_SPILL_QUEUE_URL,
+    )
+    install_shutdown_hook(audit_writer)
+
+# Helper Function: chain_seq and record_hash of a transaction's latest audit record, for continuing a chain
+# this container has not seen: the last event in the transaction's partition, read consistently
+def load_audit_chain_head(transaction_id):
+    latest = audit_table.query(
+        KeyConditionExpression="transaction_id = :transaction_id",
+        ExpressionAttributeValues={":transaction_id": transaction_id},
+        ProjectionExpression="chain_seq, record_hash",
+        ScanIndexForward=False,
+        ConsistentRead=True,
+        Limit=1,
+    ).get("Items")
+    if not latest or "chain_seq" not in latest[0]:
+        # No records yet, or written before audit records were chained
+        return None
+    return int(latest[0]["chain_seq"]), audit_chain.hash_bytes(latest[0]["record_hash"])
+
+# Audit Chain: hash-links each transaction's audit records as they are built (audit_chain.py)
+audit_trail_chain = audit_chain.AuditChain(head_loader=load_audit_chain_head)
+
+# Helper Function: Ledger/audit details as stored: a native Map, or compressed Binary when large (payload_codec).
+# Decimal, datetime, UUID and bytes are encoded natively; only a payload that cannot be JSON at all
+# (e.g. a circular reference) is stored as its repr
+def encode_details(data):
     try:
-        return json.dumps(data)
+        return payload_codec.encode(data)
     except (TypeError, ValueError):
-        logger.error(f"Failed to serialize data to JSON: {data}")
-        return "{}"
+        logger.error(f"Failed to serialize data to JSON: {data!r}")
+        return payload_codec.encode({"unserializable": repr(data)})
 
 # Step 1: Create Ledger Entry
 def create_ledger_entry(transaction_id, process_type, status, details=None):
     try:
-        payment_ledger_table.put_item(
-            Item={
-                "transaction_id": transaction_id,
-                "process_type": process_type,
-                "status": status,
-                "timestamp": str(datetime.now(timezone.utc)),
-                "response_details": safe_json_serialize(details),
-            }
+        ledger_state_machine.start(
+            ledger,
+            build_ledger_item(transaction_id, process_type, status, str(datetime.now(timezone.utc)), details),
         )
     except Exception as e:
         logger.error(f"Error creating ledger entry for transaction {transaction_id}: {str(e)}")
         raise
 
+# Helper Function: Mint a Security Token, returning it with the processor's TTL if given
+def mint_security_token():
+    headers = {"Authorization": f"Bearer {API_KEY}"}
+    response = processor_session.post("/security-token", headers=headers)
+    response.raise_for_status()
+    body = response.json()
+    token = body.get("token")
+    if not token:
+        raise ValueError("Missing 'token' in processor response")
+    if body.get("expires_in") is not None:
+        return token, float(body["expires_in"])
+    if body.get("expires_at") is not None:
+        return token, float(body["expires_at"]) - datetime.now(timezone.utc).timestamp()
+    return token, None
+
+# Security Token Cache: optionally shared across containers via a KMS-encrypted ledger item
+token_store = None
+if TOKEN_CACHE_SHARED and KMS_KEY_ARN:
+    token_store = DynamoDBTokenStore(
+        ledger,
+        boto3.client("kms"),
+        KMS_KEY_ARN,
+        ("security-token#processor", "SECURITY-TOKEN"),
+    )
+security_token_cache = TokenCache(
+    mint_security_token,
+    default_ttl=TOKEN_TTL_SECONDS,
+    refresh_ahead=TOKEN_REFRESH_AHEAD_SECONDS,
+    shared_store=token_store,
+)
+
 # Step 2: Get Security Token from Payment Processor
 def get_security_token():
     try:
-        headers = {"Authorization": f"Bearer {API_KEY}"}
-        response = requests.post(f"{PROCESSOR_URL}/security-token", headers=headers)
-        response.raise_for_status()
-        token = response.json().get("token")
-        if not token:
-            raise ValueError("Missing 'token' in processor response")
-        return token
+        return security_token_cache.get_token()
     except Exception as e:
         logger.error(f"Error generating security token: {str(e)}")
         raise
 
-# Step 3: Update Ledger for Payment Pending
-def update_ledger_status(transaction_id, status, details=None):
+# Step 3: Update Ledger Status (unconditional; payment flows use transition_ledger_status)
+def update_ledger_status(transaction_id, process_type, status, details=None):
     try:
-        payment_ledger_table.update_item(
-            Key={"transaction_id": transaction_id},
-            UpdateExpression="SET #st = :s, response_details = :rd",
-            ExpressionAttributeNames={"#st": "status"},
-            ExpressionAttributeValues={
-                ":s": status,
-                ":rd": safe_json_serialize(details),
-            },
+        ledger.update(
+            transaction_id,
+            process_type,
+            {"status": status, "response_details": encode_details(details)},
         )
     except Exception as e:
         logger.error(f"Error updating ledger status for transaction {transaction_id}: {str(e)}")
         raise
 
+# Step 3/5: Advance Ledger Status, optionally writing an audit entry in the same transaction
+# (or, with the async audit writer, queueing it once the transition has succeeded)
+def transition_ledger_status(transaction_id, process_type, status, details=None, audit_action=None):
+    try:
+        audit_puts = []
+        # The entry written with a transition (PAYMENT-SUCCESS) is the transaction's first audit record
+        audit_item = build_audit_item(transaction_id, audit_action, details, new_chain=True) if audit_action else None
+        if audit_item and audit_writer is None:
+            audit_puts.append({"TableName": AUDIT_TRAIL_TABLE, "Item": audit_item})
+        ledger_state_machine.advance(
+            ledger,
+            transaction_id,
+            process_type,
+            status,
+            encode_details(details),
+            audit_puts,
+        )
+        if audit_item and audit_writer is not None:
+            audit_writer.enqueue(audit_item)
+    except Exception as e:
+        logger.error(f"Error moving transaction {transaction_id} to {status}: {str(e)}")
+        if audit_action:
+            audit_trail_chain.forget(transaction_id)
+        raise
+
 # Step 4: Process Payment Intent
 def process_payment_intent(transaction_id, amount, token):
     try:
         payload = {"transaction_id": transaction_id, "amount": str(amount), "token": token}
-        response = requests.post(f"{PROCESSOR_URL}/payment-intent", json=payload)
+        response = processor_session.post("/payment-intent", json=payload)
+        if response.status_code == 401:
+            # The cached token was revoked or expired early; mint a fresh one next time
+            security_token_cache.invalidate()
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -95,25 +220,57 @@ def process_payment_intent(transaction_id, amount, token):
         raise
 
 # Step 5: Log Payment Success in Ledger
-def log_payment_success(transaction_id, details):
-    update_ledger_status(transaction_id, "PAYMENT-SUCCESS", details)
+def log_payment_success(transaction_id, process_type, details):
+    update_ledger_status(transaction_id, process_type, "PAYMENT-SUCCESS", details)
+
+# Helper Function: Build an Audit Trail Item, linked into its transaction's hash chain
+def build_audit_item(transaction_id, action_type, details, new_chain=False):
+    now = datetime.now(timezone.utc)
+    item = {
+        "transaction_id": transaction_id,
+        "event_id": event_ids.new_event_id(now),
+        "action_type": action_type,
+        "timestamp": str(now),
+        "action_details": encode_details(details),
+    }
+    return audit_trail_chain.link(item, now, new_chain)
 
 # Step 6: Create Audit Entry for Successful Payment
 def create_audit_entry(transaction_id, action_type, details):
     try:
-        audit_table.put_item(
-            Item={
-                "audit_id": str(uuid.uuid4()),
-                "transaction_id": transaction_id,
-                "action_type": action_type,
-                "timestamp": str(datetime.now(timezone.utc)),
-                "action_details": safe_json_serialize(details),
-            }
-        )
+        if audit_writer is not None:
+            audit_writer.enqueue(build_audit_item(transaction_id, action_type, details))
+        else:
+            audit_table.put_item(Item=build_audit_item(transaction_id, action_type, details))
     except Exception as e:
         logger.error(f"Error creating audit entry for transaction {transaction_id}: {str(e)}")
+        audit_trail_chain.forget(transaction_id)
         raise
 
+# Read API: A transaction's ledger rows and its audit events in event_id order, both read with strongly
+# consistent Queries on the tables' hash key. The audit events' hash chain is checked before their details are
+# decoded; chain_problems is empty when the history is complete and unaltered.
+def get_transaction_history(transaction_id):
+    params = {
+        "KeyConditionExpression": "transaction_id = :transaction_id",
+        "ExpressionAttributeValues": {":transaction_id": transaction_id},
+        "ConsistentRead": True,
+    }
+    events = []
+    while True:
+        response = audit_table.query(**params)
+        events.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    chain_problems = audit_chain.check_chain(transaction_id, events)
+    return {
+        "transaction_id": transaction_id,
+        "ledger": ledger.query_transaction(transaction_id, consistent=True),
+        "events": [payload_codec.decode_item(event, ("action_details",)) for event in events],
+        "chain_problems": chain_problems,
+    }
+
 # Step 7: Normalize Processor Response
 def normalize_response(response):
     return {
@@ -122,38 +279,316 @@ def normalize_response(response):
         "transaction_id": response.get("transaction_id"),
     }
 
-# Step 8: Lambda Handler
-def lambda_handler(event, context):
+# Helper Function: Validate one payment request, returning (process_type, amount)
+def parse_payment_input(payment):
+    if not isinstance(payment, dict):
+        raise ValueError("Invalid input: each payment must be an object")
+    process_type = payment.get("process_type")
     try:
-        # Extract Input Data
-        transaction_id = str(uuid.uuid4())
-        process_type = event.get("process_type")
-        amount = Decimal(str(event.get("amount", 0)))
+        amount = Decimal(str(payment.get("amount", 0)))
+    except ArithmeticError:
+        amount = Decimal(0)
 
-        if not process_type or amount <= 0:
-            raise ValueError("Invalid input: process_type and amount must be specified and valid")
+    if not process_type or not amount.is_finite() or amount <= 0:
+        raise ValueError("Invalid input: process_type and amount must be specified and valid")
+    return process_type, amount
 
-        logger.info(f"Starting transaction {transaction_id} with amount {amount} and process_type {process_type}")
+# Helper Function: Build a full Ledger Item (batch writes replace the whole row)
+# Of the ledger GSI keys only status/timestamp are set here; response_details is left out until there are details
+def build_ledger_item(transaction_id, process_type, status, timestamp, details=None):
+    item = {
+        "transaction_id": transaction_id,
+        "process_type": process_type,
+        "status": status,
+        "timestamp": timestamp,
+    }
+    if details is not None:
+        item["response_details"] = encode_details(details)
+    return item
+
+# Helper Function: Batch-write rows for a set of payments, failing the ones left unprocessed.
+# If the write raises (e.g. throttling that outlasts the retries), which chunks landed is unknown, so every
+# payment in it gets failure_status; nothing escapes to abort the rest of the batch.
+def write_payment_batch(payments, results, build_requests, failure_status="error",
+                        failure_message="Ledger write was not processed"):
+    try:
+        requests = []
+        for payment in payments:
+            requests.extend(build_requests(payment))
+        failed = dynamodb_batch.batch_write(dynamodb_client, requests)
+    except Exception as e:
+        logger.error(f"Batch write for {len(payments)} payments failed: {str(e)}")
+        for payment in payments:
+            results[payment["index"]] = batch_result(payment, failure_status, f"{failure_message}: {str(e)}")
+        return []
+    failed_ids = {request["PutRequest"]["Item"]["transaction_id"] for _, request in failed}
+    for payment in payments:
+        if payment["transaction_id"] in failed_ids:
+            results[payment["index"]] = batch_result(payment, failure_status, failure_message)
+    return [payment for payment in payments if payment["transaction_id"] not in failed_ids]
+
+# Helper Function: Per-item batch result
+def batch_result(payment, status, error=None):
+    result = {"index": payment["index"], "transaction_id": payment.get("transaction_id"), "status": status}
+    if error:
+        result["error"] = error
+    return result
+
+# Helper Function: Payment Intents for a batch, as (processor_response, error) pairs in input order
+def run_payment_intents(payments, token):
+    calls = [
+        functools.partial(process_payment_intent, payment["transaction_id"], payment["amount"], token)
+        for payment in payments
+    ]
+    if not calls:
+        return []
+    if BATCH_EXECUTION_MODE == "asyncio":
+        # asyncio is only imported by containers configured to use it
+        import async_processor
+        return async_processor.run_calls(calls, BATCH_MAX_WORKERS, PROCESSOR_CALL_DEADLINE_SECONDS)
+
+    outcomes = []
+    with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(calls))) as pool:
+        for future in [pool.submit(call) for call in calls]:
+            try:
+                outcomes.append((future.result(), None))
+            except Exception as e:
+                outcomes.append((None, e))
+    return outcomes
+
+# Helper Function: Apply fn to every item on the bounded batch worker pool
+def run_concurrently(fn, items):
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(items))) as pool:
+        return list(pool.map(fn, items))
+
+# Helper Function: Claim idempotency keys for a batch; returns the payments this invocation now owns
+def claim_idempotency_keys(payments, results):
+    def claim(payment):
+        try:
+            return idempotency_store.begin(payment["idempotency_key"], payment["payload"], payment["transaction_id"]), None
+        except Exception as e:
+            return None, e
+
+    keyed = [payment for payment in payments if payment["idempotency_key"]]
+    claimed = []
+    for payment, (stored_result, error) in zip(keyed, run_concurrently(claim, keyed)):
+        if isinstance(error, IdempotencyUnrecorded):
+            # Retrying would charge again
+            results[payment["index"]] = batch_result({"index": payment["index"]}, "unrecorded", str(error))
+        elif error is not None:
+            results[payment["index"]] = batch_result({"index": payment["index"]}, "error", str(error))
+        elif stored_result is not None:
+            results[payment["index"]] = {**stored_result, "index": payment["index"], "replayed": True}
+        else:
+            claimed.append(payment)
+    return claimed
+
+# Helper Function: Mark the idempotency keys of payments about to be sent to the processor; returns the
+# payments that may be sent. A payment whose key could not be marked is failed and not sent.
+def mark_intents_sent(payments, results):
+    def mark(payment):
+        try:
+            idempotency_store.mark_intent_sent(payment["idempotency_key"], payment["transaction_id"])
+            return None
+        except Exception as e:
+            return e
+
+    keyed = [payment for payment in payments if payment["idempotency_key"]]
+    for payment, error in zip(keyed, run_concurrently(mark, keyed)):
+        if error is not None:
+            logger.error(f"Error marking idempotency key {payment['idempotency_key']}: {str(error)}")
+            results[payment["index"]] = batch_result(payment, "error", str(error))
+    return [payment for payment in payments if results[payment["index"]] is None]
+
+# Batch Mode: Settle many payments, returning one result per payment in input order. Results are filled into
+# `results` when given, so a caller still has those decided before an exception.
+def settle_payments(payments, results=None):
+    if not isinstance(payments, list):
+        raise ValueError("Invalid input: payments must be a list")
+    if len(payments) > BATCH_MAX_PAYMENTS:
+        raise ValueError(f"Invalid input: a batch may hold at most {BATCH_MAX_PAYMENTS} payments")
+
+    results = [None] * len(payments) if results is None else results
+    accepted = []
+    timestamp = str(datetime.now(timezone.utc))
+    for index, payment in enumerate(payments):
+        try:
+            process_type, amount = parse_payment_input(payment)
+        except ValueError as e:
+            results[index] = batch_result({"index": index}, "error", str(e))
+            continue
+        accepted.append({
+            "index": index,
+            "transaction_id": str(uuid.uuid4()),
+            "process_type": process_type,
+            "amount": amount,
+            "idempotency_key": payment.get("idempotency_key"),
+            "payload": idempotency_payload(payment),
+        })
+
+    claimed, sent = [], []
+    try:
+        # Idempotency: claim keys up front; completed duplicates are answered from their stored result
+        with tracing.step("idempotency_begin"):
+            claimed = claim_idempotency_keys(accepted, results)
+        accepted = [payment for payment in accepted if results[payment["index"]] is None]
+
+        logger.info(f"Starting batch of {len(payments)} payments ({len(accepted)} to process)")
+
+        # Step 2: One Security Token for the whole batch
+        try:
+            with tracing.step("token"):
+                token = get_security_token() if accepted else None
+        except Exception as e:
+            # Step 1 alone: the failed attempts stay on the ledger as PAYMENT-INITIATED
+            with tracing.step("create_ledger"):
+                write_payment_batch(accepted, results, lambda p: [ledger.put_request(
+                    build_ledger_item(p["transaction_id"], p["process_type"], "PAYMENT-INITIATED", timestamp),
+                )])
+            for payment in accepted:
+                results[payment["index"]] = batch_result(payment, "error", str(e))
+            accepted = []
 
-        # Step 1: Create Ledger Entry for Payment Initiation
-        create_ledger_entry(transaction_id, process_type, "PAYMENT-INITIATED")
+        # Step 1 + 3: Ledger Entries created straight in Payment Pending, 25 per BatchWriteItem.
+        # BatchWriteItem cannot carry condition expressions; each row gets a fresh transaction_id.
+        with tracing.step("create_ledger"):
+            accepted = write_payment_batch(accepted, results, lambda p: [ledger.put_request(build_ledger_item(
+                p["transaction_id"], p["process_type"], "PAYMENT-PENDING", timestamp, {"token": token},
+            ))])
 
-        # Step 2: Generate Security Token
-        token = get_security_token()
+        # Step 4: Payment Intents with bounded concurrency, once their idempotency keys are marked
+        with tracing.step("idempotency_mark"):
+            accepted = mark_intents_sent(accepted, results)
+        sent = accepted
+        succeeded = []
+        with tracing.step("intent"):
+            outcomes = run_payment_intents(accepted, token)
+        for payment, (processor_response, error) in zip(accepted, outcomes):
+            if error is not None:
+                results[payment["index"]] = batch_result(payment, "error", str(error))
+                continue
+            if processor_response.get("status", "").lower() != "success":
+                error_message = processor_response.get("message", "Unknown error occurred")
+                logger.error(f"Payment failed for transaction {payment['transaction_id']}: {error_message}")
+                results[payment["index"]] = batch_result(payment, "error", f"Payment failed: {error_message}")
+                continue
+            payment["response"] = normalize_response(processor_response)
+            succeeded.append(payment)
 
-        # Step 3: Create Ledger Entry for Payment Pending
-        update_ledger_status(transaction_id, "PAYMENT-PENDING", {"token": token})
+        # Step 5 + 6: Payment Success rows and their Audit Entries.
+        # These payments were charged, so a lost write is reported as "unrecorded", never as a retryable error.
+        with tracing.step("success_update"):
+            succeeded = write_payment_batch(succeeded, results, lambda p: [
+                ledger.put_request(build_ledger_item(
+                    p["transaction_id"], p["process_type"], "PAYMENT-SUCCESS", timestamp, p["response"],
+                )),
+                dynamodb_batch.put_request(
+                    AUDIT_TRAIL_TABLE,
+                    build_audit_item(p["transaction_id"], "PAYMENT-SUCCESS", p["response"], new_chain=True),
+                ),
+            ], "unrecorded", "Payment succeeded but its ledger/audit write was not processed")
+        for payment in succeeded:
+            results[payment["index"]] = batch_result(payment, "success")
+    finally:
+        # A payment sent to the processor always gets a result: if a later step raised before recording it,
+        # it is "unrecorded", and its key is completed with that result so a retry replays it, never re-charges
+        for payment in sent:
+            if results[payment["index"]] is None:
+                results[payment["index"]] = batch_result(
+                    payment, "unrecorded", "Payment was sent to the processor but its result was not recorded"
+                )
+        sent_indexes = {payment["index"] for payment in sent}
+        with tracing.step("idempotency_finish"):
+            run_concurrently(lambda p: finish_idempotency_key(
+                p["idempotency_key"],
+                p["transaction_id"],
+                p["payload"],
+                results[p["index"]],
+                p["index"] in sent_indexes,
+            ), claimed)
+    return results
+
+# Batch Mode: Process many payments in one invocation
+def process_payment_batch(payments):
+    results = settle_payments(payments)
+    failed_count = sum(1 for result in results if result["status"] != "success")
+    logger.info(f"Batch finished: {len(results) - failed_count} succeeded, {failed_count} failed")
+    tracing.annotate(payments=len(results), failed=failed_count)
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "results": results,
+            "succeeded": len(results) - failed_count,
+            "failed": failed_count,
+        }),
+    }
 
-        # Step 4: Process Payment Intent
-        processor_response = process_payment_intent(transaction_id, amount, token)
+# Helper Function: Client-supplied idempotency key from the event or an Idempotency-Key header
+def get_idempotency_key(event):
+    if event.get("idempotency_key"):
+        return str(event["idempotency_key"])
+    for name, value in (event.get("headers") or {}).items():
+        if name.lower() == "idempotency-key" and value:
+            return str(value)
+    return None
+
+# Helper Function: The part of a payment request an idempotency key is bound to
+def idempotency_payload(payment):
+    return {"process_type": payment.get("process_type"), "amount": str(payment.get("amount"))}
+
+# Helper Function: Store the outcome for an idempotency key, or release the key if nothing was charged
+def finish_idempotency_key(idempotency_key, transaction_id, payload, response, charged):
+    try:
+        if charged:
+            idempotency_store.complete(idempotency_key, payload, response)
+        else:
+            idempotency_store.release(idempotency_key, transaction_id)
+    except Exception as e:
+        # The payment outcome stands; a retry will see an in-flight key until it times out
+        logger.error(f"Error recording idempotency key {idempotency_key}: {str(e)}")
+
+# Step 8: Process a Single Payment. progress["intent_sent"] marks that the processor may have charged it.
+def process_single_payment(event, transaction_id, progress):
+    try:
+        # Extract Input Data
+        process_type, amount = parse_payment_input(event)
+
+        logger.info(f"Starting transaction {transaction_id} with amount {amount} and process_type {process_type}")
+
+        # Step 2: Generate Security Token (usually from the cache, with no network call)
+        with tracing.step("token"):
+            try:
+                token = get_security_token()
+            except Exception:
+                # Step 1 alone: the failed attempt stays on the ledger as PAYMENT-INITIATED
+                create_ledger_entry(transaction_id, process_type, "PAYMENT-INITIATED")
+                raise
+
+        # Step 1 + 3: Create the Ledger Entry straight in Payment Pending, one conditional put instead of an
+        # INITIATED put and a PENDING update
+        with tracing.step("create_ledger"):
+            create_ledger_entry(transaction_id, process_type, "PAYMENT-PENDING", {"token": token})
+
+        # Step 4: Process Payment Intent. Its idempotency key is marked first, so once the processor may have
+        # charged the key can no longer be taken over by a retry.
+        if progress.get("idempotency_key"):
+            with tracing.step("idempotency_mark"):
+                idempotency_store.mark_intent_sent(progress["idempotency_key"], transaction_id)
+        progress["intent_sent"] = True
+        with tracing.step("intent"):
+            processor_response = process_payment_intent(transaction_id, amount, token)
 
         # Step 5: Handle Payment Success or Failure
         if processor_response.get("status", "").lower() == "success":
             normalized_response = normalize_response(processor_response)
-            log_payment_success(transaction_id, normalized_response)
 
-            # Step 6: Create Audit Entry
-            create_audit_entry(transaction_id, "PAYMENT-SUCCESS", normalized_response)
+            # Step 5 + 6: Log Payment Success and queue its Audit Entry (or write both in one transaction)
+            with tracing.step("success_update"):
+                transition_ledger_status(
+                    transaction_id, process_type, "PAYMENT-SUCCESS", normalized_response, audit_action="PAYMENT-SUCCESS"
+                )
 
             # Step 8: Return Success Response
             return {
@@ -172,3 +607,208 @@ def lambda_handler(event, context):
             "statusCode": 500,
             "body": json.dumps({"error": str(e)}),
         }
+
+# Idempotent Payment: duplicates of a completed request get the stored response with no processor or ledger traffic
+def process_idempotent_payment(event, idempotency_key, transaction_id):
+    payload = idempotency_payload(event)
+    try:
+        with tracing.step("idempotency_begin"):
+            stored_response = idempotency_store.begin(idempotency_key, payload, transaction_id)
+    except IdempotencyConflict as e:
+        logger.error(f"Rejected request for idempotency key {idempotency_key}: {str(e)}")
+        return {
+            "statusCode": 409,
+            "body": json.dumps({"error": str(e)}),
+        }
+    if stored_response is not None:
+        tracing.annotate(replayed=True)
+        return stored_response
+
+    progress = {"intent_sent": False, "idempotency_key": idempotency_key}
+    response = process_single_payment(event, transaction_id, progress)
+    with tracing.step("idempotency_finish"):
+        finish_idempotency_key(
+            idempotency_key, transaction_id, payload, response, response["statusCode"] == 200 or progress["intent_sent"]
+        )
+    return response
+
+# Helper Function: Write queued audit entries before the invocation returns; entries not written within
+# AUDIT_FLUSH_TIMEOUT_SECONDS are spilled
+def flush_audit_entries():
+    if audit_writer is None:
+        return
+    with tracing.step("audit_flush"):
+        audit_writer.flush(AUDIT_FLUSH_TIMEOUT_SECONDS)
+    logger.info(f"Audit writer stats: {audit_writer.stats()}")
+
+# Helper Function: Log how long the container's first request took, once, next to what the init phase prewarmed
+def record_first_request(handler, start):
+    global first_request_pending
+    if not first_request_pending:
+        return
+    first_request_pending = False
+    logger.info("First request metrics: " + json.dumps({
+        "handler": handler,
+        "first_request_ms": round((time.perf_counter() - start) * 1000, 1),
+        "prewarmed": PREWARM_ON_INIT,
+        "init_prewarm": init_prewarm,
+    }))
+
+# Lambda Handler
+def lambda_handler(event, context):
+    start = time.perf_counter()
+    tracing.begin("lambda_handler")
+    tracing.annotate(cold_start=first_request_pending)
+    response = None
+    try:
+        # Batch Mode: {"payments": [{"process_type": ..., "amount": ...}, ...]}
+        if "payments" in event:
+            response = process_payment_batch(event["payments"])
+            return response
+
+        transaction_id = str(uuid.uuid4())
+        tracing.annotate(transaction_id=transaction_id)
+        idempotency_key = get_idempotency_key(event)
+        if idempotency_key:
+            response = process_idempotent_payment(event, idempotency_key, transaction_id)
+        else:
+            response = process_single_payment(event, transaction_id, {})
+        return response
+
+    except Exception as e:
+        logger.error(f"Error in transaction processing: {str(e)}")
+        response = {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)}),
+        }
+        return response
+
+    finally:
+        logger.info(f"Security token cache stats: {security_token_cache.stats()}")
+        flush_audit_entries()
+        record_first_request("lambda_handler", start)
+        tracing.finish(status_code=response["statusCode"] if response else 500)
+
+# SQS Entry Point: Consume payment requests from an SQS event source mapping.
+# Returns batchItemFailures so only failed messages become visible again (ReportBatchItemFailures).
+def sqs_handler(event, context):
+    start = time.perf_counter()
+    tracing.begin("sqs_handler")
+    tracing.annotate(cold_start=first_request_pending)
+    records, payments = [], []
+    discarded = 0
+    for record in event.get("Records", []):
+        try:
+            payment = json.loads(record.get("body") or "")
+        except ValueError:
+            payment = None
+        # A body that is not a JSON object fails the same way on every delivery, so it is dropped rather than
+        # returned for retry
+        if not isinstance(payment, dict):
+            logger.error(f"Discarding unparseable body of SQS message {record.get('messageId')}")
+            discarded += 1
+            continue
+        # Redelivered messages keep their messageId, so it doubles as the idempotency key
+        payment.setdefault("idempotency_key", record.get("messageId"))
+        records.append(record)
+        payments.append(payment)
+
+    results = [None] * len(records)
+    try:
+        settle_payments(payments, results)
+    except Exception as e:
+        logger.error(f"Error processing SQS batch of {len(records)} messages: {str(e)}")
+    finally:
+        logger.info(f"Security token cache stats: {security_token_cache.stats()}")
+        flush_audit_entries()
+        record_first_request("sqs_handler", start)
+
+    # Messages left without a result never reached the processor and are returned for retry. "unrecorded"
+    # payments were charged; redelivering them would charge again.
+    results = [result or {"status": "error"} for result in results]
+    failures = [
+        {"itemIdentifier": record["messageId"]}
+        for record, result in zip(records, results)
+        if result["status"] == "error"
+    ]
+    logger.info(f"SQS batch finished: {len(records) - len(failures)} processed, {len(failures)} returned for retry, "
+                f"{discarded} discarded")
+    tracing.finish(messages=len(records) + discarded, returned_for_retry=len(failures), discarded=discarded)
+    return {"batchItemFailures": failures}
+
+# SQS Entry Point: Write audit entries the async audit writer spilled to AUDIT_SPILL_QUEUE_URL, filed under the
+# audit bucket open now (audit_chain.refile) so none lands in a bucket already sealed.
+# Returns batchItemFailures for messages whose entry was still not written.
+def audit_spill_handler(event, context):
+    message_ids, requests, failures = {}, [], []
+    for record in event.get("Records", []):
+        try:
+            table_name, item = decode_item(record.get("body") or "")
+            message_ids[item["transaction_id"], item["event_id"]] = record["messageId"]
+            requests.append(dynamodb_batch.put_request(table_name, audit_chain.refile(item)))
+        except (ValueError, KeyError):
+            # Left for the redrive policy to move to the dead-letter queue
+            logger.error(f"Unreadable spilled audit entry in SQS message {record.get('messageId')}")
+            failures.append({"itemIdentifier": record.get("messageId")})
+
+    for _, request in dynamodb_batch.batch_write(dynamodb_client, requests):
+        item = request["PutRequest"]["Item"]
+        failures.append({"itemIdentifier": message_ids[item["transaction_id"], item["event_id"]]})
+    logger.info(f"Replayed {len(requests)} spilled audit entries, {len(failures)} returned for retry")
+    return {"batchItemFailures": failures}
+
+# Scheduled Entry Point: Seal closed audit buckets with a Merkle checkpoint (audit_chain.seal_pending).
+# The first run can be given {"first_bucket": "2026-10-01T00:00:00Z"} to start the checkpoint chain earlier.
+def audit_checkpoint_handler(event, context):
+    sealed = audit_chain.seal_pending(
+        dynamodb_client,
+        AUDIT_TRAIL_TABLE,
+        delay_seconds=AUDIT_SEAL_DELAY_SECONDS,
+        first_bucket=(event or {}).get("first_bucket"),
+    )
+    logger.info(f"Sealed {len(sealed)} audit buckets: {sealed}")
+    return {"sealed": sealed}
+
+# Helper Function: Prime the DynamoDB client (endpoint, credentials, a pooled HTTPS connection) without reading items
+def prime_dynamodb():
+    dynamodb_client.describe_table(TableName=PAYMENT_LEDGER_TABLE)
+
+# Helper Function: Mint (or load the shared) security token into the cache
+def prewarm_token():
+    get_security_token()
+
+# Helper Function: Run prewarm steps in order, timing each; a failed step is logged and the rest still run
+def run_prewarm_steps(steps, stats):
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            stats[name] = {**(step() or {}), "ms": round((time.perf_counter() - start) * 1000, 1)}
+        except Exception as e:
+            logger.warning(f"Init prewarm step {name} failed: {str(e)}")
+            stats[name] = {"error": str(e), "ms": round((time.perf_counter() - start) * 1000, 1)}
+
+# Init Phase: Do the first request's setup during Lambda's init window: the processor connection (DNS, TCP,
+# TLS) then a security token on it, alongside a primed DynamoDB connection. Nothing here fails init; steps
+# still running after PREWARM_TIMEOUT_SECONDS are left to finish in the background.
+def prewarm():
+    start = time.perf_counter()
+    stats = {}
+    chains = [
+        [("processor", processor_session.prewarm), ("token", prewarm_token)],
+        [("dynamodb", prime_dynamodb)],
+    ]
+    pool = ThreadPoolExecutor(max_workers=len(chains))
+    futures = [pool.submit(run_prewarm_steps, chain, stats) for chain in chains]
+    wait(futures, timeout=PREWARM_TIMEOUT_SECONDS)
+    pool.shutdown(wait=False)
+    # Steps left running still write to stats; report a copy
+    stats = dict(stats)
+    pending = [name for chain in chains for name, _ in chain if name not in stats]
+    if pending:
+        logger.warning(f"Init prewarm still running after {PREWARM_TIMEOUT_SECONDS}s: {', '.join(pending)}")
+    stats.update({"ms": round((time.perf_counter() - start) * 1000, 1), "pending": pending})
+    logger.info("Init prewarm: " + json.dumps(stats))
+    return stats
+
+first_request_pending = True
+init_prewarm = prewarm() if PREWARM_ON_INIT else None
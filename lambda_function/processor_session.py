@@ -0,0 +1,148 @@
+import os
+import time
+import socket
+import logging
+import warnings
+import threading
+from urllib.parse import urlsplit
+import tracing
+
+# Initialize Logging
+logger = logging.getLogger()
+
+# Connection Pool Settings
+PROCESSOR_URL = os.getenv("PROCESSOR_URL")
+POOL_SIZE = int(os.getenv("PROCESSOR_POOL_SIZE", "10"))
+IDLE_TIMEOUT_SECONDS = float(os.getenv("PROCESSOR_IDLE_TIMEOUT_SECONDS", "60"))
+CONNECT_TIMEOUT_SECONDS = float(os.getenv("PROCESSOR_CONNECT_TIMEOUT_SECONDS", "3.05"))
+READ_TIMEOUT_SECONDS = float(os.getenv("PROCESSOR_READ_TIMEOUT_SECONDS", "30"))
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("PROCESSOR_HEALTH_CHECK_TIMEOUT_SECONDS", "2"))
+
+# Module-scoped session, kept alive across warm Lambda invocations
+_session = None
+_last_used = 0.0
+_lock = threading.Lock()
+
+
+# Helper Function: The requests package, imported on the first processor call rather than at cold start.
+# Importing it loads urllib3, idna and charset_normalizer and reads the CA bundle into an SSL context.
+def _requests():
+    with warnings.catch_warnings():
+        # Trimmed bundles leave out charset_normalizer: processor responses are JSON, which requests
+        # decodes without charset detection
+        warnings.filterwarnings("ignore", message="Unable to find acceptable character detection")
+        import requests
+    return requests
+
+
+# Helper Function: A urllib3 pool class that records each connection it opens into the current trace, so
+# traced invocations can tell pooled reuse from new connections (and TLS handshakes)
+def _counting_pool(pool_class):
+    class CountingPool(pool_class):
+        def _new_conn(self):
+            tracing.record_new_connection()
+            return super()._new_conn()
+    return CountingPool
+
+
+# Helper Function: Build a Session with a sized, keep-alive connection pool
+def _build_session():
+    requests = _requests()
+    from requests.adapters import HTTPAdapter
+    from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.util.retry import Retry
+
+    # Only connection errors are retried: the request never reached the processor,
+    # so retrying cannot double-charge a payment intent.
+    retries = Retry(total=1, connect=1, read=0, status=0, other=0, allowed_methods=None)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retries)
+    adapter.poolmanager.pool_classes_by_scheme = {
+        "http": _counting_pool(HTTPConnectionPool),
+        "https": _counting_pool(HTTPSConnectionPool),
+    }
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+# Helper Function: Return the shared Session, evicting it if it sat idle too long
+def get_session():
+    global _session, _last_used
+    with _lock:
+        now = time.monotonic()
+        if _session is not None and now - _last_used > IDLE_TIMEOUT_SECONDS:
+            # The processor (or a NAT in between) has most likely dropped our idle
+            # sockets by now; start from a clean pool instead of tripping over them.
+            logger.info(f"Evicting processor connections idle for {now - _last_used:.1f}s")
+            _session.close()
+            _session = None
+        if _session is None:
+            _session = _build_session()
+        _last_used = now
+        return _session
+
+
+# Helper Function: Close the shared Session and all pooled connections
+def close_session():
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+# Helper Function: POST to the processor over the pooled Session
+def post(path, **kwargs):
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS))
+    tracing.record_processor_call()
+    return get_session().post(f"{PROCESSOR_URL}{path}", **kwargs)
+
+
+# Helper Function: Check the processor is reachable, resetting the pool if it is not
+def check_health(path=""):
+    requests = _requests()
+    try:
+        response = get_session().head(f"{PROCESSOR_URL}{path}", timeout=HEALTH_CHECK_TIMEOUT_SECONDS)
+        # Any HTTP answer proves the socket is usable; only 5xx means the processor is unhealthy.
+        return response.status_code < 500
+    except requests.RequestException as e:
+        logger.warning(f"Processor health check failed, resetting connection pool: {str(e)}")
+        close_session()
+        return False
+
+
+# Helper Function: Open a pooled connection to the processor ahead of the first call (builds the Session,
+# resolves DNS, connects and completes the TLS handshake). Returns per-step timings in ms.
+def prewarm():
+    timings = {}
+    start = time.perf_counter()
+    get_session()
+    timings["session_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    url = urlsplit(PROCESSOR_URL)
+    start = time.perf_counter()
+    socket.getaddrinfo(url.hostname, url.port or (443 if url.scheme == "https" else 80), type=socket.SOCK_STREAM)
+    timings["dns_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    start = time.perf_counter()
+    if not check_health():
+        raise ConnectionError(f"Processor at {PROCESSOR_URL} is not reachable")
+    timings["connect_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return timings
+
+
+# Helper Function: Number of open connections currently held by the pool
+def pool_stats():
+    with _lock:
+        if _session is None:
+            return {"pools": 0, "connections": 0, "idle_seconds": None}
+        adapter = _session.get_adapter(PROCESSOR_URL or "https://")
+        container = adapter.poolmanager.pools
+        pools = [pool for pool in (container.get(key) for key in container.keys()) if pool is not None]
+        return {
+            "pools": len(pools),
+            "connections": sum(pool.num_connections for pool in pools),
+            "idle_seconds": round(time.monotonic() - _last_used, 3),
+        }
@@ -0,0 +1,68 @@
+import os
+import json
+import uuid
+import base64
+import logging
+from decimal import Decimal
+from datetime import date, datetime, time
+
+# orjson is not in the Lambda runtime; it is used when bundled unless JSON_BACKEND=json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Initialize Logging
+logger = logging.getLogger()
+
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").lower()
+
+# Types already reported as encoded with str(), so each is logged once per container
+_unknown_types = set()
+
+
+# Helper Function: JSON form of the values DynamoDB and the processor hand back that json cannot encode.
+# Decimals become numbers when a float represents them exactly (every amount does), otherwise strings,
+# so no digits are lost. Anything unrecognised is kept as its str() rather than dropped.
+def default(value):
+    if isinstance(value, Decimal):
+        if value == value.to_integral_value() and abs(value) < 2 ** 63:
+            return int(value)
+        as_float = float(value)
+        # The string comparison settles the common case without building a second Decimal
+        if repr(as_float) == str(value) or Decimal(repr(as_float)) == value:
+            return as_float
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    if isinstance(value, (set, frozenset)):
+        try:
+            return sorted(value)
+        except TypeError:
+            return list(value)
+    type_name = type(value).__name__
+    if type_name not in _unknown_types:
+        _unknown_types.add(type_name)
+        logger.warning(f"Serializing {type_name} values with str()")
+    return str(value)
+
+
+# One compact encoder built at import and reused for every payload
+_encoder = json.JSONEncoder(default=default, separators=(",", ":"), ensure_ascii=False)
+
+
+def _dumps_json(value):
+    return _encoder.encode(value)
+
+
+# orjson encodes datetime and UUID itself (in the same ISO 8601 / hyphenated form) and calls default for the rest
+def _dumps_orjson(value):
+    return orjson.dumps(value, default=default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
+BACKEND = "orjson" if orjson is not None and JSON_BACKEND != "json" else "json"
+dumps = _dumps_orjson if BACKEND == "orjson" else _dumps_json
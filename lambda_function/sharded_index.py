@@ -0,0 +1,86 @@
+import heapq
+import zlib
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+
+# Write-sharded GSI for a low-cardinality attribute (e.g. ledger status). A GSI keyed on the attribute itself
+# puts every write with the same value on one index partition; here the index hash key is
+# <value>#<shard>#<day> instead, with the shard taken from the item's partition key, so each value spreads over
+# `shards` partitions per day. The index range key is the time the attribute was written. Reads fan out over
+# every shard and day in range in parallel and merge the results by that time.
+# The shard count may grow but must not shrink: rows written with more shards would no longer be read.
+class ShardedIndex:
+    def __init__(self, index_name, attribute, key_attribute, sort_attribute, shards=16):
+        self.index_name = index_name
+        self.attribute = attribute
+        self.key_attribute = key_attribute
+        self.sort_attribute = sort_attribute
+        self.shards = shards
+
+    # Helper Function: Shard of an item, from its partition key
+    def shard_of(self, partition_key):
+        return zlib.crc32(str(partition_key).encode("utf-8")) % self.shards
+
+    # Helper Function: Index hash key of one shard on one day (YYYY-MM-DD)
+    def key(self, value, shard, day):
+        return f"{value}#{shard:02d}#{day}"
+
+    # Attributes to write, with the index keys added when they set the indexed attribute. The sort attribute
+    # defaults to now; an item that already carries it (e.g. a restored row) keeps it.
+    def stamp(self, attributes, partition_key):
+        if self.attribute not in attributes:
+            return attributes
+        written_at = attributes.get(self.sort_attribute) or str(datetime.now(timezone.utc))
+        return {
+            **attributes,
+            self.key_attribute: self.key(attributes[self.attribute], self.shard_of(partition_key), written_at[:10]),
+            self.sort_attribute: written_at,
+        }
+
+    # Helper Function: Index hash keys covering value between start and end (aware datetimes)
+    def partitions(self, value, start, end):
+        start, end = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+        days, day = [], start.date()
+        while day <= end.date():
+            days.append(day.isoformat())
+            day += timedelta(days=1)
+        return [self.key(value, shard, day) for day in days for shard in range(self.shards)]
+
+    # Helper Function: One partition's items written between start and end, in order, up to limit
+    def _query_partition(self, client, table_name, partition, start, end, limit, descending):
+        params = {
+            "TableName": table_name,
+            "IndexName": self.index_name,
+            "KeyConditionExpression": "#key = :key AND #at BETWEEN :start AND :end",
+            "ExpressionAttributeNames": {"#key": self.key_attribute, "#at": self.sort_attribute},
+            "ExpressionAttributeValues": {":key": partition, ":start": start, ":end": end},
+            "ScanIndexForward": not descending,
+        }
+        items = []
+        while True:
+            if limit is not None:
+                params["Limit"] = limit - len(items)
+            response = client.query(**params)
+            items.extend(response.get("Items", []))
+            if "LastEvaluatedKey" not in response or (limit is not None and len(items) >= limit):
+                return items
+            params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    # Scatter-gather: items with attribute == value written between start and end (aware datetimes), from every
+    # shard and day in parallel, merged by the time they were written (newest first if descending). With a
+    # limit, each partition reads at most that many items.
+    def query(self, client, table_name, value, start, end, max_workers=10, limit=None, descending=False):
+        partitions = self.partitions(value, start, end)
+        if not partitions:
+            return []
+        start_key, end_key = str(start.astimezone(timezone.utc)), str(end.astimezone(timezone.utc))
+
+        def read(partition):
+            return self._query_partition(client, table_name, partition, start_key, end_key, limit, descending)
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(partitions))) as pool:
+            results = list(pool.map(read, partitions))
+        merged = heapq.merge(*results, key=lambda item: item[self.sort_attribute], reverse=descending)
+        return list(islice(merged, limit))
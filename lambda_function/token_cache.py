@@ -0,0 +1,154 @@
+import time
+import logging
+import threading
+
+# Initialize Logging
+logger = logging.getLogger()
+
+
+# Shared store: one KMS-encrypted token item in the ledger, read by every warm container.
+# key is the (transaction_id, process_type) pair the item lives under.
+class DynamoDBTokenStore:
+    def __init__(self, ledger, kms_client, kms_key_id, key):
+        self.ledger = ledger
+        self.kms_client = kms_client
+        self.kms_key_id = kms_key_id
+        self.key = key
+
+    # Returns (token, expires_at, refresh_at); refresh_at is None for items saved without one
+    def load(self):
+        item = self.ledger.get(*self.key, consistent=True)
+        if not item or float(item.get("expires_at", 0)) <= time.time():
+            return None, 0.0, None
+        plaintext = self.kms_client.decrypt(CiphertextBlob=bytes(item["token_ciphertext"]))["Plaintext"]
+        refresh_at = float(item["refresh_at"]) if "refresh_at" in item else None
+        return plaintext.decode("utf-8"), float(item["expires_at"]), refresh_at
+
+    def save(self, token, expires_at, refresh_at):
+        ciphertext = self.kms_client.encrypt(KeyId=self.kms_key_id, Plaintext=token.encode("utf-8"))["CiphertextBlob"]
+        self.ledger.put({
+            **self.ledger.key(*self.key),
+            "token_ciphertext": ciphertext,
+            "expires_at": str(expires_at),
+            "refresh_at": str(refresh_at),
+            # Let the table's TTL sweep stale tokens
+            "expiration_time": int(expires_at) + 60,
+        })
+
+
+# In-memory security token cache with proactive background refresh and single-flight minting.
+# A token is refreshed refresh_ahead seconds before it expires, or halfway through its life if that is later,
+# so a token that lives no longer than refresh_ahead is not refreshed on every hit. A TTL of 0 is used for the
+# request that minted it and never cached.
+class TokenCache:
+    def __init__(self, fetch_token, default_ttl=300, refresh_ahead=60, shared_store=None):
+        # fetch_token() -> (token, ttl_seconds or None)
+        self.fetch_token = fetch_token
+        self.default_ttl = default_ttl
+        self.refresh_ahead = refresh_ahead
+        self.shared_store = shared_store
+        self._token = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._refreshing = False
+        self._cond = threading.Condition()
+        self._stats = {"hits": 0, "misses": 0, "refreshes": 0, "background_refreshes": 0, "shared_hits": 0, "errors": 0}
+
+    def get_token(self):
+        with self._cond:
+            if self._is_valid(time.time()):
+                self._stats["hits"] += 1
+                if self._needs_refresh(time.time()) and not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh, args=(True,), daemon=True).start()
+                return self._token
+
+            self._stats["misses"] += 1
+            # Single-flight: wait for the in-progress refresh instead of minting another token
+            while self._refreshing:
+                self._cond.wait()
+                if self._is_valid(time.time()):
+                    return self._token
+            self._refreshing = True
+
+        token = self._refresh(False)
+        if token is None:
+            raise ValueError("Security token refresh did not produce a token")
+        return token
+
+    def invalidate(self):
+        with self._cond:
+            self._token = None
+            self._expires_at = 0.0
+            self._refresh_at = 0.0
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats)
+
+    def _is_valid(self, now):
+        return self._token is not None and now < self._expires_at
+
+    def _needs_refresh(self, now):
+        return now >= self._refresh_at
+
+    # Helper Function: When to start refreshing a token that lives ttl seconds and expires at expires_at
+    def _refresh_time(self, expires_at, ttl):
+        return expires_at - min(self.refresh_ahead, ttl / 2)
+
+    # Returns the token it minted or loaded, or None if a background refresh failed
+    def _refresh(self, background):
+        token, expires_at, refresh_at = None, 0.0, 0.0
+        try:
+            if self.shared_store is not None:
+                token, expires_at, refresh_at = self._load_shared()
+            if token is None:
+                token, ttl = self.fetch_token()
+                ttl = max(0.0, ttl if ttl is not None else self.default_ttl)
+                expires_at = time.time() + ttl
+                refresh_at = self._refresh_time(expires_at, ttl)
+                if ttl > 0:
+                    self._save_shared(token, expires_at, refresh_at)
+                with self._cond:
+                    self._stats["background_refreshes" if background else "refreshes"] += 1
+        except Exception as e:
+            # A failed background refresh leaves the still-valid token in place
+            logger.error(f"Error refreshing security token: {str(e)}")
+            with self._cond:
+                self._stats["errors"] += 1
+            if not background:
+                raise
+        finally:
+            with self._cond:
+                if token is not None:
+                    self._token = token
+                    self._expires_at = expires_at
+                    self._refresh_at = refresh_at
+                self._refreshing = False
+                self._cond.notify_all()
+        return token
+
+    def _load_shared(self):
+        try:
+            token, expires_at, refresh_at = self.shared_store.load()
+        except Exception as e:
+            logger.warning(f"Shared security token lookup failed, minting a new token: {str(e)}")
+            return None, 0.0, 0.0
+        if token is None:
+            return None, 0.0, 0.0
+        if refresh_at is None:
+            refresh_at = expires_at - self.refresh_ahead
+        # A shared token already inside the refresh window is treated as a miss
+        if time.time() >= refresh_at:
+            return None, 0.0, 0.0
+        with self._cond:
+            self._stats["shared_hits"] += 1
+        return token, expires_at, refresh_at
+
+    def _save_shared(self, token, expires_at, refresh_at):
+        if self.shared_store is None:
+            return
+        try:
+            self.shared_store.save(token, expires_at, refresh_at)
+        except Exception as e:
+            logger.warning(f"Failed to publish security token to shared store: {str(e)}")
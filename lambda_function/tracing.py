@@ -0,0 +1,188 @@
+import os
+import sys
+import time
+import threading
+import serializer
+
+# Tracing Settings
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+TRACE_NAMESPACE = os.getenv("TRACE_NAMESPACE", "PaymentLedgerAuditTrail")
+FUNCTION_NAME = os.getenv("AWS_LAMBDA_FUNCTION_NAME", "local")
+
+# DynamoDB operations that accept ReturnConsumedCapacity
+CAPACITY_OPERATIONS = frozenset([
+    "put_item", "get_item", "update_item", "delete_item", "query", "scan",
+    "batch_get_item", "batch_write_item", "transact_get_items", "transact_write_items",
+])
+
+# EMF metric declarations, built once per distinct set of metric names
+_declarations = {}
+
+# The invocation being traced. Lambda runs one invocation per container at a time; batch worker
+# threads record into the same trace, so counters are updated under its lock.
+_current = None
+
+
+# Per-invocation record: step timings, DynamoDB calls and capacity, processor calls and connection reuse
+class Trace:
+    __slots__ = ("handler", "start", "steps", "counters", "capacity", "properties", "lock")
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.start = time.perf_counter()
+        self.steps = {}
+        self.counters = {"dynamodb_calls": 0, "dynamodb_ms": 0.0, "processor_calls": 0, "processor_new_connections": 0}
+        self.capacity = {}
+        self.properties = {}
+        self.lock = threading.Lock()
+
+    def add_step(self, name, ms):
+        with self.lock:
+            self.steps[name] = self.steps.get(name, 0.0) + ms
+
+    def add(self, counter, value):
+        with self.lock:
+            self.counters[counter] += value
+
+    # Build the invocation's CloudWatch Embedded Metric Format record
+    def to_emf(self):
+        metrics = {f"{name}_ms": round(ms, 2) for name, ms in self.steps.items()}
+        metrics.update({name: round(value, 2) for name, value in self.counters.items()})
+        metrics["dynamodb_capacity_units"] = round(sum(self.capacity.values()), 2)
+        metrics["total_ms"] = round((time.perf_counter() - self.start) * 1000, 2)
+        record = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": TRACE_NAMESPACE,
+                    "Dimensions": [["FunctionName", "Handler"]],
+                    "Metrics": _declare(tuple(metrics)),
+                }],
+            },
+            "FunctionName": FUNCTION_NAME,
+            "Handler": self.handler,
+            # Per-table capacity is a property, not a metric, so the metric count does not grow with tables
+            "dynamodb_capacity_by_table": {table: round(units, 2) for table, units in self.capacity.items()},
+        }
+        record.update(self.properties)
+        record.update(metrics)
+        return record
+
+
+# Helper Function: EMF metric definitions for a tuple of metric names
+def _declare(names):
+    declaration = _declarations.get(names)
+    if declaration is None:
+        declaration = _declarations[names] = [
+            {"Name": name, "Unit": "Milliseconds" if name.endswith("_ms") else "Count"} for name in names
+        ]
+    return declaration
+
+
+# Times a with-block into the current trace; a no-op outside a traced invocation
+class _Step:
+    __slots__ = ("name", "trace", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _current
+        if self.trace is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.trace is not None:
+            self.trace.add_step(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+
+# Start tracing an invocation of handler; returns None when tracing is off
+def begin(handler):
+    global _current
+    _current = Trace(handler) if TRACE_ENABLED else None
+    return _current
+
+
+# Helper Function: Time a step of the current invocation: `with tracing.step("intent"): ...`
+def step(name):
+    return _Step(name)
+
+
+# Helper Function: Attach properties (transaction_id, status, ...) to the current invocation's record
+def annotate(**properties):
+    trace = _current
+    if trace is not None:
+        trace.properties.update(properties)
+
+
+# Helper Function: Record one processor call
+def record_processor_call():
+    trace = _current
+    if trace is not None:
+        trace.add("processor_calls", 1)
+
+
+# Helper Function: Record a new processor connection; calls that opened none reused a pooled one
+def record_new_connection():
+    trace = _current
+    if trace is not None:
+        trace.add("processor_new_connections", 1)
+
+
+# Helper Function: Record one DynamoDB call, its latency and the ConsumedCapacity of its response
+def record_dynamodb_call(ms, consumed):
+    trace = _current
+    if trace is None:
+        return
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    with trace.lock:
+        trace.counters["dynamodb_calls"] += 1
+        trace.counters["dynamodb_ms"] += ms
+        for entry in consumed or ():
+            table = entry.get("TableName", "unknown")
+            trace.capacity[table] = trace.capacity.get(table, 0.0) + float(entry.get("CapacityUnits", 0))
+
+
+# Emit the current invocation's record as one EMF line on stdout and stop tracing; returns the record
+def finish(**properties):
+    global _current
+    trace, _current = _current, None
+    if trace is None:
+        return None
+    trace.properties.update(properties)
+    record = trace.to_emf()
+    # EMF records must be the whole log line, so they bypass the logger's "[INFO] ..." prefix
+    sys.stdout.write(serializer.dumps(record) + "\n")
+    return record
+
+
+# DynamoDB client wrapper that asks for ConsumedCapacity on every call that supports it and records each
+# call into the current trace. Everything else (exceptions, meta, describe_table, ...) passes through.
+class TracedDynamoDBClient:
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        if name not in CAPACITY_OPERATIONS:
+            return getattr(self._client, name)
+        # Cache the wrapper on the instance so later lookups skip __getattr__
+        operation = self._traced(getattr(self._client, name))
+        setattr(self, name, operation)
+        return operation
+
+    @staticmethod
+    def _traced(call):
+        def traced(**kwargs):
+            kwargs.setdefault("ReturnConsumedCapacity", "TOTAL")
+            response = None
+            started = time.perf_counter()
+            try:
+                response = call(**kwargs)
+                return response
+            finally:
+                consumed = response.get("ConsumedCapacity") if response else None
+                record_dynamodb_call((time.perf_counter() - started) * 1000, consumed)
+        return traced
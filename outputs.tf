@@ -13,7 +13,7 @@ output "payment_ledger_table_name" {
 # Output the ARN for Payment Audit Trail Table
 output "payment_audit_trail_table_name" {
   description = "Name of the PaymentAuditTrail DynamoDB table"
-  value       = aws_dynamodb_table.payment_audit_trail.name
+  value       = aws_dynamodb_table.payment_audit_trail_v2.name
 }
 
 # Output the ARN for the Lambda function
@@ -27,6 +27,12 @@ output "lambda_function_name" {
   value       = aws_lambda_function.paymentledgeraudittrail.function_name
 }
 
+# Output the URL of the payment request queue
+output "payment_requests_queue_url" {
+  description = "URL of the SQS queue feeding the payment SQS consumer"
+  value       = aws_sqs_queue.payment_requests.url
+}
+
 # Output the ARN for the IAM Role
 output "iam_role_arn" {
   description = "ARN of the IAM Role used by the Lambda function"
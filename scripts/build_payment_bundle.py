@@ -0,0 +1,107 @@
+"""Build lambda_function/paymentledgeraudittrail.zip, the payment lambda's deployment package.
+
+By default the package is the whole lambda_function directory, as before.
+With --trim it holds only what the payment lambda imports:
+
+* its own modules, plus requests, urllib3 and certifi;
+* no charset_normalizer, because processor responses are JSON and requests
+  decodes JSON without charset detection;
+* an ASCII-only idna shim (scripts/idna_ascii.py) instead of the idna tables.
+  This needs an ASCII processor host, which is checked against
+  --processor-url;
+* no dist-info, console scripts, urllib3's emscripten support or caches.
+
+--compile adds bytecode so the runtime does not compile every module on a
+cold start. The bytecode is written as unchecked-hash .pyc, which stays valid
+even though zip timestamps lose precision. Build with the runtime's Python
+version (3.8 for this function), or the .pyc files are ignored. Run from the
+repository root:
+
+    python scripts/build_payment_bundle.py --trim --compile --processor-url "$PROCESSOR_URL"
+"""
+import argparse
+import compileall
+import os
+import py_compile
+import shutil
+import sys
+import tempfile
+import zipfile
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(ROOT, "lambda_function")
+RUNTIME = (3, 8)
+
+# The payment lambda's own modules (paymentledgeraudittrail.py and what it imports)
+PAYMENT_MODULES = [
+    "paymentledgeraudittrail", "processor_session", "ledger_state_machine", "ledger_repository",
+    "dynamodb_batch", "async_processor", "token_cache", "idempotency", "serializer", "payload_codec",
+    "tracing", "audit_writer", "audit_chain", "event_ids", "sharded_index",
+]
+VENDORED_PACKAGES = ["requests", "urllib3", "certifi"]
+TRIMMED_PATHS = [os.path.join("urllib3", "contrib", "emscripten")]
+
+
+def _ignore(directory, names):
+    return [name for name in names if name == "__pycache__" or name.endswith((".zip", ".pyc"))]
+
+
+def copy_full(dest):
+    shutil.copytree(SOURCE, dest, ignore=_ignore, dirs_exist_ok=True)
+
+
+def copy_trimmed(dest):
+    for module in PAYMENT_MODULES:
+        shutil.copy2(os.path.join(SOURCE, f"{module}.py"), dest)
+    for package in VENDORED_PACKAGES:
+        shutil.copytree(os.path.join(SOURCE, package), os.path.join(dest, package), ignore=_ignore)
+    for path in TRIMMED_PATHS:
+        shutil.rmtree(os.path.join(dest, path), ignore_errors=True)
+    os.makedirs(os.path.join(dest, "idna"))
+    shutil.copy2(os.path.join(ROOT, "scripts", "idna_ascii.py"), os.path.join(dest, "idna", "__init__.py"))
+
+
+# Lay out the package in dest (a directory); returns dest
+def build_tree(dest, trim=False, processor_url=None, compile_bytecode=False):
+    if trim:
+        host = urlsplit(processor_url or "").hostname
+        if not host:
+            raise SystemExit("--trim needs --processor-url (or PROCESSOR_URL) to check the processor host")
+        if not host.isascii():
+            raise SystemExit(f"Processor host {host} is not ASCII; it needs the full idna package, drop --trim")
+        copy_trimmed(dest)
+    else:
+        copy_full(dest)
+    if compile_bytecode:
+        if sys.version_info[:2] != RUNTIME:
+            print(f"warning: compiling with Python {sys.version_info[0]}.{sys.version_info[1]}; "
+                  f"the python{RUNTIME[0]}.{RUNTIME[1]} runtime will ignore this bytecode", file=sys.stderr)
+        compileall.compile_dir(dest, quiet=1, invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+    return dest
+
+
+def write_zip(tree, output):
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for directory, _, files in os.walk(tree):
+            for name in sorted(files):
+                path = os.path.join(directory, name)
+                bundle.write(path, os.path.relpath(path, tree))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=os.path.join(SOURCE, "paymentledgeraudittrail.zip"))
+    parser.add_argument("--trim", action="store_true", help="only the payment lambda's imports, no charset/IDNA tables")
+    parser.add_argument("--compile", action="store_true", help="include unchecked-hash .pyc files")
+    parser.add_argument("--processor-url", default=os.getenv("PROCESSOR_URL"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tree:
+        build_tree(tree, args.trim, args.processor_url, args.compile)
+        write_zip(tree, args.output)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
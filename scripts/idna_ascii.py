@@ -0,0 +1,26 @@
+# ASCII-only stand-in for the idna package, bundled as idna/__init__.py by build_payment_bundle.py --trim
+# when the processor host is ASCII. requests imports idna unconditionally but only encodes hostnames
+# with it when they are not ASCII, so the 300 KB of Unicode tables in the real package are never used.
+__version__ = "3.10+ascii"
+
+
+class IDNAError(UnicodeError):
+    pass
+
+
+def _text(s):
+    return s.decode("ascii") if isinstance(s, (bytes, bytearray)) else s
+
+
+def encode(s, strict=False, uts46=False, std3_rules=False, transitional=False):
+    s = _text(s)
+    if not s.isascii():
+        raise IDNAError(f"Non-ASCII hostname {s!r} needs the full idna package; rebuild without --trim")
+    return s.lower().encode("ascii")
+
+
+def decode(s, strict=False, uts46=False, std3_rules=False):
+    s = _text(s)
+    if not s.isascii() or any(label.startswith("xn--") for label in s.lower().split(".")):
+        raise IDNAError(f"Hostname {s!r} needs the full idna package; rebuild without --trim")
+    return s.lower()
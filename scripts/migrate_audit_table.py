@@ -0,0 +1,127 @@
+"""Copy the audit trail from the audit_id-keyed table into the (transaction_id, event_id) table.
+
+Scans the old table with a parallel scan (lambda_function/parallel_scan.py)
+and writes each page to the new table with BatchWriteItem as it arrives. Each
+record keeps all its attributes, so its record_hash still verifies, and gets an
+event_id built from its timestamp and, for the random part, its chain_seq and a
+hash of its audit_id. Chained records are filed again under the sharded
+bucket-index key of their timestamp's bucket (audit_bucket is not hashed).
+Rerunning the copy rewrites the same keys, so an interrupted migration can
+simply be run again. Checkpoints are not copied: bucket-index orders records
+by event_id now, so --seal rebuilds them in the new table from the earliest
+migrated bucket on. Run from the repository root, with
+AWS credentials for the tables' account, right after the lambdas are deployed
+against the new table:
+
+    python scripts/migrate_audit_table.py --source "$OLD_AUDIT_TABLE" --target "$DYNAMODB_AUDIT_TABLE_NAME" --segments 16 --seal
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_function"))
+
+import audit_chain  # noqa: E402
+import dynamodb_batch  # noqa: E402
+import event_ids  # noqa: E402
+from parallel_scan import parallel_scan  # noqa: E402
+
+# Sort key the old table kept checkpoint items under
+LEGACY_CHECKPOINT_SORT_KEY = "CHECKPOINT"
+
+
+# Event id for an old record: its timestamp's millisecond, then chain_seq (so a transaction's records minted in
+# the same millisecond keep their chain order) and 64 bits of a hash of the audit_id
+def legacy_event_id(item):
+    millis = event_ids.to_millis(datetime.fromisoformat(item["timestamp"]))
+    digest = int.from_bytes(hashlib.sha256(item["audit_id"].encode("utf-8")).digest()[:8], "big")
+    return event_ids.event_id(millis, (int(item.get("chain_seq", 0)) << 64) | digest)
+
+
+# The old record under the new key, or None for items that are not copied (checkpoints)
+def rekey(item):
+    if item.get("transaction_id") == LEGACY_CHECKPOINT_SORT_KEY:
+        return None
+    new_item = {**item, audit_chain.RANGE_KEY: legacy_event_id(item)}
+    if audit_chain.BUCKET_ATTRIBUTE in new_item:
+        audit_chain.file_record(new_item, datetime.fromisoformat(item["timestamp"]))
+    return new_item
+
+
+# Copy every record from source to target; returns a summary with per-segment scan stats
+def migrate(client, source, target, total_segments=8, page_size=None):
+    start = time.monotonic()
+    lock = threading.Lock()
+    totals = {"copied": 0, "skipped": 0, "failed": 0, "first_bucket": None}
+
+    def copy_page(segment, items):
+        requests, skipped, buckets = [], 0, []
+        for item in items:
+            try:
+                new_item = rekey(item)
+            except (KeyError, ValueError):
+                print(f"Skipping audit record {item.get('audit_id')}: no readable timestamp")
+                new_item = None
+            if new_item is None:
+                skipped += 1
+                continue
+            if audit_chain.BUCKET_ATTRIBUTE in new_item:
+                buckets.append(audit_chain.bucket_of_key(new_item[audit_chain.BUCKET_ATTRIBUTE]))
+            requests.append(dynamodb_batch.put_request(target, new_item))
+        failed = dynamodb_batch.batch_write(client, requests)
+        with lock:
+            totals["copied"] += len(requests) - len(failed)
+            totals["skipped"] += skipped
+            totals["failed"] += len(failed)
+            if buckets:
+                totals["first_bucket"] = min(bucket for bucket in buckets + [totals["first_bucket"]] if bucket)
+
+    segments = parallel_scan(client, source, total_segments, copy_page, page_size=page_size, consistent=True)
+    seconds = time.monotonic() - start
+    return {
+        **totals,
+        "seconds": round(seconds, 3),
+        "items_per_second": round(totals["copied"] / seconds, 1) if seconds else 0.0,
+        "consumed_capacity": sum(segment["consumed_capacity"] for segment in segments),
+        "segments": segments,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", required=True, help="the audit_id-keyed table")
+    parser.add_argument("--target", default=os.getenv("DYNAMODB_AUDIT_TABLE_NAME"),
+                        required="DYNAMODB_AUDIT_TABLE_NAME" not in os.environ)
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--page-size", type=int)
+    parser.add_argument("--seal", action="store_true",
+                        help="seal closed buckets in the target, from the earliest migrated bucket on")
+    args = parser.parse_args()
+
+    client = boto3.resource("dynamodb").meta.client
+    summary = migrate(client, args.source, args.target, args.segments, args.page_size)
+    if args.seal and summary["first_bucket"]:
+        head = client.get_item(TableName=args.target, Key=audit_chain.head_key(), ConsistentRead=True).get("Item")
+        if head is not None:
+            # seal_pending continues an existing checkpoint chain; buckets before its start stay unsealed
+            print(f"Checkpoint chain already started in {args.target}; continuing it from {head['last_bucket']}")
+        summary["sealed"] = []
+        while True:
+            sealed = audit_chain.seal_pending(client, args.target, first_bucket=summary["first_bucket"])
+            summary["sealed"] += sealed
+            if not sealed:
+                break
+    summary["segments"] = len(summary["segments"])
+    print(json.dumps(summary, indent=2, default=str))
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
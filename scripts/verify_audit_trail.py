@@ -0,0 +1,44 @@
+"""Verify the hash-chained audit trail between two times.
+
+Reads only the checkpoints and record chunks that cover the range (see
+lambda_function/audit_verifier.py), prints the report as JSON and exits with
+status 1 if any problem was found. Times are ISO 8601; without a UTC offset
+they are taken as UTC. Run from the repository root, with AWS credentials for
+the table's account:
+
+    python scripts/verify_audit_trail.py --table "$DYNAMODB_AUDIT_TABLE_NAME" --start 2026-10-17T00:00 --end 2026-10-17T06:00
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_function"))
+
+import audit_verifier  # noqa: E402
+
+
+def parse_time(value):
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", default=os.getenv("DYNAMODB_AUDIT_TABLE_NAME"),
+                        required="DYNAMODB_AUDIT_TABLE_NAME" not in os.environ)
+    parser.add_argument("--start", type=parse_time, required=True)
+    parser.add_argument("--end", type=parse_time, required=True)
+    args = parser.parse_args()
+
+    client = boto3.resource("dynamodb").meta.client
+    report = audit_verifier.verify_range(client, args.table, args.start, args.end)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["problems"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Payment request queue consumed by the SQS entry point (paymentledgeraudittrail.sqs_handler)
+resource "aws_sqs_queue" "payment_requests_dlq" {
+  name                      = "${var.dynamodb_table_name}-payment-requests-dlq"
+  message_retention_seconds = 1209600 # 14 days
+}
+
+resource "aws_sqs_queue" "payment_requests" {
+  name                       = "${var.dynamodb_table_name}-payment-requests"
+  visibility_timeout_seconds = 1800 # 6x the consumer Lambda timeout
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.payment_requests_dlq.arn
+    maxReceiveCount     = 3
+  })
+}
+
+resource "aws_lambda_event_source_mapping" "payment_requests" {
+  event_source_arn                   = aws_sqs_queue.payment_requests.arn
+  function_name                      = aws_lambda_function.paymentledgeraudittrail_sqs.arn
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+  function_response_types            = ["ReportBatchItemFailures"] # Only failed messages are retried
+}
+
+# Audit entries the async audit writer (AUDIT_WRITE_MODE=async) could not write; replayed by
+# paymentledgeraudittrail.audit_spill_handler
+resource "aws_sqs_queue" "audit_spill_dlq" {
+  name                      = "${var.dynamodb_table_name}-audit-spill-dlq"
+  message_retention_seconds = 1209600 # 14 days
+}
+
+resource "aws_sqs_queue" "audit_spill" {
+  name                       = "${var.dynamodb_table_name}-audit-spill"
+  visibility_timeout_seconds = 360 # 6x the replay Lambda timeout
+  message_retention_seconds  = 1209600 # 14 days
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.audit_spill_dlq.arn
+    maxReceiveCount     = 5
+  })
+}
+
+resource "aws_lambda_event_source_mapping" "audit_spill" {
+  event_source_arn                   = aws_sqs_queue.audit_spill.arn
+  function_name                      = aws_lambda_function.paymentledgeraudittrail_audit_spill.arn
+  batch_size                         = 25 # One BatchWriteItem
+  maximum_batching_window_in_seconds = 5
+  function_response_types            = ["ReportBatchItemFailures"]
+}
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT, "lambda_function"))
+
+import local_aws  # noqa: E402
+
+# The lambda modules import boto3/botocore at import time; every test runs against the in-memory stand-ins
+AWS = local_aws.install(local_aws.LocalAWS())
+LEDGER_TABLE, AUDIT_TABLE = AWS.create_payment_tables()
+
+os.environ.update({
+    "DYNAMODB_LEDGER_TABLE_NAME": LEDGER_TABLE,
+    "DYNAMODB_AUDIT_TABLE_NAME": AUDIT_TABLE,
+    # Nothing listens here; tests replace the processor calls they need
+    "PROCESSOR_URL": "http://127.0.0.1:9",
+    "API_KEY": "test",
+    "PREWARM_ON_INIT": "false",
+    "TRACE_ENABLED": "false",
+})
+
+
+@pytest.fixture
+def aws():
+    for table in AWS.dynamodb.tables.values():
+        table.items.clear()
+        table._segments = {}
+    AWS.dynamodb.reset_counters()
+    return AWS
+
+
+# The payment lambda with processor calls replaced: one token, and intents recorded in `intents` and approved
+@pytest.fixture
+def payment(aws, monkeypatch):
+    import paymentledgeraudittrail
+
+    intents = []
+
+    def process_payment_intent(transaction_id, amount, token):
+        intents.append(transaction_id)
+        return {"status": "success", "message": "Approved", "transaction_id": transaction_id}
+
+    monkeypatch.setattr(paymentledgeraudittrail, "get_security_token", lambda: "tok")
+    monkeypatch.setattr(paymentledgeraudittrail, "process_payment_intent", process_payment_intent)
+    paymentledgeraudittrail.idempotency_store._cache.clear()
+    paymentledgeraudittrail.intents = intents
+    return paymentledgeraudittrail
@@ -0,0 +1,82 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import local_aws
+import audit_chain
+import audit_verifier
+import dynamodb_batch
+import event_ids
+from audit_writer import encode_item
+
+TABLE = "Audit-Chain"
+BASE = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+HOUR = timedelta(hours=1)
+
+
+@pytest.fixture
+def audit(aws):
+    if TABLE not in aws.dynamodb.tables:
+        aws.dynamodb.create_table(TABLE, audit_chain.HASH_KEY, audit_chain.RANGE_KEY, indexes=[
+            local_aws.LocalIndex(audit_chain.BUCKET_INDEX, audit_chain.BUCKET_ATTRIBUTE, audit_chain.RANGE_KEY),
+        ])
+    aws.dynamodb.tables[TABLE].items.clear()
+    return aws.dynamodb
+
+
+# Chained records for `transactions` transactions of two events each, spread over the hour from BASE
+def build_records(transactions):
+    chain = audit_chain.AuditChain()
+    records = []
+    for i in range(transactions):
+        transaction_id = str(uuid.uuid4())
+        for seq in range(2):
+            moment = BASE + HOUR * (2 * i + seq) / (2 * transactions)
+            records.append(chain.link({
+                "transaction_id": transaction_id,
+                "event_id": event_ids.new_event_id(moment),
+                "action_type": "PAYMENT-SUCCESS",
+                "timestamp": str(moment),
+            }, moment, new_chain=seq == 0))
+    return records
+
+
+def seal(dynamodb):
+    return audit_chain.seal_pending(dynamodb.client, TABLE, now=BASE + HOUR, delay_seconds=0,
+                                    first_bucket=audit_chain.bucket_of(BASE))
+
+
+def test_bucket_spreads_over_shards_and_verifies(audit):
+    records = build_records(40)
+    dynamodb_batch.batch_write(audit.client, [dynamodb_batch.put_request(TABLE, item) for item in records])
+
+    assert seal(audit) == [audit_chain.bucket_of(BASE)]
+    assert len({item[audit_chain.BUCKET_ATTRIBUTE] for item in records}) > 1
+    report = audit_verifier.verify_range(audit.client, TABLE, BASE, BASE + HOUR)
+    assert report["problems"] == []
+    assert report["records_in_range"] == len(records)
+
+    audit.tables[TABLE].items[(records[7]["transaction_id"], records[7]["event_id"])]["action_type"] = "REFUND"
+    report = audit_verifier.verify_range(audit.client, TABLE, BASE, BASE + HOUR)
+    assert any("does not match" in problem for problem in report["problems"])
+
+
+def test_spilled_record_replayed_after_sealing_is_not_tamper(aws, audit, payment):
+    records = build_records(10)
+    late = records.pop(5)  # spilled to SQS, replayed after its bucket was sealed
+    dynamodb_batch.batch_write(audit.client, [dynamodb_batch.put_request(TABLE, item) for item in records])
+    assert seal(audit) == [audit_chain.bucket_of(BASE)]
+
+    response = payment.audit_spill_handler({"Records": [{"messageId": "m1", "body": encode_item(TABLE, late)}]}, None)
+
+    assert response == {"batchItemFailures": []}
+    stored = audit.tables[TABLE].items[(late["transaction_id"], late["event_id"])]
+    now = datetime.now(timezone.utc)
+    assert audit_chain.bucket_of_key(stored[audit_chain.BUCKET_ATTRIBUTE]) == audit_chain.bucket_of(now)
+    assert audit_chain.record_hash(stored) == audit_chain.hash_bytes(late["record_hash"])
+    assert audit_verifier.verify_range(audit.client, TABLE, BASE, BASE + HOUR)["problems"] == []
+    # The replayed record is checked with the bucket it was filed under
+    report = audit_verifier.verify_range(audit.client, TABLE, now - timedelta(minutes=1), now + timedelta(minutes=1))
+    assert report["problems"] == []
+    assert report["records_read"] == 1
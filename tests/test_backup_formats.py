@@ -0,0 +1,80 @@
+import io
+from decimal import Decimal
+
+import pytest
+
+import backup_formats
+
+FORMATS = [backup_format for backup_format in backup_formats.FORMATS
+           if backup_format != "ndjson.zst" or backup_formats.zstandard is not None]
+
+ITEM = {
+    "transaction_id": "tx-1",
+    "amount": Decimal("12.34"),
+    "count": Decimal("7"),
+    # 38 significant digits, beyond what a double holds
+    "balance": Decimal("1234567890123456789.0123456789012345678"),
+    "tiny": Decimal("1E-130"),
+    "tags": {"card", "refund"},
+    "limits": {Decimal("0.1"), Decimal("99999999999999999999.99")},
+    "blobs": {b"\x00\x01", b"\xff"},
+    "payload": b"zj1:\x00\xff",
+    "voided_at": None,
+    "response_details": {
+        "status": "success",
+        "fee": Decimal("0.0000000000000000000000000000000000001"),
+        "raw": b"\x1f\x8b",
+        "flags": {"3ds"},
+        "attempts": [{"code": Decimal("3.14159265358979323846"), "trace": b"\x00"}, None, [{Decimal("2")}]],
+    },
+}
+
+
+def round_trip(backup_format, items):
+    sink = io.BytesIO()
+    encoder = backup_formats.open_encoder(backup_format, sink)
+    encoder.write_items(items)
+    encoder.close()
+    data = sink.getvalue()
+    chunks = [data[offset:offset + 7] for offset in range(0, len(data), 7)]
+    return [backup_formats.restore_item(item) for item in backup_formats.iter_items(backup_format, chunks)]
+
+
+@pytest.mark.parametrize("backup_format", FORMATS)
+def test_items_restore_as_written(backup_format):
+    other = {"transaction_id": "tx-2", "amount": Decimal("1.5")}
+
+    assert round_trip(backup_format, [ITEM, other]) == [ITEM, other]
+
+
+def test_pcol_keeps_null_apart_from_missing():
+    items = [{"transaction_id": "tx-1", "voided_at": None}, {"transaction_id": "tx-2"}]
+
+    assert round_trip("pcol", items) == items
+
+
+def test_restore_applies_deltas_with_nested_types(aws, monkeypatch):
+    import dynamodb_restore
+    monkeypatch.setattr(dynamodb_restore, "S3_BUCKET_NAME", "backup-bucket")
+
+    def upload(key, backup_format, items):
+        sink = io.BytesIO()
+        encoder = backup_formats.open_encoder(backup_format, sink)
+        encoder.write_items(items)
+        encoder.close()
+        aws.s3.put_object(Bucket="backup-bucket", Key=key, Body=sink.getvalue())
+
+    item = dict(ITEM, process_type="sale")
+    changed = dict(item, amount=Decimal("12.35"), response_details=dict(ITEM["response_details"], raw=b"\x00"))
+    created = {"transaction_id": "tx-3", "process_type": "sale", "limits": {Decimal("1E+100")}}
+    upload("backup/full.pcol", "pcol", [item])
+    upload("backup/delta.pcol", "pcol", [
+        {"keys": {"transaction_id": "tx-1", "process_type": "sale"}, "new_image": changed},
+        {"keys": {"transaction_id": "tx-3", "process_type": "sale"}, "new_image": created},
+    ])
+    aws.dynamodb.create_table("Restore-target", "transaction_id", "process_type")
+
+    dynamodb_restore.restore_table("Restore-target", "backup/full.pcol", delta_keys=["backup/delta.pcol"])
+
+    assert sorted(aws.dynamodb.table("Restore-target").items.values(), key=lambda row: row["transaction_id"]) == [
+        changed, created]
@@ -0,0 +1,37 @@
+import dynamodb_batch
+from local_aws import ClientError
+
+
+# batch_write that raises on its nth call (1: PENDING rows, 2: SUCCESS rows + audit)
+def failing_batch_write(monkeypatch, nth, code="ProvisionedThroughputExceededException"):
+    calls = []
+    batch_write = dynamodb_batch.batch_write
+
+    def write(client, requests, **kwargs):
+        calls.append(len(requests))
+        if len(calls) == nth:
+            raise ClientError({"Error": {"Code": code, "Message": "injected"}}, "BatchWriteItem")
+        return batch_write(client, requests, **kwargs)
+
+    monkeypatch.setattr(dynamodb_batch, "batch_write", write)
+    return calls
+
+
+def test_success_write_failure_marks_charged_payments_unrecorded(payment, monkeypatch):
+    failing_batch_write(monkeypatch, 2)
+    results = payment.settle_payments([{"process_type": "sale", "amount": "10.00"} for _ in range(3)])
+    assert len(payment.intents) == 3
+    assert [result["status"] for result in results] == ["unrecorded"] * 3
+    assert all("injected" in result["error"] for result in results)
+
+
+def test_write_failure_before_intent_fails_payments_uncharged(payment, monkeypatch):
+    failing_batch_write(monkeypatch, 1, code="ValidationException")
+    results = payment.settle_payments([{"process_type": "sale", "amount": "10.00"} for _ in range(3)])
+    assert payment.intents == []
+    assert [result["status"] for result in results] == ["error"] * 3
+
+
+def test_invalid_payments_do_not_fail_the_batch(payment):
+    results = payment.settle_payments([{"process_type": "sale", "amount": "10.00"}, {"amount": "-1"}])
+    assert [result["status"] for result in results] == ["success", "error"]
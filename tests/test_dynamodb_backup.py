@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def backup(aws, monkeypatch):
+    import dynamodb_backup
+    monkeypatch.setattr(dynamodb_backup, "S3_BUCKET_NAME", "backup-bucket")
+    monkeypatch.setattr(dynamodb_backup, "EXPORT_POLL_SECONDS", 0.01)
+    aws.dynamodb.exports.clear()
+    return dynamodb_backup
+
+
+def test_retried_scheduled_export_reuses_its_exports(aws, backup):
+    event = {"id": "a1b2", "source": "aws.events", "time": "2026-10-01T00:00:00Z", "mode": "export"}
+
+    first = json.loads(backup.lambda_handler(event, None)["body"])
+    retry = json.loads(backup.lambda_handler(dict(event), None)["body"])
+
+    assert len(aws.dynamodb.exports) == 2  # one per table
+    assert first["manifest"] == retry["manifest"] == "backup/export/manifests/2026-10-01-00-00-00.json"
+    assert [entry["export_arn"] for entry in retry["tables"]] == [entry["export_arn"] for entry in first["tables"]]
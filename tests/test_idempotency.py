@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from conftest import LEDGER_TABLE
+from idempotency import IdempotencyConflict, IdempotencyStore, IdempotencyUnrecorded
+from ledger_repository import LedgerRepository
+from local_aws import ClientError
+
+PAYLOAD = {"process_type": "sale", "amount": "10.00"}
+
+
+# Claims time out as soon as they are made, so every later begin() may try a takeover
+@pytest.fixture
+def expired_store(aws):
+    return lambda: IdempotencyStore(LedgerRepository(aws.dynamodb.client, LEDGER_TABLE), in_flight_seconds=-1)
+
+
+def test_timed_out_claim_without_intent_is_taken_over(expired_store):
+    first, second = expired_store(), expired_store()
+    assert first.begin("key", PAYLOAD, "tx-1") is None
+    assert second.begin("key", PAYLOAD, "tx-2") is None
+
+    # The first attempt lost its claim: it may not send the intent or release the new owner's key
+    with pytest.raises(ClientError):
+        first.mark_intent_sent("key", "tx-1")
+    first.release("key", "tx-1")
+    second.mark_intent_sent("key", "tx-2")
+    record = second.ledger.get("idempotency#key", "IDEMPOTENCY", consistent=True)
+    assert record["transaction_ref"] == "tx-2" and record["intent_sent"] is True
+
+
+def test_timed_out_claim_after_intent_is_never_taken_over(expired_store):
+    first, second = expired_store(), expired_store()
+    assert first.begin("key", PAYLOAD, "tx-1") is None
+    first.mark_intent_sent("key", "tx-1")
+    with pytest.raises(IdempotencyUnrecorded):
+        second.begin("key", PAYLOAD, "tx-2")
+    first.release("key", "tx-1")
+    with pytest.raises(IdempotencyUnrecorded):
+        second.begin("key", PAYLOAD, "tx-2")
+
+
+def test_claim_after_intent_in_flight_is_a_plain_conflict(aws):
+    store = IdempotencyStore(LedgerRepository(aws.dynamodb.client, LEDGER_TABLE))
+    store.begin("key", PAYLOAD, "tx-1")
+    store.mark_intent_sent("key", "tx-1")
+    with pytest.raises(IdempotencyConflict) as raised:
+        store.begin("key", PAYLOAD, "tx-2")
+    assert not isinstance(raised.value, IdempotencyUnrecorded)
+
+
+# The attempt dies after sending its intent (its key is never finished) and its claim times out
+@pytest.fixture
+def crashed_attempt(payment, monkeypatch):
+    monkeypatch.setattr(payment.idempotency_store, "in_flight_seconds", -1)
+    with monkeypatch.context() as patch:
+        patch.setattr(payment, "finish_idempotency_key", lambda *args: None)
+        yield patch
+    assert len(payment.intents) == 1
+
+
+def test_single_payment_retry_after_crash_is_not_charged_again(payment, crashed_attempt):
+    event = {"process_type": "sale", "amount": "10.00", "idempotency_key": "client-key"}
+    assert payment.lambda_handler(event, None)["statusCode"] == 200
+    crashed_attempt.undo()
+
+    response = payment.lambda_handler(event, None)
+    assert response["statusCode"] == 409
+    assert "was not recorded" in json.loads(response["body"])["error"]
+
+
+def test_sqs_redelivery_after_crash_is_unrecorded(payment, crashed_attempt):
+    event = {"Records": [{"messageId": "message-0", "body": json.dumps({"process_type": "sale", "amount": "1"})}]}
+    assert payment.sqs_handler(event, None) == {"batchItemFailures": []}
+    crashed_attempt.undo()
+
+    assert payment.sqs_handler(event, None) == {"batchItemFailures": []}
+    results = payment.settle_payments([{"process_type": "sale", "amount": "1", "idempotency_key": "message-0"}])
+    assert results[0]["status"] == "unrecorded"
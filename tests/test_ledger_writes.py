@@ -0,0 +1,33 @@
+import json
+
+from conftest import LEDGER_TABLE
+
+
+def ledger_rows(aws):
+    return [item for item in aws.dynamodb.tables[LEDGER_TABLE].items.values() if item["process_type"] == "sale"]
+
+
+def test_payment_creates_its_ledger_row_pending(aws, payment):
+    aws.dynamodb.reset_counters()
+
+    response = payment.lambda_handler({"process_type": "sale", "amount": "10.00"}, None)
+
+    assert response["statusCode"] == 200
+    assert [row["status"] for row in ledger_rows(aws)] == ["PAYMENT-SUCCESS"]
+    # One conditional put for INITIATED + PENDING, then the success write with its audit entry: one
+    # TransactWriteItems, or an UpdateItem and the async writer's BatchWriteItem
+    assert aws.dynamodb.calls.get("PutItem") == 1
+    assert aws.dynamodb.round_trips() == (2 if payment.audit_writer is None else 3)
+
+
+def test_token_failure_leaves_the_attempt_initiated(aws, payment, monkeypatch):
+    def no_token():
+        raise ValueError("token service down")
+    monkeypatch.setattr(payment, "get_security_token", no_token)
+
+    response = payment.lambda_handler({"process_type": "sale", "amount": "10.00"}, None)
+
+    assert response["statusCode"] == 500
+    assert "token service down" in json.loads(response["body"])["error"]
+    assert [row["status"] for row in ledger_rows(aws)] == ["PAYMENT-INITIATED"]
+    assert payment.intents == []
@@ -0,0 +1,68 @@
+import json
+
+
+def sqs_event(count):
+    return {"Records": [
+        {"messageId": f"message-{i}", "body": json.dumps({"process_type": "sale", "amount": "10.00"})}
+        for i in range(count)
+    ]}
+
+
+def raise_on_call(monkeypatch, module, name, nth):
+    original = getattr(module, name)
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == nth:
+            raise RuntimeError(f"injected failure in {name}")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(module, name, wrapper)
+
+
+def test_failure_after_charge_is_not_returned_for_retry(payment, monkeypatch):
+    event = sqs_event(3)
+    with monkeypatch.context() as patch:
+        raise_on_call(patch, payment, "normalize_response", 2)
+        response = payment.sqs_handler(event, None)
+    assert len(payment.intents) == 3
+    assert response == {"batchItemFailures": []}
+
+    # The redelivery a retry would cause is answered from the completed keys, from DynamoDB as well as the LRU
+    for clear_cache in (False, True):
+        if clear_cache:
+            payment.idempotency_store._cache.clear()
+        assert payment.sqs_handler(event, None) == {"batchItemFailures": []}
+        assert len(payment.intents) == 3
+    record = payment.ledger.get("idempotency#message-0", "IDEMPOTENCY", consistent=True)
+    assert record["idempotency_status"] == "COMPLETE"
+    assert json.loads(record["response_body"])["status"] == "unrecorded"
+
+
+def test_failure_before_intent_returns_messages_for_retry(payment, monkeypatch):
+    event = sqs_event(3)
+    with monkeypatch.context() as patch:
+        raise_on_call(patch, payment, "write_payment_batch", 1)
+        response = payment.sqs_handler(event, None)
+    assert payment.intents == []
+    assert sorted(failure["itemIdentifier"] for failure in response["batchItemFailures"]) == [
+        "message-0", "message-1", "message-2",
+    ]
+
+    # Their keys were released, so the redelivery is processed
+    assert payment.sqs_handler(event, None) == {"batchItemFailures": []}
+    assert len(payment.intents) == 3
+
+
+
+def test_unparseable_bodies_are_dropped_not_retried(payment):
+    event = sqs_event(2)
+    event["Records"] += [
+        {"messageId": "not-json", "body": "{\"process_type\": "},
+        {"messageId": "not-an-object", "body": json.dumps(["sale", "10.00"])},
+        {"messageId": "empty"},
+    ]
+
+    assert payment.sqs_handler(event, None) == {"batchItemFailures": []}
+    assert len(payment.intents) == 2